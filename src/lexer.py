@@ -0,0 +1,212 @@
+import re
+from typing import Generic, Mapping, Optional, TypeVar
+
+# Character tables, for checking the character that ends a token.
+ALPHABETICAL = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+DIGITS = frozenset("0123456789")
+OCTAL_DIGITS = frozenset("01234567")
+HEX_DIGITS = DIGITS | frozenset("ABCDEFabcdef")
+IDENTIFIER_START = ALPHABETICAL | frozenset("_")
+IDENTIFIER_CHARACTERS = IDENTIFIER_START | DIGITS
+FULL_IDENTIFIER_CHARACTERS = IDENTIFIER_CHARACTERS | frozenset(".")
+SIGNS = frozenset("+-")
+QUOTES = frozenset("\"'")
+
+# Anchored patterns for scanning whole tokens. Use them with .match(), which
+# only matches at the start of the source.
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Parts aren't checked individually; a trailing period is the only error.
+FULL_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+# An option name: an optionally parenthesized (extension) name, then field names.
+OPTION_NAME = re.compile(
+    r"(?:\(\.?[A-Za-z_][A-Za-z0-9_.]*\))?(?:\.?[A-Za-z_][A-Za-z0-9_.]*)?"
+)
+DECIMAL_INT = re.compile(r"[0-9.]+")
+OCTAL_INT = re.compile(r"0([0-7]*)")
+HEX_INT = re.compile(r"0[xX]([0-9A-Fa-f]*)")
+FLOAT_MANTISSA = re.compile(r"[0-9.]+")
+FLOAT_EXPONENT = re.compile(r"[eE]([+-]?)([0-9]*)")
+# Brackets, quotes that start strings brackets inside should be skipped in, and
+# slashes that might start comments that should be skipped too.
+BRACKETS = re.compile(r"[][{}()<>\"'/]")
+CLOSING_BRACKETS = {"[": "]", "{": "}", "(": ")", "<": ">"}
+
+# Escape sequences in string literals.
+OCTAL_ESCAPE = re.compile(r"[0-7]{1,3}")
+HEX_ESCAPE = re.compile(r"[0-9A-Fa-f]{1,2}")
+SIMPLE_ESCAPES = {
+    "a": b"\a",
+    "b": b"\b",
+    "f": b"\f",
+    "n": b"\n",
+    "r": b"\r",
+    "t": b"\t",
+    "v": b"\v",
+    "\\": b"\\",
+    "'": b"'",
+    '"': b'"',
+    "?": b"?",
+}
+
+
+KeywordValue = TypeVar("KeywordValue")
+
+
+class KeywordTable(Generic[KeywordValue]):
+    """Finds which of a set of keywords a source starts with, in one lookup.
+
+    The leading (possibly dotted) identifier is scanned once and looked up in a
+    dict, so this costs the same however many keywords there are. Keywords only
+    match whole words: "string" doesn't match "strings" or "string.Value".
+    """
+
+    def __init__(self, keywords: Mapping[str, KeywordValue]):
+        self.keywords = dict(keywords)
+
+    def match(self, source: str) -> Optional[tuple[KeywordValue, int]]:
+        """Returns the value for the keyword source starts with, and where it ends."""
+        word = FULL_IDENTIFIER.match(source)
+        if word is None:
+            return None
+        value = self.keywords.get(word.group())
+        if value is None:
+            return None
+        return value, word.end()
+
+
+def keyword_end(source: str, keyword: str) -> int:
+    """Returns where keyword ends if source starts with it as a whole word, or -1."""
+    end = len(keyword)
+    if not source.startswith(keyword) or (
+        end < len(source) and source[end] in FULL_IDENTIFIER_CHARACTERS
+    ):
+        return -1
+    return end
+
+
+def string_end(source: str, start: int = 0) -> int:
+    """Returns the index of the quote closing the string literal at start, or -1.
+
+    This jumps between quotes and backslashes rather than visiting every
+    character, so it costs about as much as the literal is long.
+    """
+    quote = source[start]
+    position = start + 1
+    end = -1
+    while True:
+        if end < position:
+            # Only look for another quote once the last one turned out escaped.
+            end = source.find(quote, position)
+            if end < 0:
+                return -1
+        backslash = source.find("\\", position, end)
+        if backslash < 0:
+            return end
+        # Skip whatever's escaped, which might be this quote.
+        position = backslash + 2
+
+
+def decode_string(raw: str) -> bytes:
+    """Decodes the escape sequences in a string literal's contents.
+
+    Strings are byte sequences in protobuf, and octal and hex escapes can produce
+    bytes that aren't valid UTF-8, so this returns bytes. Raises ValueError if an
+    escape sequence is invalid.
+    """
+    if "\\" not in raw:
+        return raw.encode("utf-8")
+    output = bytearray()
+    position = 0
+    while True:
+        backslash = raw.find("\\", position)
+        if backslash < 0:
+            output += raw[position:].encode("utf-8")
+            return bytes(output)
+        output += raw[position:backslash].encode("utf-8")
+        escape = raw[backslash + 1 : backslash + 2]
+        position = backslash + 2
+        if escape in SIMPLE_ESCAPES:
+            output += SIMPLE_ESCAPES[escape]
+        elif escape and escape in OCTAL_DIGITS:
+            octal_match = OCTAL_ESCAPE.match(raw, backslash + 1)
+            assert octal_match is not None
+            value = int(octal_match.group(), 8)
+            if value > 0xFF:
+                raise ValueError(f"Octal escape is out of range: {raw!r}")
+            output.append(value)
+            position = octal_match.end()
+        elif escape in ("x", "X"):
+            hex_match = HEX_ESCAPE.match(raw, position)
+            if hex_match is None:
+                raise ValueError(f"Hex escape has no digits: {raw!r}")
+            output.append(int(hex_match.group(), 16))
+            position = hex_match.end()
+        elif escape in ("u", "U"):
+            length = 4 if escape == "u" else 8
+            digits = raw[position : position + length]
+            if len(digits) < length or not HEX_DIGITS.issuperset(digits):
+                raise ValueError(f"Unicode escape is truncated: {raw!r}")
+            output += chr(int(digits, 16)).encode("utf-8")
+            position += length
+        else:
+            raise ValueError(f"Invalid escape sequence \\{escape}: {raw!r}")
+
+
+def comment_end(source: str, start: int = 0) -> int:
+    """Returns where the comment at start ends, or -1 if it's unterminated.
+
+    If there's no comment at start, start is returned.
+    """
+    if source.startswith("//", start):
+        end = source.find("\n", start + 2)
+        return len(source) if end < 0 else end + 1
+    if source.startswith("/*", start):
+        end = source.find("*/", start + 2)
+        return -1 if end < 0 else end + 2
+    return start
+
+
+def skip_comments(source: str) -> str:
+    """Returns source after the comments and whitespace it starts with.
+
+    This is for places comments are allowed but not kept, like aggregate values.
+    An unterminated comment is left in place, to fail to parse.
+    """
+    source = source.lstrip()
+    while source.startswith("/"):
+        end = comment_end(source)
+        if end <= 0:
+            return source
+        source = source[end:].lstrip()
+    return source
+
+
+def closing_bracket(source: str, start: int = 0) -> int:
+    """Returns the index of the bracket closing the one at start, or -1.
+
+    Brackets nested inside, of any kind, and string literals are skipped over.
+    """
+    expected = [CLOSING_BRACKETS[source[start]]]
+    position = start + 1
+    while True:
+        match = BRACKETS.search(source, position)
+        if match is None:
+            return -1
+        character = match.group()
+        position = match.end()
+        if character in QUOTES:
+            end = string_end(source, match.start())
+            if end < 0:
+                return -1
+            position = end + 1
+        elif character == "/":
+            end = comment_end(source, match.start())
+            if end < 0:
+                return -1
+            position = max(end, position)
+        elif character in CLOSING_BRACKETS:
+            expected.append(CLOSING_BRACKETS[character])
+        elif character != expected.pop():
+            return -1
+        elif not expected:
+            return match.start()
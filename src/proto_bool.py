@@ -1,6 +1,6 @@
 from typing import Optional
 
-from src.proto_identifier import ProtoFullIdentifier
+from src import lexer
 from src.proto_node import ParsedProtoNode, ProtoNode
 
 
@@ -34,13 +34,15 @@ class ProtoBool(ProtoNode):
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoBoolNode"]:
         if proto_source.startswith("true") and (
-            len(proto_source) == 4 or proto_source[4] not in ProtoFullIdentifier.ALL
+            len(proto_source) == 4
+            or proto_source[4] not in lexer.FULL_IDENTIFIER_CHARACTERS
         ):
             return ParsedProtoBoolNode(
                 ProtoBool(value=True, parent=parent), proto_source[4:].strip()
             )
         elif proto_source.startswith("false") and (
-            len(proto_source) == 5 or proto_source[5] not in ProtoFullIdentifier.ALL
+            len(proto_source) == 5
+            or proto_source[5] not in lexer.FULL_IDENTIFIER_CHARACTERS
         ):
             return ParsedProtoBoolNode(
                 ProtoBool(value=False, parent=parent), proto_source[5:].strip()
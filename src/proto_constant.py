@@ -1,14 +1,249 @@
-from typing import Optional
+from typing import Optional, Sequence
 
+from src import lexer
 from src.proto_bool import ProtoBool
 from src.proto_float import ProtoFloat, ProtoFloatSign
-from src.proto_identifier import ProtoFullIdentifier
+from src.proto_identifier import ProtoFullIdentifier, ProtoIdentifier
 from src.proto_int import ProtoInt, ProtoIntSign
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src.proto_node import ParsedProtoNode, ProtoList, ProtoNode, ProtoParseError
 from src.proto_string_literal import ProtoStringLiteral
 
+
+class ParsedProtoAggregateNode(ParsedProtoNode):
+    node: "ProtoAggregate"
+    remaining_source: str
+
+
+class ProtoAggregate(ProtoNode):
+    """A message value in text format, like `{ name: "foo" sizes: [1, 2] }`.
+
+    Text format also allows angle brackets, like `< name: "foo" >`, which mean the
+    same thing, so they're serialized as braces.
+    """
+
+    BRACKETS = {"{": "}", "<": ">"}
+
+    def __init__(self, fields: list["ProtoAggregateField"], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields = ProtoList(self, fields)
+        for field in self.fields:
+            field.parent = self
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ProtoAggregate) and self.fields == other.fields
+
+    def __str__(self) -> str:
+        return f"<ProtoAggregate fields={self.fields}>"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def normalize(self) -> "ProtoAggregate":
+        return self
+
+    @classmethod
+    def match(
+        cls, proto_source: str, parent: Optional[ProtoNode] = None
+    ) -> Optional["ParsedProtoAggregateNode"]:
+        closing_bracket = cls.BRACKETS.get(proto_source[:1])
+        if closing_bracket is None:
+            return None
+        fields = []
+        proto_source = lexer.skip_comments(proto_source[1:])
+        while not proto_source.startswith(closing_bracket):
+            field_match = ProtoAggregateField.match(proto_source)
+            if field_match is None:
+                raise ProtoParseError(
+                    "Proto has invalid aggregate value",
+                    proto_source,
+                    expected=closing_bracket,
+                )
+            fields.append(field_match.node)
+            proto_source = lexer.skip_comments(field_match.remaining_source)
+            if proto_source[:1] in (",", ";"):
+                proto_source = lexer.skip_comments(proto_source[1:])
+        return ParsedProtoAggregateNode(
+            ProtoAggregate(fields=fields, parent=parent), proto_source[1:].strip()
+        )
+
+    def children(self) -> Sequence[ProtoNode]:
+        return self.fields
+
+    def serialize(self) -> str:
+        if not self.fields:
+            return "{}"
+        return "{ " + " ".join(field.serialize() for field in self.fields) + " }"
+
+    def text(self) -> str:
+        """Returns the fields without the surrounding braces."""
+        return " ".join(field.serialize() for field in self.fields)
+
+
+class ParsedProtoAggregateFieldNode(ParsedProtoNode):
+    node: "ProtoAggregateField"
+    remaining_source: str
+
+
+class ProtoAggregateField(ProtoNode):
+    """A `name: value` pair in an aggregate value.
+
+    The name is an identifier, or an extension or Any type URL in brackets, like
+    `[foo.bar]`. The value is a constant, or a list of them.
+    """
+
+    def __init__(
+        self,
+        name: ProtoIdentifier,
+        value: "ProtoConstant | ProtoAggregateList",
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.name = name
+        self.name.parent = self
+        self.value = value
+        self.value.parent = self
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ProtoAggregateField)
+            and self.name == other.name
+            and self.value == other.value
+        )
+
+    def __str__(self) -> str:
+        return f"<ProtoAggregateField name={self.name} value={self.value}>"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def normalize(self) -> "ProtoAggregateField":
+        return self
+
+    @classmethod
+    def match(
+        cls, proto_source: str, parent: Optional[ProtoNode] = None
+    ) -> Optional["ParsedProtoAggregateFieldNode"]:
+        name: ProtoIdentifier
+        if proto_source.startswith("["):
+            end_bracket = proto_source.find("]")
+            if end_bracket == -1:
+                return None
+            name = ProtoIdentifier(identifier=proto_source[: end_bracket + 1])
+            proto_source = lexer.skip_comments(proto_source[end_bracket + 1 :])
+        else:
+            identifier_match = ProtoIdentifier.match(proto_source)
+            if identifier_match is None:
+                return None
+            name = identifier_match.node
+            proto_source = lexer.skip_comments(identifier_match.remaining_source)
+
+        # The colon is optional before a message value.
+        if proto_source.startswith(":"):
+            proto_source = lexer.skip_comments(proto_source[1:])
+        elif proto_source[:1] not in ProtoAggregate.BRACKETS:
+            raise ProtoParseError(
+                "Proto has invalid aggregate value", proto_source, expected=":"
+            )
+
+        value: ProtoConstant | ProtoAggregateList
+        if proto_source.startswith("["):
+            list_match = ProtoAggregateList.match(proto_source)
+            assert list_match is not None
+            value, proto_source = list_match.node, list_match.remaining_source
+        else:
+            constant_match = ProtoConstant.match(proto_source)
+            if constant_match is None:
+                raise ProtoParseError(
+                    "Proto has invalid aggregate value",
+                    proto_source,
+                    expected="constant",
+                )
+            value, proto_source = constant_match.node, constant_match.remaining_source
+
+        return ParsedProtoAggregateFieldNode(
+            ProtoAggregateField(name=name, value=value, parent=parent), proto_source
+        )
+
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, self.value]
+
+    def serialize(self) -> str:
+        if isinstance(self.value, ProtoConstant) and isinstance(
+            self.value.value, ProtoAggregate
+        ):
+            return f"{self.name.serialize()} {self.value.serialize()}"
+        return f"{self.name.serialize()}: {self.value.serialize()}"
+
+
+class ParsedProtoAggregateListNode(ParsedProtoNode):
+    node: "ProtoAggregateList"
+    remaining_source: str
+
+
+class ProtoAggregateList(ProtoNode):
+    """The values of a repeated field in an aggregate value, like `[1, 2]`."""
+
+    def __init__(self, values: list["ProtoConstant"], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values = ProtoList(self, values)
+        for value in self.values:
+            value.parent = self
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ProtoAggregateList) and self.values == other.values
+
+    def __str__(self) -> str:
+        return f"<ProtoAggregateList values={self.values}>"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def normalize(self) -> "ProtoAggregateList":
+        return self
+
+    @classmethod
+    def match(
+        cls, proto_source: str, parent: Optional[ProtoNode] = None
+    ) -> Optional["ParsedProtoAggregateListNode"]:
+        if not proto_source.startswith("["):
+            return None
+        values = []
+        proto_source = lexer.skip_comments(proto_source[1:])
+        while not proto_source.startswith("]"):
+            constant_match = ProtoConstant.match(proto_source)
+            if constant_match is None:
+                raise ProtoParseError(
+                    "Proto has invalid aggregate list",
+                    proto_source,
+                    expected="constant",
+                )
+            values.append(constant_match.node)
+            proto_source = lexer.skip_comments(constant_match.remaining_source)
+            if proto_source.startswith(","):
+                proto_source = lexer.skip_comments(proto_source[1:])
+            elif not proto_source.startswith("]"):
+                raise ProtoParseError(
+                    "Proto has invalid aggregate list", proto_source, expected="]"
+                )
+        return ParsedProtoAggregateListNode(
+            ProtoAggregateList(values=values, parent=parent), proto_source[1:].strip()
+        )
+
+    def children(self) -> Sequence[ProtoNode]:
+        return self.values
+
+    def serialize(self) -> str:
+        return "[" + ", ".join(value.serialize() for value in self.values) + "]"
+
+
 ProtoConstantTypes = (
-    ProtoFullIdentifier | ProtoStringLiteral | ProtoInt | ProtoFloat | ProtoBool
+    ProtoFullIdentifier
+    | ProtoStringLiteral
+    | ProtoInt
+    | ProtoFloat
+    | ProtoBool
+    | ProtoAggregate
 )
 
 
@@ -39,6 +274,36 @@ class ProtoConstant(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoConstantNode"]:
+        if proto_source[:1] in lexer.QUOTES:
+            # Nothing else starts with a quote, so skip straight to strings.
+            string_literal_match = ProtoStringLiteral.match(
+                proto_source=proto_source, parent=None
+            )
+            if string_literal_match is None:
+                return None
+            literal = string_literal_match.node
+            proto_source = string_literal_match.remaining_source.strip()
+            # Adjacent literals, like "foo" "bar", are one string.
+            rest = lexer.skip_comments(proto_source)
+            while rest[:1] in lexer.QUOTES:
+                string_literal_match = ProtoStringLiteral.match(rest)
+                if string_literal_match is None:
+                    break
+                literal = literal.concatenate(string_literal_match.node)
+                proto_source = string_literal_match.remaining_source.strip()
+                rest = lexer.skip_comments(proto_source)
+            return ParsedProtoConstantNode(
+                ProtoConstant(value=literal, parent=parent), proto_source
+            )
+
+        if proto_source[:1] in ProtoAggregate.BRACKETS:
+            aggregate_match = ProtoAggregate.match(proto_source=proto_source)
+            assert aggregate_match is not None
+            return ParsedProtoConstantNode(
+                ProtoConstant(value=aggregate_match.node, parent=parent),
+                aggregate_match.remaining_source,
+            )
+
         match = ProtoBool.match(proto_source=proto_source)
         if match is not None:
             proto_constant = ProtoConstant(value=match.node, parent=parent)
@@ -54,8 +319,10 @@ class ProtoConstant(ProtoNode):
         else:
             proto_int_match = ProtoInt.match(proto_source=proto_source)
         if proto_int_match is not None:
-            proto_constant = ProtoConstant(value=proto_int_match.node, parent=parent)
-            proto_int_match.node.sign = sign
+            proto_constant = ProtoConstant(
+                value=ProtoInt(value=proto_int_match.node.value, sign=sign),
+                parent=parent,
+            )
             return ParsedProtoConstantNode(
                 proto_constant,
                 proto_int_match.remaining_source.strip(),
@@ -68,8 +335,10 @@ class ProtoConstant(ProtoNode):
         else:
             float_match = ProtoFloat.match(proto_source=proto_source)
         if float_match is not None:
-            proto_constant = ProtoConstant(value=float_match.node, parent=parent)
-            float_match.node.sign = float_sign
+            proto_constant = ProtoConstant(
+                value=ProtoFloat(value=float_match.node.value, sign=float_sign),
+                parent=parent,
+            )
             return ParsedProtoConstantNode(
                 proto_constant,
                 float_match.remaining_source.strip(),
@@ -84,17 +353,11 @@ class ProtoConstant(ProtoNode):
                 identifier_match.remaining_source.strip(),
             )
 
-        string_literal_match = ProtoStringLiteral.match(
-            proto_source=proto_source, parent=None
-        )
-        if string_literal_match is not None:
-            return ParsedProtoConstantNode(
-                ProtoConstant(value=string_literal_match.node, parent=parent),
-                string_literal_match.remaining_source.strip(),
-            )
-
         return None
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.value]
+
     def serialize(self) -> str:
         if not isinstance(self.value, ProtoNode):
             raise ValueError(
@@ -7,7 +7,15 @@ from src.proto_comment import (
 )
 from src.proto_identifier import ParsedProtoIdentifierNode, ProtoIdentifier
 from src.proto_int import ProtoInt, ProtoIntSign
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoErrorNode,
+    ProtoList,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 from src.proto_option import ParsedProtoOptionNode, ProtoOption
 from src.proto_reserved import ProtoReserved
 
@@ -25,13 +33,9 @@ class ProtoEnumValueOption(ProtoOption):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoEnumValueOptionNode"]:
-        test_source = "option " + proto_source.strip() + ";"
-        match = ProtoOption.match(proto_source=test_source)
-        if match is None:
-            return None
+        match = cls.match_assignment(proto_source.strip(), parent=parent)
         return ParsedProtoEnumValueOptionNode(
-            cls(name=match.node.name, value=match.node.value, parent=parent),
-            match.remaining_source.strip(),
+            match.node, match.remaining_source.strip()
         )
 
     def serialize(self) -> str:
@@ -59,9 +63,8 @@ class ProtoEnumValue(ProtoNode):
         self.value.parent = self
 
         if options is None:
-            self.options = []
-        else:
-            self.options = options
+            options = []
+        self.options = ProtoList(self, options)
         for option in self.options:
             option.parent = self
 
@@ -82,10 +85,13 @@ class ProtoEnumValue(ProtoNode):
         return hash(str(self))
 
     def normalize(self) -> "ProtoEnumValue":
+        options = sorted(self.options, key=lambda o: str(o.name))
+        if options == self.options:
+            return self
         return ProtoEnumValue(
             self.identifier,
             self.value,
-            sorted(self.options, key=lambda o: str(o.name)),
+            options,
             parent=self.parent,
         )
 
@@ -95,14 +101,14 @@ class ProtoEnumValue(ProtoNode):
     ) -> Optional["ParsedProtoEnumValueNode"]:
         match = ProtoIdentifier.match(proto_source=proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid enum value name: {proto_source}")
+            raise ProtoParseError("Proto has invalid enum value name", proto_source)
 
         enum_value_name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("="):
-            raise ValueError(
-                f"Proto has invalid enum value syntax, expecting =: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid enum value syntax", proto_source, expected="="
             )
 
         proto_source = proto_source[1:].strip()
@@ -114,32 +120,16 @@ class ProtoEnumValue(ProtoNode):
         else:
             int_match = ProtoInt.match(proto_source=proto_source)
         if int_match is None:
-            raise ValueError(
-                f"Proto has invalid enum value, expecting int: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid enum value", proto_source, expected="int"
             )
 
-        int_match.node.sign = sign
-        enum_value = int_match.node
+        enum_value = ProtoInt(value=int_match.node.value, sign=sign)
         proto_source = int_match.remaining_source.strip()
 
         options: list[ProtoEnumValueOption] = []
         if proto_source.startswith("["):
-            proto_source = proto_source[1:].strip()
-            end_bracket = proto_source.find("]")
-            if end_bracket == -1:
-                raise ValueError(
-                    f"Proto has invalid enum value option syntax, cannot find ]: {proto_source}"
-                )
-            for option_part in proto_source[:end_bracket].strip().split(","):
-                proto_enum_value_option_match = ProtoEnumValueOption.match(
-                    proto_source=option_part.strip(), parent=None
-                )
-                if proto_enum_value_option_match is None:
-                    raise ValueError(
-                        f"Proto has invalid enum value option syntax: {proto_source}"
-                    )
-                options.append(proto_enum_value_option_match.node)
-            proto_source = proto_source[end_bracket + 1 :].strip()
+            options, proto_source = ProtoEnumValueOption.match_list(proto_source)
 
         return ParsedProtoEnumValueNode(
             ProtoEnumValue(
@@ -151,6 +141,9 @@ class ProtoEnumValue(ProtoNode):
             proto_source.strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.identifier, self.value, *self.options]
+
     def serialize(self) -> str:
         serialized_parts = [self.identifier.serialize(), "=", self.value.serialize()]
         if self.options:
@@ -213,17 +206,15 @@ class ProtoEnumValue(ProtoNode):
 
 
 class ProtoEnum(ProtoContainerNode):
+    _values_by_number: Optional[tuple[int, dict[int, ProtoEnumValue]]] = None
+
     def __init__(self, name: ProtoIdentifier, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = name
         self.name.parent = self
 
-    def __eq__(self, other: object) -> bool:
-        return (
-            isinstance(other, ProtoEnum)
-            and super().__eq__(other)
-            and self.name == other.name
-        )
+    def header_eq(self, other: ProtoContainerNode) -> bool:
+        return isinstance(other, ProtoEnum) and self.name == other.name
 
     def __str__(self) -> str:
         return f"<ProtoEnum name={self.name}, nodes={self.nodes}>"
@@ -231,13 +222,16 @@ class ProtoEnum(ProtoContainerNode):
     def __repr__(self) -> str:
         return str(self)
 
-    def normalize(self) -> "ProtoEnum":
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> "ProtoEnum":
         non_comment_nodes = filter(
-            lambda n1: not isinstance(n1, ProtoComment), self.nodes
+            lambda n: not isinstance(n[0], (ProtoComment, ProtoErrorNode)),
+            zip(self.nodes, normalized_nodes),
         )
         return ProtoEnum(
             name=self.name,
-            nodes=sorted(non_comment_nodes, key=lambda n: str(n.normalize())),
+            nodes=[n for n, _ in sorted(non_comment_nodes, key=lambda n: str(n[1]))],
             parent=self.parent,
         )
 
@@ -263,14 +257,14 @@ class ProtoEnum(ProtoContainerNode):
         proto_source = proto_source[5:]
         match = ProtoIdentifier.match(proto_source=proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid enum name: {proto_source}")
+            raise ProtoParseError("Proto has invalid enum name", proto_source)
 
         enum_name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("{"):
-            raise ValueError(
-                f"Proto has invalid syntax, expecting opening curly brace: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid syntax", proto_source, expected="{"
             )
 
         return ParsedProtoIdentifierNode(enum_name, proto_source[1:].strip())
@@ -288,19 +282,33 @@ class ProtoEnum(ProtoContainerNode):
 
     @property
     def options(self) -> list[ProtoOption]:
-        return [node for node in self.nodes if isinstance(node, ProtoOption)]
+        return list(self.nodes_of_type(ProtoOption))
 
     @property
     def values(self) -> list[ProtoEnumValue]:
-        return [node for node in self.nodes if isinstance(node, ProtoEnumValue)]
-
-    def serialize(self) -> str:
-        serialize_parts = (
-            [f"enum {self.name.serialize()} {{"]
-            + [n.serialize() for n in self.nodes]
-            + ["}"]
-        )
-        return "\n".join(serialize_parts)
+        return list(self.nodes_of_type(ProtoEnumValue))
+
+    def node_name(self, node: ProtoNode) -> Optional[str]:
+        if isinstance(node, ProtoEnumValue):
+            return node.identifier.identifier
+        return super().node_name(node)
+
+    def value_by_number(self, number: int) -> Optional[ProtoEnumValue]:
+        # With allow_alias, the first value declared with a number wins.
+        cache = self._values_by_number
+        if cache is None or cache[0] != self._version:
+            values_by_number: dict[int, ProtoEnumValue] = {}
+            for value in self.values:
+                values_by_number.setdefault(int(value.value), value)
+            cache = (self._version, values_by_number)
+            self._values_by_number = cache
+        return cache[1].get(number)
+
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, *self.nodes]
+
+    def serialize_header(self) -> str:
+        return f"enum {self.name.serialize()} {{"
 
     @staticmethod
     def diff(
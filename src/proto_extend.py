@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Sequence
 
 from src.proto_comment import (
     ProtoComment,
@@ -10,7 +10,13 @@ from src.proto_identifier import (
     ProtoEnumOrMessageIdentifier,
 )
 from src.proto_message_field import ProtoMessageField
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoErrorNode,
+    ProtoNode,
+    ProtoParseError,
+)
 
 
 class ProtoExtend(ProtoContainerNode):
@@ -24,8 +30,8 @@ class ProtoExtend(ProtoContainerNode):
         self.name = name
         self.name.parent = self
 
-    def __eq__(self, other) -> bool:
-        return super().__eq__(other) and self.name == other.name
+    def header_eq(self, other: ProtoContainerNode) -> bool:
+        return self.name == getattr(other, "name", None)
 
     def __str__(self) -> str:
         return f"<ProtoExtend name={self.name}, nodes={self.nodes}>"
@@ -33,9 +39,11 @@ class ProtoExtend(ProtoContainerNode):
     def __repr__(self) -> str:
         return str(self)
 
-    def normalize(self) -> "ProtoExtend":
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> "ProtoExtend":
         non_comment_nodes = filter(
-            lambda n: not isinstance(n, ProtoComment), self.nodes
+            lambda n: not isinstance(n, (ProtoComment, ProtoErrorNode)), self.nodes
         )
         return ProtoExtend(
             name=self.name,
@@ -63,14 +71,14 @@ class ProtoExtend(ProtoContainerNode):
         proto_source = proto_source[7:]
         match = ProtoEnumOrMessageIdentifier.match(proto_source)
         if match is None:
-            raise ValueError(f"Proto extend has invalid message name: {proto_source}")
+            raise ProtoParseError("Proto extend has invalid message name", proto_source)
 
         name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("{"):
-            raise ValueError(
-                f"Proto extend has invalid syntax, expecting opening curly brace: {proto_source}"
+            raise ProtoParseError(
+                "Proto extend has invalid syntax", proto_source, expected="{"
             )
 
         return ParsedProtoEnumOrMessageIdentifierNode(name, proto_source[1:].strip())
@@ -86,10 +94,8 @@ class ProtoExtend(ProtoContainerNode):
         assert isinstance(header_match, ParsedProtoEnumOrMessageIdentifierNode)
         return ProtoExtend(name=header_match.node, nodes=contained_nodes, parent=parent)
 
-    def serialize(self) -> str:
-        serialize_parts = (
-            [f"extend {self.name.serialize()} {{"]
-            + [n.serialize() for n in self.nodes]
-            + ["}"]
-        )
-        return "\n".join(serialize_parts)
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, *self.nodes]
+
+    def serialize_header(self) -> str:
+        return f"extend {self.name.serialize()} {{"
@@ -1,8 +1,8 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Sequence
 
 from src.proto_identifier import ProtoIdentifier
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src.proto_node import ParsedProtoNode, ProtoList, ProtoNode, ProtoParseError
 from src.proto_range import ProtoRange
 
 
@@ -14,7 +14,7 @@ class ProtoExtensions(ProtoNode):
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
-        self.ranges = ranges
+        self.ranges = ProtoList(self, ranges)
         for range in self.ranges:
             range.parent = self
 
@@ -29,8 +29,11 @@ class ProtoExtensions(ProtoNode):
 
     def normalize(self) -> "ProtoExtensions":
         # sort the ranges.
+        ranges = sorted(self.ranges, key=lambda r: int(r.min))
+        if ranges == self.ranges:
+            return self
         return ProtoExtensions(
-            ranges=sorted(self.ranges, key=lambda r: int(r.min)),
+            ranges=ranges,
             parent=self.parent,
         )
 
@@ -49,8 +52,10 @@ class ProtoExtensions(ProtoNode):
                 proto_source = proto_source[1:].strip()
                 break
             if not proto_source:
-                raise ValueError(
-                    "Proto source has invalid extensions syntax, does not contain ;"
+                raise ProtoParseError(
+                    "Proto source has invalid extensions syntax",
+                    proto_source,
+                    expected=";",
                 )
             if proto_source[0] == ",":
                 proto_source = proto_source[1:].strip()
@@ -64,6 +69,9 @@ class ProtoExtensions(ProtoNode):
             ProtoExtensions(ranges=ranges, parent=parent), proto_source.strip()
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return self.ranges
+
     def serialize(self) -> str:
         serialize_parts = ["extensions", ", ".join(r.serialize() for r in self.ranges)]
         return " ".join(serialize_parts) + ";"
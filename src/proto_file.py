@@ -9,7 +9,13 @@ from src.proto_enum import ProtoEnum
 from src.proto_extend import ProtoExtend
 from src.proto_import import ProtoImport
 from src.proto_message import ProtoMessage
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 from src.proto_option import ProtoOption
 from src.proto_package import ProtoPackage
 from src.proto_service import ProtoService
@@ -50,35 +56,37 @@ class ParsedProtoFileHeaderNode(ParsedProtoNode):
 
 
 class ProtoFile(ProtoContainerNode):
+    groups_node_types = True
+
     def __init__(self, syntax: ProtoSyntax, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.syntax = syntax
+        self.validate()
 
-        if len([node for node in self.nodes if isinstance(node, ProtoPackage)]) > 1:
+    def validate(self) -> None:
+        if len(self.nodes_of_type(ProtoPackage)) > 1:
             raise ValueError(f"Proto can't have more than one package statement")
 
     @property
     def imports(self) -> list[ProtoImport]:
-        return [node for node in self.nodes if isinstance(node, ProtoImport)]
+        return list(self.nodes_of_type(ProtoImport))
 
     @property
     def package(self) -> Optional[ProtoPackage]:
-        try:
-            return next(node for node in self.nodes if isinstance(node, ProtoPackage))
-        except StopIteration:
-            return None
+        packages = self.nodes_of_type(ProtoPackage)
+        return packages[0] if packages else None
 
     @property
     def options(self) -> list[ProtoOption]:
-        return [node for node in self.nodes if isinstance(node, ProtoOption)]
+        return list(self.nodes_of_type(ProtoOption))
 
     @property
     def enums(self) -> list[ProtoEnum]:
-        return [node for node in self.nodes if isinstance(node, ProtoEnum)]
+        return list(self.nodes_of_type(ProtoEnum))
 
     @property
     def messages(self) -> list[ProtoMessage]:
-        return [node for node in self.nodes if isinstance(node, ProtoMessage)]
+        return list(self.nodes_of_type(ProtoMessage))
 
     @classmethod
     def match_header(
@@ -143,8 +151,12 @@ class ProtoFile(ProtoContainerNode):
             for node_type in [ProtoSingleLineComment, ProtoMultiLineComment]:
                 try:
                     match_result = node_type.match(proto_content)
-                except (ValueError, IndexError, TypeError):
-                    raise ValueError(f"Could not parse proto content:\n{proto_content}")
+                except ProtoParseError:
+                    raise
+                except (ValueError, IndexError, TypeError) as e:
+                    raise ProtoParseError(
+                        "Could not parse proto content", proto_content
+                    ) from e
                 if match_result is not None:
                     parsed_tree.append(match_result.node)
                     proto_content = match_result.remaining_source.strip()
@@ -155,33 +167,37 @@ class ProtoFile(ProtoContainerNode):
         # Next, parse syntax.
         try:
             syntax_match = ProtoSyntax.match(proto_content.strip())
-        except (ValueError, IndexError, TypeError):
-            raise ValueError(f"Proto doesn't have parseable syntax:\n{proto_content}")
+        except ProtoParseError:
+            raise
+        except (ValueError, IndexError, TypeError) as e:
+            raise ProtoParseError(
+                "Proto doesn't have parseable syntax", proto_content
+            ) from e
         if syntax_match is None:
-            raise ValueError(f"Proto doesn't have parseable syntax:\n{proto_content}")
+            raise ProtoParseError(
+                "Proto doesn't have parseable syntax", proto_content, expected="syntax"
+            )
         syntax = syntax_match.node
         proto_content = syntax_match.remaining_source.strip()
 
         return syntax, parsed_tree, proto_content
 
-    def normalize(self) -> Optional["ProtoNode"]:
-        normalized_nodes = [n.normalize() for n in self.nodes]
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> Optional["ProtoNode"]:
         return ProtoFile(
             syntax=self.syntax.normalize(),
             nodes=[n for n in normalized_nodes if n is not None],
         )
 
-    def serialize(self) -> str:
-        serialized_parts = [self.syntax.serialize()]
-        previous_type: type[ProtoNode] = self.syntax.__class__
-        for node in self.nodes:
-            # Attempt to group up lines of the same type.
-            if node.__class__ != previous_type:
-                previous_type = node.__class__
-                serialized_parts.append("")
-            serialized_parts.append(node.serialize())
-
-        return "\n".join(serialized_parts)
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.syntax, *self.nodes]
+
+    def serialize_header(self) -> Optional[str]:
+        return self.syntax.serialize()
+
+    def serialize_footer(self) -> Optional[str]:
+        return None
 
     def diff(self, other: "ProtoFile") -> Sequence[ProtoNodeDiff]:
         diffs: list[ProtoNodeDiff] = []
@@ -1,9 +1,8 @@
 from enum import Enum
 from typing import Optional
 
-from src.proto_identifier import ProtoIdentifier
-from src.proto_int import ProtoInt
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src import lexer
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoParseError
 
 
 class ProtoFloatSign(Enum):
@@ -17,10 +16,10 @@ class ParsedProtoFloatNode(ParsedProtoNode):
 
 
 class ProtoFloat(ProtoNode):
-    SIGNS = set("+-")
-    DIGITS = ProtoInt.DECIMAL
-    DECIMAL = DIGITS | set(".")
-    EXPONENTIAL = set("eE")
+    SIGNS = lexer.SIGNS
+    DIGITS = lexer.DIGITS
+    DECIMAL = DIGITS | frozenset(".")
+    EXPONENTIAL = frozenset("eE")
 
     def __init__(self, value: float, sign: ProtoFloatSign, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -49,9 +48,9 @@ class ProtoFloat(ProtoNode):
     ) -> Optional["ParsedProtoFloatNode"]:
         if proto_source.startswith("inf"):
             proto_source = proto_source[3:]
-            if proto_source and proto_source[0] in ProtoIdentifier.ALL:
-                raise ValueError(
-                    f"Proto has invalid float, invalid post-inf character: {proto_source}"
+            if proto_source and proto_source[0] in lexer.IDENTIFIER_CHARACTERS:
+                raise ProtoParseError(
+                    "Proto has invalid float, invalid post-inf character", proto_source
                 )
             return ParsedProtoFloatNode(
                 ProtoFloat(
@@ -62,9 +61,9 @@ class ProtoFloat(ProtoNode):
 
         if proto_source.startswith("nan"):
             proto_source = proto_source[3:]
-            if proto_source and proto_source[0] in ProtoIdentifier.ALL:
-                raise ValueError(
-                    f"Proto has invalid float, invalid post-nan character: {proto_source}"
+            if proto_source and proto_source[0] in lexer.IDENTIFIER_CHARACTERS:
+                raise ProtoParseError(
+                    "Proto has invalid float, invalid post-nan character", proto_source
                 )
             return ParsedProtoFloatNode(
                 ProtoFloat(
@@ -73,53 +72,42 @@ class ProtoFloat(ProtoNode):
                 proto_source.strip(),
             )
 
-        if not proto_source[0] in ProtoFloat.DECIMAL:
+        mantissa_match = lexer.FLOAT_MANTISSA.match(proto_source)
+        if mantissa_match is None:
             return None
 
-        decimal_started = False
+        mantissa = mantissa_match.group()
         precision = 0
-        for i, c in enumerate(proto_source):
-            if c not in ProtoFloat.DECIMAL:
-                i -= 1
-                break
-            if c == ".":
-                if decimal_started:
-                    raise ValueError(
-                        f"Proto has invalid float, duplicate decimal: {proto_source}"
-                    )
-                decimal_started = True
-            elif decimal_started:
-                precision += 1
+        if "." in mantissa:
+            if mantissa.count(".") > 1:
+                raise ProtoParseError(
+                    "Proto has invalid float, duplicate decimal", proto_source
+                )
+            precision = len(mantissa) - mantissa.index(".") - 1
 
         try:
-            base = round(float(proto_source[: i + 1]), precision)
+            base = round(float(mantissa), precision)
         except ValueError:
             return None
 
-        proto_source = proto_source[i + 1 :]
+        proto_source = proto_source[mantissa_match.end() :]
 
-        sign = 1
-        if proto_source and proto_source[0] in ProtoFloat.EXPONENTIAL:
-            proto_source = proto_source[1:]
-            if proto_source and proto_source[0] in ProtoFloat.SIGNS:
-                if proto_source[0] == "-":
-                    sign *= -1
-                proto_source = proto_source[1:]
-
-            for i, c in enumerate(proto_source):
-                if c in ProtoFloat.SIGNS:
-                    raise ValueError(
-                        f"Proto has invalid float, unexpected sign: {proto_source}"
+        exponent_match = lexer.FLOAT_EXPONENT.match(proto_source)
+        if exponent_match is not None:
+            sign, digits = exponent_match.groups()
+            proto_source = proto_source[exponent_match.end() :]
+            if proto_source:
+                if proto_source[0] in lexer.SIGNS:
+                    raise ProtoParseError(
+                        "Proto has invalid float, unexpected sign", proto_source
+                    )
+                if proto_source[0] in lexer.IDENTIFIER_CHARACTERS:
+                    raise ProtoParseError(
+                        "Proto has invalid float, non-digit character",
+                        proto_source,
                     )
-                if c not in ProtoFloat.DIGITS:
-                    if c in ProtoIdentifier.ALL:
-                        raise ValueError(
-                            f"Proto has invalid float, non-digit character: {proto_source}"
-                        )
-                    i -= 1
-                    break
-            base *= pow(10, sign * int(proto_source[: i + 1]))
-            proto_source = proto_source[i + 1 :]
+            exponent = int(digits)
+            base *= pow(10, -exponent if sign == "-" else exponent)
 
         return ParsedProtoFloatNode(
             ProtoFloat(value=base, sign=ProtoFloatSign.POSITIVE, parent=parent),
@@ -1,6 +1,7 @@
 from typing import Optional
 
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src import lexer
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoParseError
 
 
 class ParsedProtoIdentifierNode(ParsedProtoNode):
@@ -19,9 +20,9 @@ class ParsedProtoEnumOrMessageIdentifierNode(ParsedProtoIdentifierNode):
 
 
 class ProtoIdentifier(ProtoNode):
-    ALPHABETICAL = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
-    STARTING = ALPHABETICAL | set("_")
-    ALL = STARTING | set("0123456789_")
+    ALPHABETICAL = lexer.ALPHABETICAL
+    STARTING = lexer.IDENTIFIER_START
+    ALL = lexer.IDENTIFIER_CHARACTERS
 
     def __init__(self, identifier: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -46,17 +47,12 @@ class ProtoIdentifier(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoIdentifierNode"]:
-        if proto_source[0] not in ProtoIdentifier.STARTING:
+        match = lexer.IDENTIFIER.match(proto_source)
+        if match is None:
             return None
-
-        for i, c in enumerate(proto_source):
-            if c not in ProtoIdentifier.ALL:
-                return ParsedProtoIdentifierNode(
-                    ProtoIdentifier(identifier=proto_source[:i], parent=parent),
-                    proto_source[i:],
-                )
         return ParsedProtoIdentifierNode(
-            ProtoIdentifier(identifier=proto_source, parent=parent), ""
+            ProtoIdentifier(identifier=match.group(), parent=parent),
+            proto_source[match.end() :],
         )
 
     def serialize(self) -> str:
@@ -64,71 +60,50 @@ class ProtoIdentifier(ProtoNode):
 
 
 class ProtoFullIdentifier(ProtoIdentifier):
-    STARTING = ProtoIdentifier.STARTING
-    ALL = ProtoIdentifier.ALL | set(".")
+    STARTING = lexer.IDENTIFIER_START
+    ALL = lexer.FULL_IDENTIFIER_CHARACTERS
 
     @classmethod
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoFullIdentifierNode"]:
-        if proto_source[0] not in ProtoFullIdentifier.STARTING:
+        match = lexer.FULL_IDENTIFIER.match(proto_source)
+        if match is None:
             return None
-
-        last_part_start = 0
-        identifier_parts = []
-        for i, c in enumerate(proto_source):
-            if c not in ProtoFullIdentifier.ALL:
-                if i == last_part_start:
-                    # We have an invalid character after a period.
-                    raise ValueError(
-                        f"Proto source has invalid identifier, expecting alphanumeric after .: {proto_source}"
-                    )
-                identifier_parts.append(proto_source[last_part_start:i])
-                return ParsedProtoFullIdentifierNode(
-                    ProtoFullIdentifier(
-                        identifier=".".join(identifier_parts), parent=parent
-                    ),
-                    proto_source[i:],
-                )
-            elif c == ".":
-                identifier_parts.append(proto_source[last_part_start:i])
-                last_part_start = i + 1
-
-        # we got to the end while resolving this identifier.
-        if last_part_start >= len(proto_source):
-            raise ValueError(
-                f"Proto source has invalid identifier, expecting alphanumeric after .: {proto_source}"
+        identifier = match.group()
+        if identifier.endswith("."):
+            # We have an invalid character after a period.
+            raise ProtoParseError(
+                "Proto source has invalid identifier",
+                proto_source,
+                expected="alphanumeric after .",
             )
-        identifier_parts.append(proto_source[last_part_start:])
         return ParsedProtoFullIdentifierNode(
-            ProtoFullIdentifier(identifier=".".join(identifier_parts), parent=parent),
-            "",
+            ProtoFullIdentifier(identifier=identifier, parent=parent),
+            proto_source[match.end() :],
         )
 
 
 class ProtoEnumOrMessageIdentifier(ProtoIdentifier):
-    STARTING = ProtoIdentifier.ALPHABETICAL | set(".")
-    ALL = ProtoIdentifier.ALL | set(".")
+    STARTING = lexer.ALPHABETICAL | frozenset(".")
+    ALL = lexer.FULL_IDENTIFIER_CHARACTERS
 
     @classmethod
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoEnumOrMessageIdentifierNode"]:
-        if proto_source[0] == ".":
+        if proto_source[:1] == ".":
             matched_source = proto_source[1:]
         else:
             matched_source = proto_source
 
         identifier_match = ProtoFullIdentifier.match(matched_source, parent=parent)
         if identifier_match is not None:
-            match = ParsedProtoEnumOrMessageIdentifierNode(
-                ProtoEnumOrMessageIdentifier(
-                    identifier=identifier_match.node.identifier, parent=parent
-                ),
+            identifier = identifier_match.node.identifier
+            if proto_source[0] == ".":
+                identifier = "." + identifier
+            return ParsedProtoEnumOrMessageIdentifierNode(
+                ProtoEnumOrMessageIdentifier(identifier=identifier, parent=parent),
                 identifier_match.remaining_source,
             )
-
-            if proto_source[0] == ".":
-                match.node.identifier = "." + match.node.identifier
-            return match
         return identifier_match
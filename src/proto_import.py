@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Optional, Sequence
 
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff, ProtoParseError
 from src.proto_string_literal import ProtoStringLiteral
 
 
@@ -58,17 +58,19 @@ class ProtoImport(ProtoNode):
         public = False
         if proto_source.startswith("public "):
             if weak:
-                raise ValueError(f"Proto has invalid import syntax: {proto_source}")
+                raise ProtoParseError("Proto has invalid import syntax", proto_source)
             public = True
             proto_source = proto_source[7:]
 
         match = ProtoStringLiteral.match(proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid import syntax: {proto_source}")
+            raise ProtoParseError(
+                "Proto has invalid import syntax", proto_source, expected="path"
+            )
 
         if not match.remaining_source.startswith(";"):
-            raise ValueError(
-                f"Proto has invalid import syntax: {match.remaining_source}"
+            raise ProtoParseError(
+                "Proto has invalid import syntax", match.remaining_source, expected=";"
             )
 
         return ParsedProtoNode(
@@ -76,6 +78,9 @@ class ProtoImport(ProtoNode):
             match.remaining_source[1:].strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.path]
+
     def serialize(self) -> str:
         parts = ["import"]
         if self.weak:
@@ -1,8 +1,11 @@
 from enum import Enum
 from typing import Optional
 
-from src.proto_identifier import ProtoFullIdentifier
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src import lexer
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoParseError
+
+# Characters that can follow a leading 0 in a float, but not in an octal int.
+FLOAT_CONTINUATIONS = frozenset(".eE")
 
 
 class ProtoIntSign(Enum):
@@ -16,9 +19,9 @@ class ParsedProtoIntNode(ParsedProtoNode):
 
 
 class ProtoInt(ProtoNode):
-    OCTAL = set("01234567")
-    DECIMAL = OCTAL | set("89")
-    HEX = DECIMAL | set("ABCDEFabcdef")
+    OCTAL = lexer.OCTAL_DIGITS
+    DECIMAL = lexer.DIGITS
+    HEX = lexer.HEX_DIGITS
 
     def __init__(self, value: int, sign: ProtoIntSign, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -47,62 +50,49 @@ class ProtoInt(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoIntNode"]:
-        if proto_source[0] not in ProtoInt.DECIMAL:
+        if not proto_source or proto_source[0] not in lexer.DIGITS:
             return None
 
         if proto_source != "0" and proto_source.startswith("0"):
             # Octal or hex.
-            proto_source = proto_source[1:]
-            if proto_source.startswith("x") or proto_source.startswith("X"):
-                # Hex.
-                proto_source = proto_source[1:]
-                for i, c in enumerate(proto_source):
-                    if c not in ProtoInt.HEX:
-                        if c in ProtoFullIdentifier.ALL:
-                            raise ValueError(f"Proto has invalid hex: {proto_source}")
-                        i -= 1
-                        break
-                try:
-                    value = int(f"0x{proto_source[:i + 1]}", 16)
-                except ValueError:
-                    raise ValueError(f"Proto has invalid hex: {proto_source}")
-                return ParsedProtoIntNode(
-                    ProtoInt(value=value, sign=ProtoIntSign.POSITIVE, parent=parent),
-                    proto_source[i + 1 :].strip(),
-                )
+            hex_match = lexer.HEX_INT.match(proto_source)
+            if hex_match is not None:
+                end = hex_match.end()
+                if not hex_match.group(1) or (
+                    end < len(proto_source)
+                    and proto_source[end] in lexer.FULL_IDENTIFIER_CHARACTERS
+                ):
+                    raise ProtoParseError("Proto has invalid hex", proto_source[2:])
+                value = int(hex_match.group(1), 16)
             else:
-                # Octal.
-                for i, c in enumerate(proto_source):
-                    if c not in ProtoInt.OCTAL:
-                        if c in ProtoFullIdentifier.ALL:
-                            raise ValueError(f"Proto has invalid octal: {proto_source}")
-                        i -= 1
-                        break
-                try:
-                    value = int(f"0{proto_source[:i + 1]}", 8)
-                except ValueError:
-                    raise ValueError(f"Proto has invalid octal: {proto_source}")
-                return ParsedProtoIntNode(
-                    ProtoInt(value=value, sign=ProtoIntSign.POSITIVE, parent=parent),
-                    proto_source[i + 1 :].strip(),
-                )
+                octal_match = lexer.OCTAL_INT.match(proto_source)
+                assert octal_match is not None
+                end = octal_match.end()
+                if end < len(proto_source):
+                    if proto_source[end] in FLOAT_CONTINUATIONS:
+                        # Something like 0.5 or 0e1, which is a float.
+                        return None
+                    if proto_source[end] in lexer.FULL_IDENTIFIER_CHARACTERS:
+                        raise ProtoParseError(
+                            "Proto has invalid octal", proto_source[1:]
+                        )
+                value = int(proto_source[:end], 8)
         else:
             # Decimal.
-            for i, c in enumerate(proto_source):
-                if c not in ProtoInt.DECIMAL | set("."):
-                    if c in ProtoFullIdentifier.ALL:
-                        return None
-                    i -= 1
-                    break
-            try:
-                value = int(proto_source[: i + 1])
-            except ValueError:
+            decimal_match = lexer.DECIMAL_INT.match(proto_source)
+            assert decimal_match is not None
+            end = decimal_match.end()
+            if "." in decimal_match.group() or (
+                end < len(proto_source)
+                and proto_source[end] in lexer.FULL_IDENTIFIER_CHARACTERS
+            ):
                 return None
+            value = int(decimal_match.group())
 
-            return ParsedProtoIntNode(
-                ProtoInt(value=value, sign=ProtoIntSign.POSITIVE, parent=parent),
-                proto_source[i + 1 :].strip(),
-            )
+        return ParsedProtoIntNode(
+            ProtoInt(value=value, sign=ProtoIntSign.POSITIVE, parent=parent),
+            proto_source[end:].strip(),
+        )
 
     def serialize(self) -> str:
         if self.sign == ProtoIntSign.NEGATIVE:
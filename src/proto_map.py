@@ -1,10 +1,21 @@
 from enum import Enum
 from typing import Optional, Sequence
 
+from src import lexer
 from src.proto_identifier import ProtoEnumOrMessageIdentifier, ProtoIdentifier
 from src.proto_int import ProtoInt
-from src.proto_message_field import ProtoMessageFieldOption, ProtoMessageFieldTypesEnum
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_message_field import (
+    FIELD_TYPES,
+    ProtoMessageFieldOption,
+    ProtoMessageFieldTypesEnum,
+)
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoList,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 
 
 class ProtoMapKeyTypesEnum(Enum):
@@ -23,6 +34,7 @@ class ProtoMapKeyTypesEnum(Enum):
 
 
 ProtoMapValueTypesEnum = ProtoMessageFieldTypesEnum
+KEY_TYPES = lexer.KeywordTable({t.value: t for t in ProtoMapKeyTypesEnum})
 
 
 class ProtoMap(ProtoNode):
@@ -50,7 +62,7 @@ class ProtoMap(ProtoNode):
 
         if options is None:
             options = []
-        self.options = options
+        self.options = ProtoList(self, options)
         for option in self.options:
             option.parent = self
 
@@ -71,6 +83,9 @@ class ProtoMap(ProtoNode):
         return str(self)
 
     def normalize(self) -> "ProtoMap":
+        options = sorted(self.options, key=lambda o: str(o))
+        if options == self.options:
+            return self
         return ProtoMap(
             parent=self.parent,
             key_type=self.key_type,
@@ -78,30 +93,27 @@ class ProtoMap(ProtoNode):
             name=self.name,
             number=self.number,
             enum_or_message_type_name=self.enum_or_message_type_name,
-            options=sorted(self.options, key=lambda o: str(o.normalize())),
+            options=options,
         )
 
     @classmethod
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoNode"]:
-        if proto_source.startswith("map "):
-            proto_source = proto_source[4:].strip()
-        elif proto_source.startswith("map<"):
-            proto_source = proto_source[3:].strip()
-        else:
+        end = lexer.keyword_end(proto_source, "map")
+        if end < 0:
+            return None
+        proto_source = proto_source[end:].strip()
+        if not proto_source.startswith("<"):
             return None
 
         # Try to match the map key type.
         proto_source = proto_source[1:].strip()
-        key_type = None
-        for potential_key_type in ProtoMapKeyTypesEnum:
-            if proto_source.startswith(potential_key_type.value):
-                key_type = potential_key_type
-                proto_source = proto_source[len(potential_key_type.value) :].strip()
-                break
-        if key_type is None:
+        key_type_match = KEY_TYPES.match(proto_source)
+        if key_type_match is None:
             return None
+        key_type, end = key_type_match
+        proto_source = proto_source[end:].strip()
 
         if not proto_source.startswith(","):
             return None
@@ -109,13 +121,10 @@ class ProtoMap(ProtoNode):
 
         # Next, try to match the map value type.
         value_type: Optional[ProtoMapValueTypesEnum] = None
-        for potential_value_type in ProtoMapValueTypesEnum:
-            if potential_value_type == ProtoMapValueTypesEnum.ENUM_OR_MESSAGE:
-                # This is special-cased below.
-                break
-            if proto_source.startswith(potential_value_type.value):
-                value_type = potential_value_type
-                proto_source = proto_source[len(potential_value_type.value) :].strip()
+        value_type_match = FIELD_TYPES.match(proto_source)
+        if value_type_match is not None:
+            value_type, end = value_type_match
+            proto_source = proto_source[end:].strip()
 
         # If this is an enum or message type, try to match a name.
         enum_or_message_type_name = None
@@ -151,28 +160,13 @@ class ProtoMap(ProtoNode):
         proto_source = int_match.remaining_source.strip()
 
         # Try to match map field options, if any.
-        options = []
+        options: list[ProtoMessageFieldOption] = []
         if proto_source.startswith("["):
-            proto_source = proto_source[1:].strip()
-            end_bracket = proto_source.find("]")
-            if end_bracket == -1:
-                raise ValueError(
-                    f"Proto has invalid map field option syntax, cannot find ]: {proto_source}"
-                )
-            for option_part in proto_source[:end_bracket].strip().split(","):
-                message_field_option_match = ProtoMessageFieldOption.match(
-                    option_part.strip()
-                )
-                if message_field_option_match is None:
-                    raise ValueError(
-                        f"Proto has invalid map field option syntax: {proto_source}"
-                    )
-                options.append(message_field_option_match.node)
-            proto_source = proto_source[end_bracket + 1 :].strip()
+            options, proto_source = ProtoMessageFieldOption.match_list(proto_source)
 
         if not proto_source.startswith(";"):
-            raise ValueError(
-                f"Proto has invalid map field syntax, missing ending ;:{proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid map field syntax", proto_source, expected=";"
             )
 
         return ParsedProtoNode(
@@ -188,6 +182,12 @@ class ProtoMap(ProtoNode):
             proto_source[1:].strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        children: list[ProtoNode] = []
+        if self.enum_or_message_type_name is not None:
+            children.append(self.enum_or_message_type_name)
+        return children + [self.name, self.number, *self.options]
+
     def serialize(self) -> str:
         serialized_parts = [
             f"map",
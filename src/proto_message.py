@@ -1,17 +1,19 @@
 from typing import Optional, Sequence
 
-from src.proto_comment import (
-    ProtoComment,
-    ProtoMultiLineComment,
-    ProtoSingleLineComment,
-)
+from src.proto_comment import ProtoMultiLineComment, ProtoSingleLineComment
 from src.proto_enum import ProtoEnum
 from src.proto_extend import ProtoExtend
 from src.proto_extensions import ProtoExtensions
 from src.proto_identifier import ParsedProtoIdentifierNode, ProtoIdentifier
 from src.proto_map import ProtoMap
 from src.proto_message_field import ProtoMessageField
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 from src.proto_oneof import ProtoOneOf
 from src.proto_option import ProtoOption
 from src.proto_reserved import ProtoReserved
@@ -28,8 +30,8 @@ class ProtoMessage(ProtoContainerNode):
         self.name = name
         self.name.parent = self
 
-    def __eq__(self, other) -> bool:
-        return super().__eq__(other) and self.name == other.name
+    def header_eq(self, other: ProtoContainerNode) -> bool:
+        return self.name == getattr(other, "name", None)
 
     def __str__(self) -> str:
         return f"<ProtoMessage name={self.name}, nodes={self.nodes}>"
@@ -37,41 +39,42 @@ class ProtoMessage(ProtoContainerNode):
     def __repr__(self) -> str:
         return str(self)
 
-    def normalize(self) -> "ProtoMessage":
-        non_comment_nodes = filter(
-            lambda n: not isinstance(n, ProtoComment), self.nodes
-        )
-
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> "ProtoMessage":
         options = []
         enums = []
         messages = []
         fields = []
         oneofs = []
         reserveds = []
-        for node in non_comment_nodes:
-            if isinstance(node, ProtoOption):
-                options.append(node.normalize())
+        for node in normalized_nodes:
+            # Comments and skipped source normalize to None.
+            if node is None:
+                continue
+            elif isinstance(node, ProtoOption):
+                options.append(node)
             elif isinstance(node, ProtoEnum):
-                enums.append(node.normalize())
+                enums.append(node)
             elif isinstance(node, ProtoMessage):
-                messages.append(node.normalize())
+                messages.append(node)
             elif isinstance(node, ProtoMessageField) or isinstance(node, ProtoMap):
-                fields.append(node.normalize())
+                fields.append(node)
             elif isinstance(node, ProtoOneOf):
-                oneofs.append(node.normalize())
+                oneofs.append(node)
             elif isinstance(node, ProtoReserved):
-                reserveds.append(node.normalize())
+                reserveds.append(node)
             else:
                 raise ValueError(
                     f"Can't sort message {self} node for normalizing: {node}"
                 )
 
         sorted_nodes_for_normalizing = (
-            sorted(options, key=lambda o: str(o.normalize()))
-            + sorted(enums, key=lambda e: str(e))
-            + sorted(messages, key=lambda m: str(m))
+            sorted(options, key=lambda o: str(o))
+            + sorted(enums, key=lambda e: str(e.name))
+            + sorted(messages, key=lambda m: str(m.name))
             + sorted(fields, key=lambda f: int(f.number))
-            + sorted(oneofs, key=lambda o: str(o))
+            + sorted(oneofs, key=lambda o: str(o.name))
             + sorted(reserveds, key=lambda r: int(r.min))
         )
 
@@ -93,14 +96,14 @@ class ProtoMessage(ProtoContainerNode):
         proto_source = proto_source[8:]
         match = ProtoIdentifier.match(proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid message name: {proto_source}")
+            raise ProtoParseError("Proto has invalid message name", proto_source)
 
         enum_name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("{"):
-            raise ValueError(
-                f"Proto message has invalid syntax, expecting opening curly brace: {proto_source}"
+            raise ProtoParseError(
+                "Proto message has invalid syntax", proto_source, expected="{"
             )
 
         return ParsedProtoIdentifierNode(enum_name, proto_source[1:].strip())
@@ -136,27 +139,25 @@ class ProtoMessage(ProtoContainerNode):
 
     @property
     def options(self) -> list[ProtoOption]:
-        return [node for node in self.nodes if isinstance(node, ProtoOption)]
+        return list(self.nodes_of_type(ProtoOption))
 
     @property
     def maps(self) -> list[ProtoMap]:
-        return [node for node in self.nodes if isinstance(node, ProtoMap)]
+        return list(self.nodes_of_type(ProtoMap))
 
     @property
     def message_fields(self) -> list[ProtoMessageField]:
-        return [node for node in self.nodes if isinstance(node, ProtoMessageField)]
+        return list(self.nodes_of_type(ProtoMessageField))
 
     @property
     def oneofs(self) -> list[ProtoOneOf]:
-        return [node for node in self.nodes if isinstance(node, ProtoOneOf)]
+        return list(self.nodes_of_type(ProtoOneOf))
 
-    def serialize(self) -> str:
-        serialize_parts = (
-            [f"message {self.name.serialize()} {{"]
-            + [n.serialize() for n in self.nodes]
-            + ["}"]
-        )
-        return "\n".join(serialize_parts)
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, *self.nodes]
+
+    def serialize_header(self) -> str:
+        return f"message {self.name.serialize()} {{"
 
     @staticmethod
     def diff(
@@ -1,10 +1,17 @@
 from enum import Enum
 from typing import Optional, Sequence
 
+from src import lexer
 from src.proto_enum import ParsedProtoEnumValueOptionNode, ProtoEnumValueOption
 from src.proto_identifier import ProtoEnumOrMessageIdentifier, ProtoIdentifier
 from src.proto_int import ProtoInt
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoList,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 
 
 class ParsedProtoMessageFieldOptionNode(ParsedProtoEnumValueOptionNode):
@@ -46,6 +53,16 @@ class ProtoMessageFieldTypesEnum(Enum):
     ENUM_OR_MESSAGE = "enum_or_message"
 
 
+# Enums and messages are special-cased, since they're named by the user.
+FIELD_TYPES = lexer.KeywordTable(
+    {
+        t.value: t
+        for t in ProtoMessageFieldTypesEnum
+        if t != ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE
+    }
+)
+
+
 class ParsedProtoMessageFieldNode(ParsedProtoNode):
     node: "ProtoMessageField"
     remaining_source: str
@@ -85,7 +102,7 @@ class ProtoMessageField(ProtoNode):
 
         if options is None:
             options = []
-        self.options = options
+        self.options = ProtoList(self, options)
         for option in self.options:
             option.parent = self
 
@@ -107,6 +124,9 @@ class ProtoMessageField(ProtoNode):
         return str(self)
 
     def normalize(self) -> "ProtoMessageField":
+        options = sorted(self.options, key=lambda o: str(o.name))
+        if options == self.options:
+            return self
         return ProtoMessageField(
             type=self.type,
             name=self.name,
@@ -114,7 +134,7 @@ class ProtoMessageField(ProtoNode):
             repeated=self.repeated,
             optional=self.optional,
             enum_or_message_type_name=self.enum_or_message_type_name,
-            options=sorted(self.options, key=lambda o: str(o.name)),
+            options=options,
             parent=self.parent,
         )
 
@@ -124,28 +144,28 @@ class ProtoMessageField(ProtoNode):
     ) -> Optional["ParsedProtoMessageFieldNode"]:
         # First, try to match the optional repeated.
         repeated = False
-        if proto_source.startswith("repeated "):
+        end = lexer.keyword_end(proto_source, "repeated")
+        if end >= 0:
             repeated = True
-            proto_source = proto_source[9:].strip()
+            proto_source = proto_source[end:].strip()
 
         optional = False
-        if proto_source.startswith("optional "):
+        end = lexer.keyword_end(proto_source, "optional")
+        if end >= 0:
             optional = True
-            proto_source = proto_source[9:].strip()
+            proto_source = proto_source[end:].strip()
             if repeated:
-                raise ValueError(
-                    "Proto message field has invalid syntax, cannot have both repeated and optional"
+                raise ProtoParseError(
+                    "Proto message field has invalid syntax, cannot have both repeated and optional",
+                    proto_source,
                 )
 
         # Next, try to match the field type.
         matched_type: Optional[ProtoMessageFieldTypesEnum] = None
-        for field_type in ProtoMessageFieldTypesEnum:
-            if field_type == ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
-                # This is special-cased below.
-                continue
-            if proto_source.startswith(f"{field_type.value} "):
-                matched_type = field_type
-                proto_source = proto_source[len(field_type.value) + 1 :]
+        type_match = FIELD_TYPES.match(proto_source)
+        if type_match is not None:
+            matched_type, end = type_match
+            proto_source = proto_source[end:].strip()
 
         # If this is an enum or message type, try to match a name.
         enum_or_message_type_name = None
@@ -176,28 +196,13 @@ class ProtoMessageField(ProtoNode):
         number = int_match.node
         proto_source = int_match.remaining_source.strip()
 
-        options = []
+        options: list[ProtoMessageFieldOption] = []
         if proto_source.startswith("["):
-            proto_source = proto_source[1:].strip()
-            end_bracket = proto_source.find("]")
-            if end_bracket == -1:
-                raise ValueError(
-                    f"Proto has invalid message field option syntax, cannot find ]: {proto_source}"
-                )
-            for option_part in proto_source[:end_bracket].strip().split(","):
-                message_field_option_match = ProtoMessageFieldOption.match(
-                    option_part.strip()
-                )
-                if message_field_option_match is None:
-                    raise ValueError(
-                        f"Proto has invalid message field option syntax: {proto_source}"
-                    )
-                options.append(message_field_option_match.node)
-            proto_source = proto_source[end_bracket + 1 :].strip()
+            options, proto_source = ProtoMessageFieldOption.match_list(proto_source)
 
         if not proto_source.startswith(";"):
-            raise ValueError(
-                f"Proto has invalid message field syntax, missing ending ;:{proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid message field syntax", proto_source, expected=";"
             )
 
         return ParsedProtoMessageFieldNode(
@@ -214,10 +219,18 @@ class ProtoMessageField(ProtoNode):
             proto_source[1:].strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        children: list[ProtoNode] = []
+        if self.enum_or_message_type_name is not None:
+            children.append(self.enum_or_message_type_name)
+        return children + [self.name, self.number, *self.options]
+
     def serialize(self) -> str:
         serialized_parts = []
         if self.repeated:
             serialized_parts.append("repeated")
+        elif self.optional:
+            serialized_parts.append("optional")
 
         if self.type == ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
             if self.enum_or_message_type_name is None:
@@ -1,8 +1,77 @@
 import abc
-from typing import NamedTuple, Optional, Sequence
+import re
+import weakref
+from typing import (
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    SupportsIndex,
+    TextIO,
+    TypeVar,
+    cast,
+)
+
+
+class ProtoParseError(ValueError):
+    """A failure to parse proto source at a known position.
+
+    Parsing raises these speculatively, so only a bounded snippet of the
+    remaining source is kept and the message isn't rendered until it's displayed.
+    """
+
+    SNIPPET_LENGTH = 40
+
+    def __init__(
+        self,
+        message: str,
+        proto_source: str,
+        expected: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.message = message
+        self.expected = expected
+        self.snippet = proto_source[: self.SNIPPET_LENGTH]
+        self.remaining_length = len(proto_source)
+
+    def offset(self, full_source: str) -> int:
+        # Remaining source is always a suffix of the stripped full source.
+        offset = len(full_source.rstrip()) - self.remaining_length
+        return min(max(offset, 0), len(full_source))
+
+    def line_and_column(self, full_source: str) -> tuple[int, int]:
+        offset = self.offset(full_source)
+        line_start = full_source.rfind("\n", 0, offset) + 1
+        return full_source.count("\n", 0, offset) + 1, offset - line_start + 1
+
+    def __str__(self) -> str:
+        parts = [self.message]
+        if self.expected is not None:
+            parts.append(f", expecting {self.expected}")
+        parts.append(f": {self.snippet}")
+        if self.remaining_length > len(self.snippet):
+            parts.append("...")
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"<ProtoParseError message={self.message} expected={self.expected} snippet={self.snippet!r}>"
 
 
 class ProtoNode(abc.ABC):
+    # Bumped whenever this node or anything beneath it changes. What's cached
+    # about a node, like its normalized form, is only reused while this hasn't.
+    _version = 0
+    # Whether nodes link to their parents through weak references. Strong links
+    # make every tree one big reference cycle, which only the cyclic garbage
+    # collector can free. Weak links let trees be freed by reference counting as
+    # soon as their root is, but a subtree kept without its root loses its parent.
+    weak_parents = False
+    # Whether this is a ProtoContainerNode, which is quicker to check than
+    # isinstance in loops over every node of a tree.
+    is_container = False
+    _parent: "Optional[ProtoNode | weakref.ref[ProtoNode]]"
+
     @classmethod
     @abc.abstractmethod
     def match(
@@ -15,16 +84,184 @@ class ProtoNode(abc.ABC):
     def __init__(self, parent: Optional["ProtoNode"] = None):
         self.parent = parent
 
+    @property
+    def parent(self) -> Optional["ProtoNode"]:
+        parent = self._parent
+        if isinstance(parent, weakref.ref):
+            return parent()
+        return parent
+
+    @parent.setter
+    def parent(self, parent: Optional["ProtoNode"]) -> None:
+        self._parent = parent_link(parent)
+
+    def mark_changed(self) -> None:
+        """Invalidates what's cached about this node and the nodes above it.
+
+        Changing a node's lists in place, or a container's nodes, does this
+        already. Call it after reassigning a node's attributes or changing it in
+        any other way.
+        """
+        node: Optional[ProtoNode] = self
+        while node is not None:
+            node._version += 1
+            node = node.parent
+
     @abc.abstractmethod
     def serialize(self) -> str:
         raise NotImplementedError
 
+    def serialize_to(self, writer: TextIO) -> None:
+        writer.write(self.serialize())
+
+    def children(self) -> Sequence["ProtoNode"]:
+        """Returns the nodes directly beneath this one, in source order."""
+        return ()
+
     @abc.abstractmethod
     def normalize(self) -> Optional["ProtoNode"]:
         raise NotImplementedError
 
 
+def parent_link(
+    parent: Optional[ProtoNode],
+) -> "Optional[ProtoNode | weakref.ref[ProtoNode]]":
+    """Returns what a node stores to link to parent, given ProtoNode.weak_parents."""
+    if parent is not None and ProtoNode.weak_parents:
+        return weakref.ref(parent)
+    return parent
+
+
+class ProtoErrorNode(ProtoNode):
+    """Source that was skipped while recovering from a parse error."""
+
+    def __init__(self, source: str, error: ProtoParseError, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source = source
+        self.error = error
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ProtoErrorNode) and self.source == other.source
+
+    def __str__(self) -> str:
+        return f"<ProtoErrorNode error={self.error!r}>"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    @classmethod
+    def match(
+        cls,
+        proto_source: str,
+        parent: Optional["ProtoNode"] = None,
+    ) -> Optional["ParsedProtoNode"]:
+        return None
+
+    def normalize(self) -> Optional["ProtoNode"]:
+        return None
+
+    def serialize(self) -> str:
+        return self.source
+
+
+ProtoNodeType = TypeVar("ProtoNodeType", bound=ProtoNode)
+
+
+class ProtoList(list[ProtoNodeType]):
+    """A list of nodes held by a node, like a field's options, which tells the node
+    whenever it changes."""
+
+    def __init__(self, owner: ProtoNode, nodes: Iterable[ProtoNodeType]):
+        super().__init__(nodes)
+        self.owner = weakref.ref(owner)
+
+    def changed(self, added: Optional[Sequence[ProtoNodeType]] = None) -> None:
+        owner = self.owner() if hasattr(self, "owner") else None
+        if owner is not None:
+            for node in self:
+                node.parent = owner
+            owner.mark_changed()
+
+    def append(self, node: ProtoNodeType) -> None:
+        super().append(node)
+        self.changed([node])
+
+    def extend(self, nodes: Iterable[ProtoNodeType]) -> None:
+        nodes = list(nodes)
+        super().extend(nodes)
+        self.changed(nodes)
+
+    def __iadd__(self, nodes: Iterable[ProtoNodeType]) -> "ProtoList[ProtoNodeType]":  # type: ignore[override, misc]
+        self.extend(nodes)
+        return self
+
+    def insert(self, index: SupportsIndex, node: ProtoNodeType) -> None:
+        super().insert(index, node)
+        self.changed()
+
+    def remove(self, node: ProtoNodeType) -> None:
+        super().remove(node)
+        self.changed()
+
+    def pop(self, index: SupportsIndex = -1) -> ProtoNodeType:
+        node = super().pop(index)
+        self.changed()
+        return node
+
+    def clear(self) -> None:
+        super().clear()
+        self.changed()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self.changed()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self.changed()
+
+    def __setitem__(self, index, value) -> None:  # type: ignore[override]
+        super().__setitem__(index, value)
+        self.changed()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self.changed()
+
+    def __imul__(self, count: SupportsIndex) -> "ProtoList[ProtoNodeType]":
+        super().__imul__(count)
+        self.changed()
+        return self
+
+
+class ProtoNodeList(ProtoList[ProtoNode]):
+    """The nodes of a container, which tells the container whenever they change."""
+
+    def changed(self, added: Optional[Sequence[ProtoNode]] = None) -> None:
+        owner = self.owner() if hasattr(self, "owner") else None
+        if owner is not None:
+            cast(ProtoContainerNode, owner).nodes_changed(added)
+
+
 class ProtoContainerNode(ProtoNode):
+    RESYNCHRONIZATION_TOKENS = re.compile(r"[;{}]")
+    # How many serialized lines are collected before they're joined and written.
+    SERIALIZE_CHUNK_LINES = 4096
+    # Whether a blank line is serialized after the header and wherever the type of
+    # this container's nodes changes, to group up lines of the same type.
+    groups_node_types = False
+    is_container = True
+
+    # The classes each node type is indexed under.
+    INDEX_TYPES: dict[type, tuple[type, ...]] = {}
+
+    # The version this container was normalized at, along with its normalized
+    # form.
+    _normalized: Optional[tuple[int, Optional[ProtoNode]]] = None
+    _nodes_by_name: Optional[tuple[int, dict[str, ProtoNode]]] = None
+    # What nodes_of_type has returned since the nodes last changed.
+    _nodes_of_type: Optional[dict[type, tuple[ProtoNode, ...]]] = None
+
     def __init__(
         self,
         nodes: Sequence[ProtoNode],
@@ -32,12 +269,124 @@ class ProtoContainerNode(ProtoNode):
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
-        self.nodes = nodes
-        for node in self.nodes:
+        self.set_nodes(nodes)
+
+    @property
+    def nodes(self) -> list[ProtoNode]:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: Sequence[ProtoNode]) -> None:
+        self.set_nodes(nodes)
+
+    def set_nodes(self, nodes: Sequence[ProtoNode]) -> None:
+        self._nodes = ProtoNodeList(self, nodes)
+        self._nodes_by_type: dict[type, list[ProtoNode]] = {}
+        self._nodes_of_type = None
+        self.index_nodes(self._nodes)
+        self.mark_changed()
+
+    def index_nodes(self, nodes: Sequence[ProtoNode]) -> None:
+        nodes_by_type = self._nodes_by_type
+        for node in nodes:
             node.parent = self
+            node_type = node.__class__
+            index_types = ProtoContainerNode.INDEX_TYPES.get(node_type)
+            if index_types is None:
+                index_types = tuple(
+                    t
+                    for t in node_type.__mro__
+                    if issubclass(t, ProtoNode) and t is not ProtoNode
+                )
+                ProtoContainerNode.INDEX_TYPES[node_type] = index_types
+            for index_type in index_types:
+                nodes_by_type.setdefault(index_type, []).append(node)
+
+    def nodes_changed(self, added: Optional[Sequence[ProtoNode]] = None) -> None:
+        self.mark_changed()
+        self._nodes_of_type = None
+        if added is not None:
+            self.index_nodes(added)
+        else:
+            self._nodes_by_type = {}
+            self.index_nodes(self._nodes)
+
+    def nodes_of_type(
+        self, node_type: type[ProtoNodeType]
+    ) -> tuple[ProtoNodeType, ...]:
+        """Returns this container's nodes of the given type (or a subclass), in order.
+
+        The tuple is shared between calls until the container's nodes change.
+        """
+        cache = self._nodes_of_type
+        if cache is None:
+            cache = self._nodes_of_type = {}
+        nodes = cache.get(node_type)
+        if nodes is None:
+            if node_type is ProtoNode:
+                # Every node is a ProtoNode, so that isn't indexed.
+                nodes = tuple(self._nodes)
+            else:
+                nodes = tuple(self._nodes_by_type.get(node_type, ()))
+            cache[node_type] = nodes
+        return cast(tuple[ProtoNodeType, ...], nodes)
+
+    def node_name(self, node: ProtoNode) -> Optional[str]:
+        return getattr(getattr(node, "name", None), "identifier", None)
+
+    def nodes_by_name(self) -> dict[str, ProtoNode]:
+        cache = self._nodes_by_name
+        if cache is not None and cache[0] == self._version:
+            return cache[1]
+
+        nodes_by_name: dict[str, ProtoNode] = {}
+        for node in self._nodes:
+            name = self.node_name(node)
+            if name is not None:
+                nodes_by_name.setdefault(name, node)
+        self._nodes_by_name = (self._version, nodes_by_name)
+        return nodes_by_name
+
+    def __iter__(self) -> Iterator[ProtoNode]:
+        return iter(self._nodes)
+
+    def __getitem__(self, name: str) -> ProtoNode:
+        if not isinstance(name, str):
+            raise TypeError(
+                f"{type(self).__name__} nodes are looked up by name, not by "
+                f"{type(name).__name__}"
+            )
+        return self.nodes_by_name()[name]
+
+    def __contains__(self, item: object) -> bool:
+        # A name is looked up like __getitem__ does; anything else is looked
+        # for among the nodes, like __iter__ iterates over.
+        if isinstance(item, str):
+            return item in self.nodes_by_name()
+        return item in self._nodes
 
     def __eq__(self, other) -> bool:
-        return self.nodes == other.nodes
+        # Nested containers are compared with an explicit stack rather than by
+        # recursing, so deeply-nested trees don't hit the recursion limit.
+        stack: list[tuple[ProtoNode, object]] = [(self, other)]
+        while stack:
+            left, right = stack.pop()
+            if left is right:
+                continue
+            if isinstance(left, ProtoContainerNode):
+                if (
+                    not isinstance(right, ProtoContainerNode)
+                    or len(left.nodes) != len(right.nodes)
+                    or not left.header_eq(right)
+                ):
+                    return False
+                stack.extend(zip(reversed(left.nodes), reversed(right.nodes)))
+            elif left != right:
+                return False
+        return True
+
+    def header_eq(self, other: "ProtoContainerNode") -> bool:
+        return True
 
     @classmethod
     @abc.abstractmethod
@@ -76,55 +425,283 @@ class ProtoContainerNode(ProtoNode):
         raise NotImplementedError
 
     @classmethod
-    def parse_partial_content(cls, partial_content: str) -> "ParsedProtoNode":
+    def parse_partial_content(
+        cls, partial_content: str
+    ) -> tuple[Optional[type["ProtoContainerNode"]], "ParsedProtoNode"]:
+        """Matches the next statement in this container's body.
+
+        Only the header of a nested container is matched here. Its type is returned
+        alongside the header match, so the caller can go on to match its body.
+        """
         for node_type in cls.container_types():
             try:
+                if issubclass(node_type, ProtoContainerNode):
+                    header_match = node_type.match_header(partial_content)
+                    if header_match is not None:
+                        return node_type, header_match
+                    continue
                 match_result = node_type.match(partial_content)
-            except (ValueError, IndexError, TypeError):
-                raise ValueError(f"Could not parse partial content:\n{partial_content}")
+            except ProtoParseError:
+                raise
+            except (ValueError, IndexError, TypeError) as e:
+                raise ProtoParseError(
+                    "Could not parse partial content", partial_content
+                ) from e
             if match_result is not None:
-                return match_result
-        raise ValueError(f"Could not parse partial content:\n{partial_content}")
+                return None, match_result
+        raise ProtoParseError("Could not parse partial content", partial_content)
+
+    @staticmethod
+    def resynchronize(proto_source: str) -> int:
+        # Skip to the end of the current statement or block, but leave a closing
+        # brace that belongs to the enclosing container in place.
+        depth = 0
+        for token in ProtoContainerNode.RESYNCHRONIZATION_TOKENS.finditer(proto_source):
+            if token.group() == "{":
+                depth += 1
+            elif token.group() == ";":
+                if depth == 0:
+                    return token.end()
+            elif depth == 0:
+                return max(token.start(), 1)
+            else:
+                depth -= 1
+                if depth == 0:
+                    return token.end()
+        return len(proto_source)
 
     @classmethod
     def match(
         cls,
         proto_source: str,
         parent: Optional["ProtoNode"] = None,
+        diagnostics: Optional[list[ProtoParseError]] = None,
     ) -> Optional["ParsedProtoNode"]:
+        """Matches this container and everything inside it.
+
+        If a diagnostics list is passed, statements that fail to parse are recorded
+        there and replaced by a ProtoErrorNode instead of aborting the match.
+        """
         header_match = cls.match_header(proto_source, parent=parent)
         if header_match is None:
             return None
 
+        # Nested containers get pushed onto an explicit stack rather than matched
+        # recursively, so nesting depth isn't bounded by the recursion limit.
+        stack = [ContainerMatchFrame(cls, header_match, [], parent)]
         proto_source = header_match.remaining_source.strip()
-        nodes = []
-        footer_match: Optional[str] = None
-        while proto_source:
+        while True:
+            frame = stack[-1]
             # Remove empty statements.
             if proto_source.startswith(";"):
                 proto_source = proto_source[1:].strip()
                 continue
 
-            footer_match = cls.match_footer(proto_source, parent)
+            footer_match = frame.container_type.match_footer(proto_source, frame.parent)
+            if footer_match is None and not proto_source:
+                error = ProtoParseError(
+                    f"Footer was not found when matching container node {frame.container_type.__name__}",
+                    proto_source,
+                    expected="}",
+                )
+                if diagnostics is None:
+                    raise error
+                diagnostics.append(error)
+                footer_match = ""
+
             if footer_match is not None:
                 proto_source = footer_match.strip()
-                break
+                node = frame.container_type.construct(
+                    frame.header_match, frame.nodes, footer_match, parent=frame.parent
+                )
+                stack.pop()
+                if not stack:
+                    return ParsedProtoNode(node, proto_source)
+                stack[-1].nodes.append(node)
+                continue
 
-            match_result = cls.parse_partial_content(proto_source)
-            nodes.append(match_result.node)
-            proto_source = match_result.remaining_source.strip()
+            try:
+                container_type, match_result = (
+                    frame.container_type.parse_partial_content(proto_source)
+                )
+            except ProtoParseError as e:
+                if diagnostics is None:
+                    raise
+                diagnostics.append(e)
+                skipped_length = cls.resynchronize(proto_source)
+                frame.nodes.append(ProtoErrorNode(proto_source[:skipped_length], e))
+                proto_source = proto_source[skipped_length:].strip()
+                continue
 
-        if footer_match is None:
-            footer_match = cls.match_footer(proto_source, parent)
-            if footer_match is None:
-                raise ValueError(
-                    f"Footer was not found when matching container node {cls} for remaining proto source {proto_source}"
+            proto_source = match_result.remaining_source.strip()
+            if container_type is None:
+                frame.nodes.append(match_result.node)
+            else:
+                stack.append(
+                    ContainerMatchFrame(container_type, match_result, [], None)
                 )
 
-        return ParsedProtoNode(
-            cls.construct(header_match, nodes, footer_match, parent=parent),
-            proto_source.strip(),
-        )
+    @abc.abstractmethod
+    def serialize_header(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def serialize_footer(self) -> Optional[str]:
+        return "}"
+
+    def serialized_chunks(self) -> Iterator[str]:
+        """Yields this container's serialized form in chunks of whole lines.
+
+        Joining the chunks with newlines gives the serialized form. Lines are
+        collected in a list and joined once at least SERIALIZE_CHUNK_LINES of them
+        are pending, rather than once per nested container, so each character is
+        only copied once however deeply it's nested.
+        """
+        lines: list[str] = []
+        header = self.serialize_header()
+        if header is not None:
+            lines.append(header)
+
+        # Each entry is a container, an iterator over the nodes it has left to
+        # serialize, and the type of the last node it serialized.
+        append = lines.append
+        stack: list[tuple[ProtoContainerNode, Iterator[ProtoNode], Optional[type]]]
+        stack = [(self, iter(self._nodes), None)]
+        while stack:
+            container, nodes, previous_type = stack.pop()
+            groups_node_types = container.groups_node_types
+            for node in nodes:
+                if groups_node_types and node.__class__ is not previous_type:
+                    previous_type = node.__class__
+                    append("")
+                if not node.is_container:
+                    append(node.serialize())
+                    continue
+                child = cast(ProtoContainerNode, node)
+                header = child.serialize_header()
+                if header is not None:
+                    append(header)
+                if (
+                    child.groups_node_types
+                    or ProtoContainerNode in child._nodes_by_type
+                ):
+                    stack.append((container, nodes, previous_type))
+                    stack.append((child, iter(child._nodes), None))
+                    break
+                # Most containers, like messages of fields, hold nothing but leaves,
+                # so they're serialized in one go.
+                lines += [leaf.serialize() for leaf in child._nodes]
+                footer = child.serialize_footer()
+                if footer is not None:
+                    append(footer)
+            else:
+                footer = container.serialize_footer()
+                if footer is not None:
+                    append(footer)
+                if len(lines) >= self.SERIALIZE_CHUNK_LINES:
+                    yield "\n".join(lines)
+                    lines.clear()
+        if lines:
+            yield "\n".join(lines)
+
+    def serialize_to(self, writer: TextIO) -> None:
+        separator = ""
+        for chunk in self.serialized_chunks():
+            writer.write(separator)
+            writer.write(chunk)
+            separator = "\n"
+
+    def serialize(self) -> str:
+        return "\n".join(self.serialized_chunks())
+
+    @abc.abstractmethod
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> Optional[ProtoNode]:
+        """Builds the normalized form of this container.
+
+        normalized_nodes holds the normalized form of each of this container's nodes,
+        in the same order.
+        """
+        raise NotImplementedError
+
+    def cached_normalized(self) -> tuple[bool, Optional[ProtoNode]]:
+        cache = self._normalized
+        if cache is None or cache[0] != self._version:
+            return False, None
+        # A container that's already normalized is cached as None, rather than
+        # as a reference to itself.
+        if cache[1] is None:
+            return True, self
+        return True, cache[1]
+
+    def cache_normalized(self, normalized: Optional[ProtoNode]) -> None:
+        # A normalized copy isn't cached as already normalized, since the children
+        # it shares with this container don't tell it when they change.
+        self._normalized = (self._version, None if normalized is self else normalized)
+
+    def clear_caches(self) -> None:
+        """Invalidates what's cached about every container in this tree.
+
+        Only needed to redo work from scratch (e.g. to time it), since caches are
+        invalidated whenever a tree changes.
+        """
+        self.mark_changed()
+        stack: list[ProtoContainerNode] = [self]
+        while stack:
+            container = stack.pop()
+            container._version += 1
+            stack.extend(
+                node for node in container.nodes if isinstance(node, ProtoContainerNode)
+            )
+
+    def normalize(self) -> Optional[ProtoNode]:
+        # Normalize nested containers post-order with an explicit stack, reusing
+        # the cached normalized form of any container that hasn't changed.
+        is_cached, normalized = self.cached_normalized()
+        if is_cached:
+            return normalized
+
+        stack: list[tuple[ProtoContainerNode, list[Optional[ProtoNode]]]]
+        stack = [(self, [])]
+        while True:
+            container, normalized_nodes = stack[-1]
+            if len(normalized_nodes) < len(container.nodes):
+                node = container.nodes[len(normalized_nodes)]
+                if isinstance(node, ProtoContainerNode):
+                    is_cached, normalized = node.cached_normalized()
+                    if is_cached:
+                        normalized_nodes.append(normalized)
+                    else:
+                        stack.append((node, []))
+                else:
+                    normalized_nodes.append(node.normalize())
+                continue
+
+            stack.pop()
+            parents = [node._parent for node in container.nodes]
+            normalized = container.build_normalized(normalized_nodes)
+            # Children shared with the normalized copy stay linked where they were.
+            for node, parent in zip(container.nodes, parents):
+                node._parent = parent
+            if (
+                isinstance(normalized, ProtoContainerNode)
+                and type(normalized) is type(container)
+                and len(normalized.nodes) == len(container.nodes)
+                and all(a is b for a, b in zip(normalized.nodes, container.nodes))
+            ):
+                # Nothing changed, so share this container too.
+                normalized = container
+            container.cache_normalized(normalized)
+            if not stack:
+                return normalized
+            stack[-1][1].append(normalized)
+
+
+class ContainerMatchFrame(NamedTuple):
+    container_type: type[ProtoContainerNode]
+    header_match: "ParsedProtoNode"
+    nodes: list[ProtoNode]
+    parent: Optional[ProtoNode]
 
 
 class ParsedProtoNode(NamedTuple):
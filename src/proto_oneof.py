@@ -3,14 +3,19 @@ from typing import Optional, Sequence
 from src.proto_comment import (
     ParsedProtoMultiLineCommentNode,
     ParsedProtoSingleLineCommentNode,
-    ProtoComment,
     ProtoMultiLineComment,
     ProtoSingleLineComment,
 )
 from src.proto_identifier import ParsedProtoIdentifierNode, ProtoIdentifier
 from src.proto_map import ProtoMap
 from src.proto_message_field import ParsedProtoMessageFieldNode, ProtoMessageField
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoNode,
+    ProtoNodeDiff,
+    ProtoParseError,
+)
 from src.proto_option import ParsedProtoOptionNode, ProtoOption
 
 ProtoOneOfNodeTypes = (
@@ -40,8 +45,8 @@ class ProtoOneOf(ProtoContainerNode):
         self.name = name
         self.name.parent = self
 
-    def __eq__(self, other) -> bool:
-        return super().__eq__(other) and self.name == other.name
+    def header_eq(self, other: ProtoContainerNode) -> bool:
+        return self.name == getattr(other, "name", None)
 
     def __str__(self) -> str:
         return f"<{self.__class__.__name__} name={self.name}, nodes={self.nodes}>"
@@ -49,26 +54,28 @@ class ProtoOneOf(ProtoContainerNode):
     def __repr__(self) -> str:
         return str(self)
 
-    def normalize(self) -> "ProtoOneOf":
-        non_comment_nodes = filter(
-            lambda n: not isinstance(n, ProtoComment), self.nodes
-        )
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> "ProtoOneOf":
         options = []
-        fields: list[ProtoMessageField | ProtoMap] = []
-        oneofs: list[ProtoOneOf] = []
-        for node in non_comment_nodes:
-            if isinstance(node, ProtoOption):
-                options.append(node.normalize())
+        fields = []
+        oneofs = []
+        for node in normalized_nodes:
+            # Comments and skipped source normalize to None.
+            if node is None:
+                continue
+            elif isinstance(node, ProtoOption):
+                options.append(node)
             elif isinstance(node, ProtoMessageField) or isinstance(node, ProtoMap):
-                fields.append(node.normalize())
+                fields.append(node)
             elif isinstance(node, ProtoOneOf):
-                oneofs.append(node.normalize())
+                oneofs.append(node)
             else:
                 raise ValueError(
                     f"Can't sort message {self} node for normalizing: {node}"
                 )
 
-        sorted_options = sorted(options, key=lambda o: str(o.normalize()))
+        sorted_options = sorted(options, key=lambda o: str(o))
         sorted_fields = sorted(fields, key=lambda f: int(f.number))
         sorted_oneofs = sorted(
             oneofs,
@@ -94,16 +101,18 @@ class ProtoOneOf(ProtoContainerNode):
 
         match = ProtoIdentifier.match(proto_source)
         if match is None:
-            raise ValueError(
-                f"Proto has invalid syntax, expecting identifier for oneof: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid syntax",
+                proto_source,
+                expected="identifier for oneof",
             )
 
         oneof_name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("{"):
-            raise ValueError(
-                f"Proto has invalid syntax, expecting opening curly brace: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid syntax", proto_source, expected="{"
             )
 
         return ParsedProtoIdentifierNode(oneof_name, proto_source[1:].strip())
@@ -130,19 +139,17 @@ class ProtoOneOf(ProtoContainerNode):
 
     @property
     def options(self) -> list[ProtoOption]:
-        return [node for node in self.nodes if isinstance(node, ProtoOption)]
+        return list(self.nodes_of_type(ProtoOption))
 
     @property
     def message_fields(self) -> list[ProtoMessageField]:
-        return [node for node in self.nodes if isinstance(node, ProtoMessageField)]
+        return list(self.nodes_of_type(ProtoMessageField))
 
-    def serialize(self) -> str:
-        serialize_parts = (
-            [f"oneof {self.name.serialize()} {{"]
-            + [n.serialize() for n in self.nodes]
-            + ["}"]
-        )
-        return "\n".join(serialize_parts)
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, *self.nodes]
+
+    def serialize_header(self) -> str:
+        return f"oneof {self.name.serialize()} {{"
 
     @staticmethod
     def diff(
@@ -1,12 +1,11 @@
-from typing import Optional, Sequence
+from typing import Optional, Sequence, TypeVar, cast
 
+from src import lexer
 from src.proto_constant import ProtoConstant
-from src.proto_identifier import (
-    ProtoEnumOrMessageIdentifier,
-    ProtoFullIdentifier,
-    ProtoIdentifier,
-)
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_identifier import ProtoFullIdentifier, ProtoIdentifier
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff, ProtoParseError
+
+OptionType = TypeVar("OptionType", bound="ProtoOption")
 
 
 class ParsedProtoOptionNode(ParsedProtoNode):
@@ -43,70 +42,58 @@ class ProtoOption(ProtoNode):
     ) -> Optional["ParsedProtoOptionNode"]:
         if not proto_source.startswith("option "):
             return None
-        proto_source = proto_source[7:]
-
-        name_parts = []
-        if proto_source.startswith("("):
-            proto_source = proto_source[1:]
-            match = ProtoFullIdentifier.match(proto_source)
-            if match is None or not match.remaining_source.startswith(")"):
-                # This might be a regular identifier.
-                identifier_match = ProtoIdentifier.match(proto_source)
-                if (
-                    not identifier_match
-                    or not identifier_match.remaining_source.startswith(")")
-                ):
-                    raise ValueError(
-                        f"Proto has invalid option when expecting ): {proto_source}"
-                    )
-                name_parts.append(
-                    ProtoIdentifier(identifier=f"({identifier_match.node.identifier})")
-                )
-                proto_source = identifier_match.remaining_source[1:]
-            else:
-                name_parts.append(
-                    ProtoFullIdentifier(identifier=f"({match.node.identifier})")
-                )
-                proto_source = match.remaining_source[1:]
 
-        while True:
-            identifier_match = ProtoEnumOrMessageIdentifier.match(
-                proto_source=proto_source
+        match = cls.match_assignment(proto_source[7:], parent=parent)
+        proto_source = match.remaining_source
+        if not proto_source.startswith(";"):
+            raise ProtoParseError(
+                "Proto has invalid option", proto_source, expected=";"
+            )
+
+        return ParsedProtoOptionNode(match.node, proto_source[1:])
+
+    @classmethod
+    def match_assignment(
+        cls, proto_source: str, parent: Optional[ProtoNode] = None
+    ) -> "ParsedProtoOptionNode":
+        """Matches the `name = value` part of an option, raising if it's invalid.
+
+        The returned remaining source starts right after the value.
+        """
+        # Every part of the pattern is optional, so it always matches.
+        name_match = lexer.OPTION_NAME.match(proto_source)
+        assert name_match is not None
+        name = name_match.group()
+        if not name:
+            raise ProtoParseError(
+                "Proto has invalid option",
+                proto_source,
+                expected=")" if proto_source.startswith("(") else "=",
+            )
+        if name.endswith(".") or ".)" in name:
+            raise ProtoParseError(
+                "Proto has invalid option", proto_source, expected="identifier"
             )
-            if identifier_match is None:
-                identifier_match = ProtoIdentifier.match(proto_source=proto_source)
-                if identifier_match is None:
-                    break
-            name_parts.append(identifier_match.node)
-            proto_source = identifier_match.remaining_source
-
-        proto_source = proto_source.strip()
+
+        proto_source = proto_source[len(name) :].strip()
         if not proto_source.startswith("="):
-            raise ValueError(
-                f"Proto has invalid option when expecting =: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid option", proto_source, expected="="
             )
         proto_source = proto_source[1:].strip()
         constant_match = ProtoConstant.match(proto_source)
         if constant_match is None:
-            raise ValueError(
-                f"Proto has invalid option when expecting constant: {proto_source}"
-            )
-
-        proto_source = constant_match.remaining_source
-        if not constant_match.remaining_source.startswith(";"):
-            raise ValueError(
-                f"Proto has invalid option when expecting ;: {proto_source}"
+            raise ProtoParseError(
+                "Proto has invalid option", proto_source, expected="constant"
             )
 
         identifier: ProtoFullIdentifier | ProtoIdentifier
-        if len(name_parts) > 1:
-            identifier = ProtoFullIdentifier(
-                identifier="".join(x.identifier for x in name_parts)
-            )
+        if name.startswith("(") and not name.endswith(")"):
+            identifier = ProtoFullIdentifier(identifier=name)
         else:
-            identifier = ProtoIdentifier(identifier=name_parts[0].identifier)
+            identifier = ProtoIdentifier(identifier=name)
 
-        proto_option = ProtoOption(
+        proto_option = cls(
             name=identifier,
             value=constant_match.node,
             parent=parent,
@@ -114,10 +101,51 @@ class ProtoOption(ProtoNode):
         identifier.parent = proto_option
         constant_match.node.parent = proto_option
 
-        return ParsedProtoOptionNode(
-            proto_option,
-            proto_source[1:],
-        )
+        return ParsedProtoOptionNode(proto_option, constant_match.remaining_source)
+
+    @classmethod
+    def match_list(
+        cls: type[OptionType], proto_source: str
+    ) -> tuple[list[OptionType], str]:
+        """Matches a bracketed option list, like `[deprecated = true, (foo) = "a, b"]`.
+
+        proto_source must start with the opening bracket. The closing bracket is
+        found in one scan that skips strings and nested values, then the options
+        are matched from just the text in between. Returns the options and the
+        source after the closing bracket.
+        """
+        end = lexer.closing_bracket(proto_source)
+        if end < 0:
+            raise ProtoParseError(
+                "Proto has invalid option list", proto_source, expected="]"
+            )
+        options: list[OptionType] = []
+        body = proto_source[1:end]
+        options_source = lexer.skip_comments(body).rstrip()
+        try:
+            while True:
+                match = cls.match_assignment(options_source)
+                options.append(cast(OptionType, match.node))
+                options_source = lexer.skip_comments(match.remaining_source)
+                if not options_source:
+                    return options, proto_source[end + 1 :].strip()
+                if not options_source.startswith(","):
+                    raise ProtoParseError(
+                        "Proto has invalid option list",
+                        options_source,
+                        expected=", or ]",
+                    )
+                options_source = lexer.skip_comments(options_source[1:])
+        except ProtoParseError as e:
+            # Errors are positioned by the source remaining after them, so point
+            # this one back into proto_source rather than the text in brackets.
+            body_end = 1 + len(body.rstrip())
+            raise ProtoParseError(
+                e.message, proto_source[body_end - e.remaining_length :], e.expected
+            ) from e
+
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, self.value]
 
     def serialize(self) -> str:
         return f"option {self.name.serialize()} = {self.value.serialize()};"
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff, ProtoParseError
 
 
 class ProtoPackage(ProtoNode):
@@ -28,24 +28,25 @@ class ProtoPackage(ProtoNode):
             return None
 
         if not proto_source.startswith("package "):
-            raise ValueError(f"Proto has invalid package: {proto_source}")
+            raise ProtoParseError("Proto has invalid package", proto_source)
 
         proto_source = proto_source[8:]
-        parts = proto_source.split(";")
-        package = parts[0]
-
-        if len(parts) == 1:
-            raise ValueError(
-                f"Proto has invalid package declaration syntax: {';'.join(parts)}"
+        semicolon_pos = proto_source.find(";")
+        if semicolon_pos == -1:
+            raise ProtoParseError(
+                "Proto has invalid package declaration syntax",
+                proto_source,
+                expected=";",
             )
 
+        package = proto_source[:semicolon_pos]
         if not package:
-            raise ValueError(f"Proto cannot have empty package: {proto_source}")
-
-        proto_source = ";".join(parts[1:])
+            raise ProtoParseError("Proto cannot have empty package", proto_source)
 
         if package.startswith(".") or package.endswith("."):
-            raise ValueError(f"Proto has invalid package: {package}")
+            raise ProtoParseError("Proto has invalid package", proto_source)
+
+        proto_source = proto_source[semicolon_pos + 1 :]
 
         return ParsedProtoNode(
             ProtoPackage(package=package, parent=parent), proto_source.strip()
@@ -1,8 +1,8 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Sequence
 
 from src.proto_int import ProtoInt, ProtoIntSign
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoParseError
 
 
 class ParsedProtoRangeNode(ParsedProtoNode):
@@ -59,8 +59,7 @@ class ProtoRange(ProtoNode):
         if match is None:
             return None
 
-        match.node.sign = sign
-        min = match.node
+        min = ProtoInt(value=match.node.value, sign=sign)
         proto_source = match.remaining_source
 
         max = None
@@ -81,11 +80,12 @@ class ProtoRange(ProtoNode):
                 else:
                     match = ProtoInt.match(proto_source)
                 if match is None:
-                    raise ValueError(
-                        f"Proto source has invalid range, expecting int for max: {proto_source}"
+                    raise ProtoParseError(
+                        "Proto source has invalid range",
+                        proto_source,
+                        expected="int for max",
                     )
-                match.node.sign = sign
-                max = match.node
+                max = ProtoInt(value=match.node.value, sign=sign)
                 proto_source = match.remaining_source
 
         proto_range = ProtoRange(min=min, max=max, parent=parent)
@@ -94,6 +94,11 @@ class ProtoRange(ProtoNode):
             max.parent = proto_range
         return ParsedProtoRangeNode(proto_range, proto_source.strip())
 
+    def children(self) -> Sequence[ProtoNode]:
+        if isinstance(self.max, ProtoNode):
+            return [self.min, self.max]
+        return [self.min]
+
     def serialize(self) -> str:
         if self.max is not None:
             if isinstance(self.max, ProtoRangeEnum):
@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Sequence
 
+from src import lexer
 from src.proto_identifier import ProtoIdentifier
-from src.proto_node import ParsedProtoNode, ProtoNode
+from src.proto_node import ParsedProtoNode, ProtoList, ProtoNode, ProtoParseError
 from src.proto_range import ProtoRange
 
 
@@ -33,14 +34,14 @@ class ProtoReserved(ProtoNode):
             if quote_type is None:
                 raise ValueError("Quote type must be specified when reserving fields")
 
-        self.ranges = ranges
+        self.ranges = ProtoList(self, ranges)
         for range in self.ranges:
             range.parent = self
 
         if fields is None:
             fields = []
 
-        self.fields = fields
+        self.fields = ProtoList(self, fields)
         for field in self.fields:
             field.parent = self
 
@@ -57,10 +58,14 @@ class ProtoReserved(ProtoNode):
 
     def normalize(self) -> "ProtoReserved":
         # sort the ranges.
+        ranges = sorted(self.ranges, key=lambda r: int(r.min))
+        fields = sorted(self.fields, key=lambda f: str(f))
+        if ranges == self.ranges and fields == self.fields:
+            return self
         return ProtoReserved(
             parent=self.parent,
-            ranges=sorted(self.ranges, key=lambda r: int(r.min)),
-            fields=sorted(self.fields, key=lambda f: str(f)),
+            ranges=ranges,
+            fields=fields,
             quote_type=self.quote_type,
         )
 
@@ -75,10 +80,11 @@ class ProtoReserved(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoNode"]:
-        if not proto_source.startswith("reserved "):
+        end = lexer.keyword_end(proto_source, "reserved")
+        if end < 0:
             return None
 
-        proto_source = proto_source[9:].strip()
+        proto_source = proto_source[end:].strip()
 
         ranges = []
         fields = []
@@ -88,8 +94,10 @@ class ProtoReserved(ProtoNode):
                 proto_source = proto_source[1:].strip()
                 break
             if not proto_source:
-                raise ValueError(
-                    "Proto source has invalid reserved syntax, does not contain ;"
+                raise ProtoParseError(
+                    "Proto source has invalid reserved syntax",
+                    proto_source,
+                    expected=";",
                 )
             if proto_source[0] == ",":
                 proto_source = proto_source[1:].strip()
@@ -105,22 +113,28 @@ class ProtoReserved(ProtoNode):
                     if proto_source.startswith(q.value)
                 ]
                 if not quote_types:
-                    raise ValueError(
-                        f"Proto source has invalid reserved syntax, expecting quote for field identifier: {proto_source}"
+                    raise ProtoParseError(
+                        "Proto source has invalid reserved syntax",
+                        proto_source,
+                        expected="quote for field identifier",
                     )
                 quote_type = quote_types[0]
                 proto_source = proto_source[1:]
                 match = ProtoIdentifier.match(proto_source)
                 if match is None:
-                    raise ValueError(
-                        f"Proto source has invalid reserved syntax, expecting field identifier: {proto_source}"
+                    raise ProtoParseError(
+                        "Proto source has invalid reserved syntax",
+                        proto_source,
+                        expected="field identifier",
                     )
 
                 fields.append(match.node)
                 proto_source = match.remaining_source
                 if not proto_source.startswith(quote_type.value):
-                    raise ValueError(
-                        f"Proto source has invalid reserved syntax, expecting closing quote {quote_type.value}: {proto_source}"
+                    raise ProtoParseError(
+                        "Proto source has invalid reserved syntax",
+                        proto_source,
+                        expected=f"closing quote {quote_type.value}",
                     )
                 proto_source = proto_source[1:].strip()
 
@@ -131,6 +145,9 @@ class ProtoReserved(ProtoNode):
             proto_source.strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [*self.ranges, *self.fields]
+
     def serialize(self) -> str:
         serialize_parts = [
             "reserved",
@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Optional, Sequence
 
+from src import lexer
 from src.proto_comment import (
     ProtoComment,
     ProtoMultiLineComment,
@@ -10,7 +11,14 @@ from src.proto_identifier import (
     ProtoEnumOrMessageIdentifier,
     ProtoIdentifier,
 )
-from src.proto_node import ParsedProtoNode, ProtoContainerNode, ProtoNode
+from src.proto_node import (
+    ParsedProtoNode,
+    ProtoContainerNode,
+    ProtoErrorNode,
+    ProtoList,
+    ProtoNode,
+    ProtoParseError,
+)
 from src.proto_option import ProtoOption
 
 
@@ -38,7 +46,7 @@ class ProtoServiceRPC(ProtoNode):
 
         if options is None:
             options = []
-        self.options = options
+        self.options = ProtoList(self, options)
         for option in self.options:
             option.parent = self
 
@@ -59,13 +67,16 @@ class ProtoServiceRPC(ProtoNode):
         return str(self)
 
     def normalize(self) -> "ProtoServiceRPC":
+        options = sorted(self.options, key=lambda o: str(o))
+        if options == self.options:
+            return self
         return ProtoServiceRPC(
             name=self.name,
             request_type=self.request_type,
             response_type=self.response_type,
             request_stream=self.request_stream,
             response_stream=self.response_stream,
-            options=sorted(self.options, key=lambda o: str(o.normalize())),
+            options=options,
             parent=self.parent,
         )
 
@@ -73,9 +84,10 @@ class ProtoServiceRPC(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoNode"]:
-        if not proto_source.startswith("rpc "):
+        end = lexer.keyword_end(proto_source, "rpc")
+        if end < 0:
             return None
-        proto_source = proto_source[4:].strip()
+        proto_source = proto_source[end:].strip()
 
         # Match the RPC name.
         name_match = ProtoIdentifier.match(proto_source)
@@ -118,9 +130,10 @@ class ProtoServiceRPC(ProtoNode):
             return None
         proto_source = proto_source[1:].strip()
 
-        if not proto_source.startswith("returns "):
+        end = lexer.keyword_end(proto_source, "returns")
+        if end < 0:
             return None
-        proto_source = proto_source[8:].strip()
+        proto_source = proto_source[end:].strip()
 
         if not proto_source.startswith("("):
             return None
@@ -193,6 +206,9 @@ class ProtoServiceRPC(ProtoNode):
             proto_source.strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, self.request_type, self.response_type, *self.options]
+
     def serialize(self) -> str:
         serialized_parts = [
             "rpc",
@@ -228,8 +244,8 @@ class ProtoService(ProtoContainerNode):
         self.name = name
         self.name.parent = self
 
-    def __eq__(self, other) -> bool:
-        return super().__eq__(other) and self.name == other.name
+    def header_eq(self, other: ProtoContainerNode) -> bool:
+        return self.name == getattr(other, "name", None)
 
     def __str__(self) -> str:
         return f"<ProtoService name={self.name}, nodes={self.nodes}>"
@@ -237,13 +253,16 @@ class ProtoService(ProtoContainerNode):
     def __repr__(self) -> str:
         return str(self)
 
-    def normalize(self) -> "ProtoService":
+    def build_normalized(
+        self, normalized_nodes: list[Optional[ProtoNode]]
+    ) -> "ProtoService":
         non_comment_nodes = filter(
-            lambda n: not isinstance(n, ProtoComment), self.nodes
+            lambda n: not isinstance(n[0], (ProtoComment, ProtoErrorNode)),
+            zip(self.nodes, normalized_nodes),
         )
         return ProtoService(
             name=self.name,
-            nodes=sorted(non_comment_nodes, key=lambda n: str(n.normalize())),
+            nodes=[n for n, _ in sorted(non_comment_nodes, key=lambda n: str(n[1]))],
             parent=self.parent,
         )
 
@@ -259,14 +278,14 @@ class ProtoService(ProtoContainerNode):
         proto_source = proto_source[8:]
         match = ProtoIdentifier.match(proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid service name: {proto_source}")
+            raise ProtoParseError("Proto has invalid service name", proto_source)
 
         service_name = match.node
         proto_source = match.remaining_source.strip()
 
         if not proto_source.startswith("{"):
-            raise ValueError(
-                f"Proto service has invalid syntax, expecting opening curly brace: {proto_source}"
+            raise ProtoParseError(
+                "Proto service has invalid syntax", proto_source, expected="{"
             )
 
         return ParsedProtoIdentifierNode(service_name, proto_source[1:].strip())
@@ -295,12 +314,10 @@ class ProtoService(ProtoContainerNode):
 
     @property
     def options(self) -> list[ProtoOption]:
-        return [node for node in self.nodes if isinstance(node, ProtoOption)]
+        return list(self.nodes_of_type(ProtoOption))
 
-    def serialize(self) -> str:
-        serialize_parts = (
-            [f"service {self.name.serialize()} {{"]
-            + [n.serialize() for n in self.nodes]
-            + ["}"]
-        )
-        return "\n".join(serialize_parts)
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.name, *self.nodes]
+
+    def serialize_header(self) -> str:
+        return f"service {self.name.serialize()} {{"
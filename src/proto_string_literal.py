@@ -1,5 +1,7 @@
+import re
 from typing import Optional
 
+from src import lexer
 from src.proto_node import ParsedProtoNode, ProtoNode
 
 
@@ -35,23 +37,37 @@ class ProtoStringLiteral(ProtoNode):
     def match(
         cls, proto_source: str, parent: Optional[ProtoNode] = None
     ) -> Optional["ParsedProtoStringLiteralNode"]:
-        if not any(proto_source.startswith(c) for c in ProtoStringLiteral.QUOTES):
+        if not proto_source or proto_source[0] not in lexer.QUOTES:
             return None
-        escaped = False
-        starting_quote = proto_source[0]
-        for i, c in enumerate(proto_source[1:]):
-            if c == "\\":
-                escaped = True
-                continue
-            if c == starting_quote and not escaped:
-                return ParsedProtoStringLiteralNode(
-                    ProtoStringLiteral(
-                        val=proto_source[1 : i + 1], quote=starting_quote, parent=parent
-                    ),
-                    proto_source[i + 2 :].strip(),
-                )
-            escaped = False
-        return None
+        end = lexer.string_end(proto_source)
+        if end < 0:
+            return None
+        return ParsedProtoStringLiteralNode(
+            ProtoStringLiteral(
+                val=proto_source[1:end], quote=proto_source[0], parent=parent
+            ),
+            proto_source[end + 1 :].strip(),
+        )
+
+    def concatenate(self, other: "ProtoStringLiteral") -> "ProtoStringLiteral":
+        """Returns a literal of this one's value followed by the other's, quoted
+        like this one."""
+        value = other.value
+        if other.quote != self.quote:
+            # This literal's quote has to be escaped wherever the other's value
+            # has it, and the other's quote doesn't need to be, but still can be.
+            value = re.sub(
+                rf"\\.|{self.quote}",
+                lambda match: (
+                    "\\" + self.quote if match.group() == self.quote else match.group()
+                ),
+                value,
+            )
+        return ProtoStringLiteral(val=self.value + value, quote=self.quote)
+
+    def bytes_value(self) -> bytes:
+        """Returns the literal's value, with escape sequences decoded."""
+        return lexer.decode_string(self.value)
 
     def serialize(self) -> str:
         return "".join([self.quote, self.value, self.quote])
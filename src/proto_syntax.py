@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Optional
+from typing import Optional, Sequence
 
-from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff
+from src.proto_node import ParsedProtoNode, ProtoNode, ProtoNodeDiff, ProtoParseError
 from src.proto_string_literal import ProtoStringLiteral
 
 
@@ -44,14 +44,20 @@ class ProtoSyntax(ProtoNode):
         proto_source = proto_source[9:]
         match = ProtoStringLiteral.match(proto_source)
         if match is None:
-            raise ValueError(f"Proto has invalid syntax syntax: {proto_source}")
+            raise ProtoParseError(
+                "Proto has invalid syntax syntax", proto_source, expected="string"
+            )
         if not match.remaining_source.startswith(";"):
-            raise ValueError(f"Proto has invalid syntax: {proto_source}")
+            raise ProtoParseError(
+                "Proto has invalid syntax", proto_source, expected=";"
+            )
         try:
             ProtoSyntaxType[match.node.value.upper()]
         except KeyError:
-            raise ValueError(
-                f"Proto has unknown syntax type: {match.node.value}, must be one of: {[proto_type.name for proto_type in ProtoSyntaxType]}"
+            raise ProtoParseError(
+                "Proto has unknown syntax type",
+                proto_source,
+                expected=f"one of {[proto_type.name for proto_type in ProtoSyntaxType]}",
             )
 
         return ParsedProtoSyntaxNode(
@@ -59,6 +65,9 @@ class ProtoSyntax(ProtoNode):
             match.remaining_source.strip(),
         )
 
+    def children(self) -> Sequence[ProtoNode]:
+        return [self.syntax]
+
     def serialize(self) -> str:
         return f"syntax = {self.syntax.serialize()};"
 
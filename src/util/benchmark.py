@@ -0,0 +1,378 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from src.proto_file import ProtoFile
+from src.proto_message import ProtoMessageAdded
+from src.proto_node import ProtoNode
+from src.util import binary_ast
+from src.util.compatibility_checker import CompatibilityChecker
+from src.util.corpus_generator import CorpusGenerator, CorpusShape
+from src.util.parser import Parser
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# Messages of nothing but plain fields, to time field type and keyword matching.
+FIELD_HEAVY_SHAPE = CorpusShape(
+    fields_per_message=60,
+    nesting_depth=0,
+    options_per_message=0,
+    field_option_rate=0,
+    comment_rate=0,
+)
+# The fewest times each operation is timed, however long it takes.
+MIN_RUNS = 5
+# Where Bazel puts the vendored Google protos, relative to the runfiles directory.
+GOOGLE_PROTOS = "external/com_google_protobuf/src/google/protobuf"
+
+
+@dataclass
+class Corpus:
+    name: str
+    lines: int
+    texts: list[str]
+    # Modified versions of texts, to diff against.
+    changed_texts: list[str]
+
+
+@dataclass
+class Measurement:
+    corpus: str
+    lines: int
+    operation: str
+    runs: int
+    # The fastest run, in seconds.
+    seconds: float
+    ops_per_second: float
+    peak_memory_bytes: int
+    # Time the cyclic garbage collector spent during a run with it enabled. The
+    # timed runs have it disabled.
+    gc_seconds: float = 0.0
+
+
+def synthetic_corpus(
+    lines: int,
+    seed: int = 0,
+    shape: Optional[CorpusShape] = None,
+    name: str = "synthetic",
+) -> Corpus:
+    """Returns a generated file of about the given number of lines.
+
+    Its changed version has a few messages, fields and options added, removed or
+    changed, so diffing the two finds differences.
+    """
+    before, after, _ = CorpusGenerator(seed, shape).generate_pair(
+        mutations=12, lines=lines
+    )
+    text = before.serialize()
+    return Corpus(f"{name}-{lines}", text.count("\n") + 1, [text], [after.serialize()])
+
+
+def batch_corpus(files: int, lines: int = 1000) -> Corpus:
+    """Returns files different generated files, each of about the given lines."""
+    corpora = [synthetic_corpus(lines, seed=seed) for seed in range(files)]
+    return Corpus(
+        f"batch-{files}x{lines}",
+        sum(corpus.lines for corpus in corpora),
+        [text for corpus in corpora for text in corpus.texts],
+        [text for corpus in corpora for text in corpus.changed_texts],
+    )
+
+
+def google_corpus(directory: str) -> Optional[Corpus]:
+    """Returns the protos in directory that this library can parse, or None."""
+    if not os.path.isdir(directory):
+        return None
+    texts = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".proto"):
+            continue
+        with open(os.path.join(directory, name), "r") as proto_file:
+            text = proto_file.read()
+        try:
+            Parser.loads(text)
+        except Exception:
+            continue
+        texts.append(text)
+    if not texts:
+        return None
+    lines = sum(text.count("\n") for text in texts)
+    return Corpus("google", lines, texts, texts)
+
+
+def normalize(proto_file: ProtoFile) -> Any:
+    # Normalized trees are cached until something changes, so time normalizing
+    # from scratch.
+    proto_file.clear_caches()
+    return proto_file.normalize()
+
+
+def operations(corpus: Corpus) -> dict[str, Callable[[], Any]]:
+    before = [Parser.loads(text) for text in corpus.texts]
+    after = [Parser.loads(text) for text in corpus.changed_texts]
+    encoded = [binary_ast.dumps(proto_file) for proto_file in before]
+    checker = CompatibilityChecker([ProtoMessageAdded])
+    return {
+        "parse": lambda: [Parser.loads(text) for text in corpus.texts],
+        "load": lambda: [binary_ast.loads(data) for data in encoded],
+        "serialize": lambda: [proto_file.serialize() for proto_file in before],
+        "normalize": lambda: [normalize(proto_file) for proto_file in before],
+        "diff": lambda: [b.diff(a) for b, a in zip(before, after)],
+        "compatibility": lambda: [
+            list(checker.check_compatibility(b, a)) for b, a in zip(before, after)
+        ],
+    }
+
+
+class GCTimer:
+    """Adds up how long the cyclic garbage collector runs for while it's entered."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.collections = 0
+        self.started = 0.0
+
+    def __enter__(self) -> "GCTimer":
+        gc.callbacks.append(self.callback)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        gc.callbacks.remove(self.callback)
+
+    def callback(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self.started = time.perf_counter()
+        else:
+            self.seconds += time.perf_counter() - self.started
+            self.collections += 1
+
+
+def time_operation(
+    operation: Callable[[], Any], min_time: float, min_runs: int = MIN_RUNS
+) -> tuple[int, float, float]:
+    """Runs operation at least min_runs times, and until min_time has passed.
+
+    Like timeit, the timed runs have the cyclic garbage collector disabled, and
+    garbage is collected before each of them. The collector is timed separately,
+    over one more run with it enabled.
+
+    Returns the runs, the best time, and the time spent collecting garbage.
+    """
+    runs = 0
+    best = math.inf
+    deadline = time.perf_counter() + min_time
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while runs < min_runs or time.perf_counter() < deadline:
+            gc.collect()
+            start = time.perf_counter()
+            operation()
+            best = min(best, time.perf_counter() - start)
+            runs += 1
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    gc.collect()
+    with GCTimer() as gc_timer:
+        operation()
+    return runs, best, gc_timer.seconds
+
+
+def peak_memory(operation: Callable[[], Any]) -> int:
+    """Returns the most memory operation had allocated at once, in bytes."""
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def scaling_exponents(measurements: list[Measurement]) -> dict[str, float]:
+    """Returns k per operation, where time ~ lines ** k between the two largest
+    synthetic corpora.
+
+    1 means linear, 2 quadratic. Only the largest sizes are used, since costs
+    per line dominate at small sizes and would pull a fit over every size toward
+    1 even for quadratic operations.
+    """
+    exponents = {}
+    for operation in dict.fromkeys(m.operation for m in measurements):
+        points = sorted(
+            (m.lines, m.seconds)
+            for m in measurements
+            if m.operation == operation and m.corpus.startswith("synthetic")
+        )
+        if len(points) < 2:
+            continue
+        (small_lines, small_seconds), (large_lines, large_seconds) = points[-2:]
+        if small_lines < large_lines and small_seconds > 0 and large_seconds > 0:
+            exponents[operation] = math.log(large_seconds / small_seconds) / math.log(
+                large_lines / small_lines
+            )
+    return exponents
+
+
+def run_benchmarks(
+    corpora: list[Corpus],
+    min_time: float,
+    track_memory: bool = True,
+    min_runs: int = MIN_RUNS,
+) -> list[Measurement]:
+    measurements = []
+    for corpus in corpora:
+        for name, operation in operations(corpus).items():
+            runs, seconds, gc_seconds = time_operation(operation, min_time, min_runs)
+            measurements.append(
+                Measurement(
+                    corpus=corpus.name,
+                    lines=corpus.lines,
+                    operation=name,
+                    runs=runs,
+                    seconds=seconds,
+                    ops_per_second=1 / seconds if seconds else math.inf,
+                    peak_memory_bytes=peak_memory(operation) if track_memory else 0,
+                    gc_seconds=gc_seconds,
+                )
+            )
+    return measurements
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(
+    measurements: list[Measurement],
+    exponents: dict[str, float],
+    baseline: Optional[dict] = None,
+) -> str:
+    """Formats measurements as a table, comparing them to a baseline's results."""
+    baseline_seconds = {}
+    if baseline is not None:
+        baseline_seconds = {
+            (m["corpus"], m["operation"]): m["seconds"]
+            for m in baseline["measurements"]
+        }
+    rows = [
+        f"{'corpus':<18}{'lines':>8}  {'operation':<14}{'ops/sec':>12}"
+        f"{'peak MiB':>10}{'gc ms':>9}{'vs baseline':>13}"
+    ]
+    for m in measurements:
+        previous = baseline_seconds.get((m.corpus, m.operation))
+        change = f"{previous / m.seconds:.2f}x" if previous else ""
+        rows.append(
+            f"{m.corpus:<18}{m.lines:>8}  {m.operation:<14}{m.ops_per_second:>12.2f}"
+            f"{m.peak_memory_bytes / (1 << 20):>10.1f}{m.gc_seconds * 1000:>9.2f}"
+            f"{change:>13}"
+        )
+    if exponents:
+        rows.append("")
+        rows.append("Scaling exponents (time ~ lines ** k at the largest sizes):")
+        rows += [f"  {name:<14}{k:.2f}" for name, k in exponents.items()]
+    return "\n".join(rows)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks parsing and diffing.")
+    parser.add_argument(
+        "--sizes",
+        type=lambda sizes: [int(size) for size in sizes.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma-separated line counts of the synthetic protos.",
+    )
+    parser.add_argument(
+        "--field-heavy-lines",
+        type=int,
+        default=10000,
+        help="Line count of the field-heavy synthetic proto, or 0 to skip it.",
+    )
+    parser.add_argument(
+        "--batch-files",
+        type=int,
+        default=0,
+        help="Number of 1k-line synthetic protos to time as one batch, if any.",
+    )
+    parser.add_argument("--google-protos", default=GOOGLE_PROTOS)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="Seconds to spend repeating each operation.",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=MIN_RUNS,
+        help="Fewest times to run each operation, however long it takes.",
+    )
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument(
+        "--weak-parents",
+        action="store_true",
+        help="Links nodes to their parents weakly, so trees aren't reference cycles.",
+    )
+    parser.add_argument("--output", help="Writes results to this JSON file.")
+    parser.add_argument("--baseline", help="Results JSON to compare against.")
+    args = parser.parse_args(argv)
+    ProtoNode.weak_parents = args.weak_parents
+
+    corpora = []
+    google = google_corpus(args.google_protos)
+    if google is not None:
+        corpora.append(google)
+    corpora += [synthetic_corpus(size) for size in args.sizes]
+    if args.field_heavy_lines:
+        corpora.append(
+            synthetic_corpus(
+                args.field_heavy_lines, shape=FIELD_HEAVY_SHAPE, name="fields"
+            )
+        )
+    if args.batch_files:
+        corpora.append(batch_corpus(args.batch_files))
+
+    measurements = run_benchmarks(
+        corpora, args.min_time, not args.no_memory, args.min_runs
+    )
+    exponents = scaling_exponents(measurements)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+    print(report(measurements, exponents, baseline))
+
+    if args.output:
+        results = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "weak_parents": args.weak_parents,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "measurements": [asdict(m) for m in measurements],
+            "scaling_exponents": exponents,
+        }
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
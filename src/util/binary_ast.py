@@ -0,0 +1,575 @@
+import gc
+import struct
+from typing import BinaryIO, Callable, NamedTuple, Optional, cast
+
+from src.proto_bool import ProtoBool
+from src.proto_comment import (
+    ProtoComment,
+    ProtoMultiLineComment,
+    ProtoSingleLineComment,
+)
+from src.proto_constant import (
+    ProtoAggregate,
+    ProtoAggregateField,
+    ProtoAggregateList,
+    ProtoConstant,
+)
+from src.proto_enum import ProtoEnum, ProtoEnumValue, ProtoEnumValueOption
+from src.proto_extend import ProtoExtend
+from src.proto_extensions import ProtoExtensions
+from src.proto_file import ProtoFile
+from src.proto_float import ProtoFloat, ProtoFloatSign
+from src.proto_identifier import (
+    ProtoEnumOrMessageIdentifier,
+    ProtoFullIdentifier,
+    ProtoIdentifier,
+)
+from src.proto_import import ProtoImport
+from src.proto_int import ProtoInt, ProtoIntSign
+from src.proto_map import ProtoMap, ProtoMapKeyTypesEnum
+from src.proto_message import ProtoMessage
+from src.proto_message_field import (
+    ProtoMessageField,
+    ProtoMessageFieldOption,
+    ProtoMessageFieldTypesEnum,
+)
+from src.proto_node import (
+    ProtoContainerNode,
+    ProtoErrorNode,
+    ProtoList,
+    ProtoNode,
+    ProtoParseError,
+    parent_link,
+)
+from src.proto_oneof import ProtoOneOf
+from src.proto_option import ProtoOption
+from src.proto_package import ProtoPackage
+from src.proto_range import ProtoRange, ProtoRangeEnum
+from src.proto_reserved import ProtoReserved, ProtoReservedFieldQuoteEnum
+from src.proto_service import ProtoService, ProtoServiceRPC
+from src.proto_string_literal import ProtoStringLiteral
+from src.proto_syntax import ProtoSyntax
+from src.util.wire_format import decode_varint, encode_varint
+
+# An encoded tree is:
+#   MAGIC, then FORMAT_VERSION as a varint,
+#   a string table: a varint count, then each string as a varint length and UTF-8,
+#   then every node in post-order: a varint kind tag, a varint count of the
+#   node's children (which immediately precede it), and then its scalar fields.
+# Strings are written as varint indexes into the string table.
+MAGIC = b"PYPROTO\x00"
+FORMAT_VERSION = 1
+
+FLOAT = struct.Struct("<d")
+
+
+class Writer:
+    def __init__(self) -> None:
+        self.output = bytearray()
+        self.strings: dict[str, int] = {}
+
+    def varint(self, value: int) -> None:
+        encode_varint(value, self.output)
+
+    def string_index(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def string(self, value: str) -> None:
+        encode_varint(self.string_index(value), self.output)
+
+    def optional_string(self, value: Optional[str]) -> None:
+        # Indexes are shifted up by one, so zero can mean None.
+        if value is None:
+            self.output.append(0)
+        else:
+            encode_varint(self.string_index(value) + 1, self.output)
+
+    def float(self, value: float) -> None:
+        self.output += FLOAT.pack(value)
+
+
+class Reader:
+    def __init__(self, data: bytes, position: int, strings: list[str]):
+        self.data = data
+        self.position = position
+        self.strings = strings
+
+    def varint(self) -> int:
+        value, self.position = decode_varint(self.data, self.position)
+        return value
+
+    def string(self) -> str:
+        value, self.position = decode_varint(self.data, self.position)
+        return self.strings[value]
+
+    def optional_string(self) -> Optional[str]:
+        value, self.position = decode_varint(self.data, self.position)
+        return None if value == 0 else self.strings[value - 1]
+
+    def float(self) -> float:
+        (value,) = FLOAT.unpack_from(self.data, self.position)
+        self.position += FLOAT.size
+        return value
+
+
+class NodeKind(NamedTuple):
+    node_type: type[ProtoNode]
+    # Writes a node's scalar fields; its children are written generically.
+    encode: Callable[[Writer, ProtoNode], None]
+    # Builds a node from its scalar fields and its decoded children.
+    decode: Callable[[Reader, list[ProtoNode]], ProtoNode]
+
+
+FIELD_TYPES = {t.value: t for t in ProtoMessageFieldTypesEnum}
+MAP_KEY_TYPES = {t.value: t for t in ProtoMapKeyTypesEnum}
+RESERVED_QUOTES = {q.value: q for q in ProtoReservedFieldQuoteEnum}
+
+# The attributes of each node type that hold lists of nodes. They're restored as
+# ProtoLists, which tell the node when they change, as the constructors do.
+LIST_ATTRIBUTES: dict[type[ProtoNode], tuple[str, ...]] = {
+    ProtoAggregate: ("fields",),
+    ProtoAggregateList: ("values",),
+    ProtoEnumValue: ("options",),
+    ProtoExtensions: ("ranges",),
+    ProtoMap: ("options",),
+    ProtoMessageField: ("options",),
+    ProtoReserved: ("ranges", "fields"),
+    ProtoServiceRPC: ("options",),
+}
+
+# Returns a node's real attribute dict, even for nodes that define a __dict__ method.
+instance_dict = ProtoNode.__dict__["__dict__"].__get__
+
+
+def restore(node_type: type[ProtoNode], **attributes) -> ProtoNode:
+    """Builds a node from its attributes without calling its constructor.
+
+    Like unpickling, this skips the constructor, which is most of the cost of
+    building a node. Parents are linked afterwards.
+    """
+    node = node_type.__new__(node_type)
+    list_attributes = LIST_ATTRIBUTES.get(node_type)
+    if list_attributes is not None:
+        for name in list_attributes:
+            attributes[name] = ProtoList(node, attributes[name])
+    instance_dict(node).update(attributes, _parent=None)
+    return node
+
+
+def restore_container(node: ProtoNode, nodes: list[ProtoNode]) -> ProtoNode:
+    assert isinstance(node, ProtoContainerNode)
+    node.set_nodes(nodes)
+    return node
+
+
+def encode_nothing(writer: Writer, node) -> None:
+    pass
+
+
+def decode_option(option_type: type[ProtoOption]):
+    def decode(reader: Reader, children: list) -> ProtoNode:
+        return restore(option_type, name=children[0], value=children[1])
+
+    return decode
+
+
+def encode_package(writer: Writer, node) -> None:
+    writer.string(node.package)
+
+
+def encode_bool(writer: Writer, node) -> None:
+    writer.varint(node.value)
+
+
+def encode_identifier(writer: Writer, node) -> None:
+    writer.string(node.identifier)
+
+
+def decode_identifier(identifier_type: type[ProtoIdentifier]):
+    def decode(reader: Reader, children: list) -> ProtoNode:
+        return restore(identifier_type, identifier=reader.string())
+
+    return decode
+
+
+def encode_comment(writer: Writer, node) -> None:
+    writer.string(node.value)
+
+
+def decode_comment(comment_type: type[ProtoComment]):
+    def decode(reader: Reader, children: list) -> ProtoNode:
+        return restore(comment_type, value=reader.string())
+
+    return decode
+
+
+def encode_int(writer: Writer, node) -> None:
+    writer.varint(node.value)
+    writer.varint(node.sign == ProtoIntSign.NEGATIVE)
+
+
+def decode_int(reader: Reader, children: list) -> ProtoNode:
+    value = reader.varint()
+    if reader.varint():
+        return restore(ProtoInt, value=value, sign=ProtoIntSign.NEGATIVE)
+    return restore(ProtoInt, value=value, sign=ProtoIntSign.POSITIVE)
+
+
+def encode_float(writer: Writer, node) -> None:
+    writer.float(node.value)
+    writer.varint(node.sign == ProtoFloatSign.NEGATIVE)
+
+
+def decode_float(reader: Reader, children: list) -> ProtoNode:
+    value = reader.float()
+    if reader.varint():
+        return restore(ProtoFloat, value=value, sign=ProtoFloatSign.NEGATIVE)
+    return restore(ProtoFloat, value=value, sign=ProtoFloatSign.POSITIVE)
+
+
+def encode_string_literal(writer: Writer, node) -> None:
+    writer.string(node.value)
+    writer.string(node.quote)
+
+
+def decode_string_literal(reader: Reader, children: list) -> ProtoNode:
+    value = reader.string()
+    return restore(ProtoStringLiteral, value=value, quote=reader.string())
+
+
+def encode_import(writer: Writer, node) -> None:
+    writer.varint(node.weak | node.public << 1)
+
+
+def decode_import(reader: Reader, children: list) -> ProtoNode:
+    flags = reader.varint()
+    return restore(
+        ProtoImport, path=children[0], weak=bool(flags & 1), public=bool(flags & 2)
+    )
+
+
+def encode_message_field(writer: Writer, node) -> None:
+    writer.string(node.type.value)
+    writer.varint(node.repeated | node.optional << 1)
+
+
+def decode_message_field(reader: Reader, children: list) -> ProtoNode:
+    field_type = FIELD_TYPES[reader.string()]
+    flags = reader.varint()
+    type_name = None
+    if field_type == ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
+        type_name, *children = children
+    return restore(
+        ProtoMessageField,
+        type=field_type,
+        name=children[0],
+        number=children[1],
+        repeated=bool(flags & 1),
+        optional=bool(flags & 2),
+        enum_or_message_type_name=type_name,
+        options=children[2:],
+    )
+
+
+def encode_map(writer: Writer, node) -> None:
+    writer.string(node.key_type.value)
+    writer.string(node.value_type.value)
+
+
+def decode_map(reader: Reader, children: list) -> ProtoNode:
+    key_type = MAP_KEY_TYPES[reader.string()]
+    value_type = FIELD_TYPES[reader.string()]
+    type_name = None
+    if value_type == ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
+        type_name, *children = children
+    return restore(
+        ProtoMap,
+        key_type=key_type,
+        value_type=value_type,
+        name=children[0],
+        number=children[1],
+        enum_or_message_type_name=type_name,
+        options=children[2:],
+    )
+
+
+def encode_rpc(writer: Writer, node) -> None:
+    writer.varint(node.request_stream | node.response_stream << 1)
+
+
+def decode_rpc(reader: Reader, children: list) -> ProtoNode:
+    flags = reader.varint()
+    return restore(
+        ProtoServiceRPC,
+        name=children[0],
+        request_type=children[1],
+        response_type=children[2],
+        request_stream=bool(flags & 1),
+        response_stream=bool(flags & 2),
+        options=children[3:],
+    )
+
+
+def encode_range(writer: Writer, node) -> None:
+    writer.varint(node.max is ProtoRangeEnum.MAX)
+
+
+def decode_range(reader: Reader, children: list) -> ProtoNode:
+    if reader.varint():
+        return restore(ProtoRange, min=children[0], max=ProtoRangeEnum.MAX)
+    return restore(
+        ProtoRange, min=children[0], max=children[1] if len(children) > 1 else None
+    )
+
+
+def encode_reserved(writer: Writer, node) -> None:
+    writer.varint(len(node.ranges))
+    writer.optional_string(None if node.quote_type is None else node.quote_type.value)
+
+
+def decode_reserved(reader: Reader, children: list) -> ProtoNode:
+    range_count = reader.varint()
+    quote = reader.optional_string()
+    return restore(
+        ProtoReserved,
+        ranges=children[:range_count],
+        fields=children[range_count:],
+        quote_type=None if quote is None else RESERVED_QUOTES[quote],
+    )
+
+
+def encode_error(writer: Writer, node) -> None:
+    writer.string(node.source)
+    writer.string(node.error.message)
+    writer.optional_string(node.error.expected)
+    writer.string(node.error.snippet)
+    writer.varint(node.error.remaining_length)
+
+
+def decode_error(reader: Reader, children: list) -> ProtoNode:
+    source = reader.string()
+    message = reader.string()
+    expected = reader.optional_string()
+    error = ProtoParseError(message, reader.string(), expected=expected)
+    error.remaining_length = reader.varint()
+    return restore(ProtoErrorNode, source=source, error=error)
+
+
+def decode_container(container_type: type[ProtoContainerNode]):
+    def decode(reader: Reader, children: list) -> ProtoNode:
+        return restore_container(
+            restore(container_type, name=children[0]), children[1:]
+        )
+
+    return decode
+
+
+def decode_file(reader: Reader, children: list) -> ProtoNode:
+    proto_file = restore_container(restore(ProtoFile, syntax=children[0]), children[1:])
+    # The data may not have come from dumps, so check what the constructor would.
+    cast(ProtoFile, proto_file).validate()
+    return proto_file
+
+
+# A node's kind tag is its index in this list, so only ever append to it.
+NODE_KINDS: list[NodeKind] = [
+    NodeKind(ProtoFile, encode_nothing, decode_file),
+    NodeKind(
+        ProtoSyntax,
+        encode_nothing,
+        lambda reader, children: restore(ProtoSyntax, syntax=children[0]),
+    ),
+    NodeKind(ProtoStringLiteral, encode_string_literal, decode_string_literal),
+    NodeKind(ProtoIdentifier, encode_identifier, decode_identifier(ProtoIdentifier)),
+    NodeKind(
+        ProtoFullIdentifier, encode_identifier, decode_identifier(ProtoFullIdentifier)
+    ),
+    NodeKind(
+        ProtoEnumOrMessageIdentifier,
+        encode_identifier,
+        decode_identifier(ProtoEnumOrMessageIdentifier),
+    ),
+    NodeKind(
+        ProtoPackage,
+        encode_package,
+        lambda reader, children: restore(ProtoPackage, package=reader.string()),
+    ),
+    NodeKind(ProtoImport, encode_import, decode_import),
+    NodeKind(ProtoOption, encode_nothing, decode_option(ProtoOption)),
+    NodeKind(ProtoEnumValueOption, encode_nothing, decode_option(ProtoEnumValueOption)),
+    NodeKind(
+        ProtoMessageFieldOption,
+        encode_nothing,
+        decode_option(ProtoMessageFieldOption),
+    ),
+    NodeKind(
+        ProtoConstant,
+        encode_nothing,
+        lambda reader, children: restore(ProtoConstant, value=children[0]),
+    ),
+    NodeKind(
+        ProtoBool,
+        encode_bool,
+        lambda reader, children: restore(ProtoBool, value=bool(reader.varint())),
+    ),
+    NodeKind(ProtoInt, encode_int, decode_int),
+    NodeKind(ProtoFloat, encode_float, decode_float),
+    NodeKind(
+        ProtoSingleLineComment, encode_comment, decode_comment(ProtoSingleLineComment)
+    ),
+    NodeKind(
+        ProtoMultiLineComment, encode_comment, decode_comment(ProtoMultiLineComment)
+    ),
+    NodeKind(ProtoEnum, encode_nothing, decode_container(ProtoEnum)),
+    NodeKind(
+        ProtoEnumValue,
+        encode_nothing,
+        lambda reader, children: restore(
+            ProtoEnumValue,
+            identifier=children[0],
+            value=children[1],
+            options=children[2:],
+        ),
+    ),
+    NodeKind(ProtoMessage, encode_nothing, decode_container(ProtoMessage)),
+    NodeKind(ProtoMessageField, encode_message_field, decode_message_field),
+    NodeKind(ProtoMap, encode_map, decode_map),
+    NodeKind(ProtoOneOf, encode_nothing, decode_container(ProtoOneOf)),
+    NodeKind(ProtoService, encode_nothing, decode_container(ProtoService)),
+    NodeKind(ProtoServiceRPC, encode_rpc, decode_rpc),
+    NodeKind(ProtoExtend, encode_nothing, decode_container(ProtoExtend)),
+    NodeKind(
+        ProtoExtensions,
+        encode_nothing,
+        lambda reader, children: restore(ProtoExtensions, ranges=children),
+    ),
+    NodeKind(ProtoReserved, encode_reserved, decode_reserved),
+    NodeKind(ProtoRange, encode_range, decode_range),
+    NodeKind(ProtoErrorNode, encode_error, decode_error),
+    NodeKind(
+        ProtoAggregate,
+        encode_nothing,
+        lambda reader, children: restore(ProtoAggregate, fields=children),
+    ),
+    NodeKind(
+        ProtoAggregateField,
+        encode_nothing,
+        lambda reader, children: restore(
+            ProtoAggregateField, name=children[0], value=children[1]
+        ),
+    ),
+    NodeKind(
+        ProtoAggregateList,
+        encode_nothing,
+        lambda reader, children: restore(ProtoAggregateList, values=children),
+    ),
+]
+
+KIND_TAGS: dict[type[ProtoNode], int] = {
+    kind.node_type: tag for tag, kind in enumerate(NODE_KINDS)
+}
+
+
+def dumps(node: ProtoNode) -> bytes:
+    """Encodes a tree (usually a ProtoFile) into the compact binary format."""
+    writer = Writer()
+    # Nodes are written post-order, so each node's children come right before it.
+    stack: list[tuple[ProtoNode, bool]] = [(node, False)]
+    while stack:
+        node, children_written = stack.pop()
+        if not children_written:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children()))
+            continue
+
+        tag = KIND_TAGS.get(node.__class__)
+        if tag is None:
+            raise ValueError(f"Can't encode node of type {node.__class__.__name__}")
+        writer.varint(tag)
+        writer.varint(len(node.children()))
+        NODE_KINDS[tag].encode(writer, node)
+
+    output = bytearray(MAGIC)
+    encode_varint(FORMAT_VERSION, output)
+    encode_varint(len(writer.strings), output)
+    for string in writer.strings:
+        encoded = string.encode("utf-8")
+        encode_varint(len(encoded), output)
+        output += encoded
+    output += writer.output
+    return bytes(output)
+
+
+def loads(data: bytes, pause_gc: bool = True) -> ProtoNode:
+    """Decodes a tree that was encoded with dumps, restoring its parent links.
+
+    Decoding only allocates nodes, none of which are garbage, so by default the
+    cyclic garbage collector is paused while it runs. Otherwise it keeps rescanning
+    the growing tree, which roughly doubles the time large trees take to load. The
+    collector is paused for the whole process, so pass pause_gc=False if other
+    threads are allocating heavily at the same time.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("Data isn't an encoded proto tree")
+    version, position = decode_varint(data, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Can't decode format version {version}")
+
+    string_count, position = decode_varint(data, position)
+    strings = []
+    for _ in range(string_count):
+        length, position = decode_varint(data, position)
+        strings.append(data[position : position + length].decode("utf-8"))
+        position += length
+
+    reader = Reader(data, position, strings)
+    decoders = [kind.decode for kind in NODE_KINDS]
+    nodes: list[ProtoNode] = []
+    end = len(data)
+    gc_was_enabled = pause_gc and gc.isenabled()
+    if gc_was_enabled:
+        gc.disable()
+    try:
+        while reader.position < end:
+            # Tags and child counts almost always fit in a single byte.
+            position = reader.position
+            tag = data[position]
+            child_count = data[position + 1]
+            if tag < 0x80 and child_count < 0x80:
+                reader.position = position + 2
+            else:
+                tag, reader.position = decode_varint(data, position)
+                child_count, reader.position = decode_varint(data, reader.position)
+            if child_count:
+                if child_count > len(nodes):
+                    raise IndexError(child_count)
+                children = nodes[-child_count:]
+                del nodes[-child_count:]
+            else:
+                children = []
+            node = decoders[tag](reader, children)
+            if children:
+                link = parent_link(node)
+                for child in children:
+                    instance_dict(child)["_parent"] = link
+            nodes.append(node)
+    except (IndexError, KeyError) as e:
+        raise ValueError("Encoded proto tree is truncated or malformed") from e
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if len(nodes) != 1:
+        raise ValueError("Encoded proto tree is truncated or malformed")
+    return nodes[0]
+
+
+def dump(node: ProtoNode, output_file: BinaryIO) -> None:
+    output_file.write(dumps(node))
+
+
+def load(input_file: BinaryIO) -> ProtoNode:
+    return loads(input_file.read())
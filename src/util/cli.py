@@ -0,0 +1,44 @@
+import importlib
+import sys
+from typing import Callable, Optional
+
+# Each command's module and description. Modules are only imported once their
+# command is run, so startup costs no more than the command itself needs.
+COMMANDS = {
+    "parse": ("src.util.parser", "Parses a proto file and prints it back out."),
+    "check": (
+        "src.util.compatibility_checker",
+        "Checks that a proto file is compatible with an earlier version.",
+    ),
+    "benchmark": ("src.util.benchmark", "Benchmarks parsing and diffing."),
+}
+
+
+def usage() -> str:
+    lines = ["usage: cli <command> [arguments]", "", "commands:"]
+    lines += [
+        f"  {name:<12}{description}" for name, (_, description) in COMMANDS.items()
+    ]
+    return "\n".join(lines)
+
+
+def load_command(name: str) -> Callable[[list[str]], int]:
+    """Imports the module for the named command, returning its main function."""
+    module_name, _ = COMMANDS[name]
+    return importlib.import_module(module_name).main
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    if argv[0] not in COMMANDS:
+        sys.stderr.write(f"Unknown command: {argv[0]}\n{usage()}\n")
+        return 2
+    return load_command(argv[0])(argv[1:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,637 @@
+import types
+from typing import Iterable, NamedTuple, Optional
+
+from src.proto_bool import ProtoBool
+from src.proto_file import ProtoFile
+from src.proto_identifier import ProtoEnumOrMessageIdentifier
+from src.proto_map import ProtoMap
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField, ProtoMessageFieldTypesEnum
+from src.proto_oneof import ProtoOneOf
+from src.util.descriptor import TYPE_ENUM, TYPE_MESSAGE, SymbolTable, package_scope
+from src.util.wire_format import I32, I64, LEN, VARINT, encode_varint
+
+VARINT_TYPES = {
+    "int32",
+    "int64",
+    "uint32",
+    "uint64",
+    "sint32",
+    "sint64",
+    "bool",
+    "enum",
+}
+# Struct formats, by type, for the fixed-width types.
+FIXED_TYPES = {
+    "fixed32": "<I",
+    "sfixed32": "<i",
+    "float": "<f",
+    "fixed64": "<Q",
+    "sfixed64": "<q",
+    "double": "<d",
+}
+# Messages with more tags than this dispatch through a dict instead of comparing
+# each tag in turn.
+MAX_TAG_COMPARISONS = 8
+
+DEFAULTS = {
+    "string": '""',
+    "bytes": 'b""',
+    "bool": "False",
+    "float": "0.0",
+    "double": "0.0",
+    "message": "{}",
+}
+
+# Helpers shared by every generated codec.
+PRELUDE = """\
+import struct
+
+_FIXED32 = struct.Struct("<I")
+_SFIXED32 = struct.Struct("<i")
+_FLOAT = struct.Struct("<f")
+_FIXED64 = struct.Struct("<Q")
+_SFIXED64 = struct.Struct("<q")
+_DOUBLE = struct.Struct("<d")
+
+
+def _decode_varint(view, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _encode_varint(value, out):
+    if value < 0:
+        value += 0x10000000000000000
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _skip_field(view, pos, wire_type):
+    if wire_type == 0:
+        return _decode_varint(view, pos)[1]
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = _decode_varint(view, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported wire type {wire_type}")
+
+
+def _as_view(data):
+    return data if isinstance(data, memoryview) else memoryview(data)
+"""
+
+
+class CodecField(NamedTuple):
+    name: str
+    number: int
+    # A scalar type name like "int32", or "message" or "enum".
+    kind: str
+    # The codec name of the message or enum type, for message and enum fields.
+    message: Optional[str]
+    repeated: bool
+    packed: bool
+    # Whether unset fields are just left at their default (proto3 singular scalars).
+    implicit_presence: bool
+    # The other fields in this field's oneof, which setting it clears, or None if
+    # it isn't in a oneof.
+    oneof_siblings: Optional[tuple[str, ...]]
+    # The key and value of a map field's entries.
+    map_entry: Optional[tuple["CodecField", "CodecField"]]
+
+
+class CodecMessage(NamedTuple):
+    full_name: str
+    codec_name: str
+    fields: list[CodecField]
+
+
+def wire_type(kind: str) -> int:
+    if kind in VARINT_TYPES:
+        return VARINT
+    if kind in FIXED_TYPES:
+        return I32 if FIXED_TYPES[kind][-1] in "Iif" else I64
+    return LEN
+
+
+def tag_bytes(number: int, field_wire_type: int) -> bytes:
+    output = bytearray()
+    encode_varint(number << 3 | field_wire_type, output)
+    return bytes(output)
+
+
+def tag_value(number: int, field_wire_type: int) -> int:
+    return number << 3 | field_wire_type
+
+
+def codec_name(full_name: str) -> str:
+    return full_name.lstrip(".").replace(".", "_")
+
+
+def field_option(field: ProtoMessageField, name: str) -> Optional[bool]:
+    for option in field.options:
+        value = option.value.value
+        if option.name.identifier == name and isinstance(value, ProtoBool):
+            return value.value
+    return None
+
+
+class CodecGenerator:
+    """Generates the source of a module with an encoder and decoder per message.
+
+    Messages are represented as dicts from field names to values: lists for repeated
+    fields, dicts for maps and nested messages, and ints for enums. Decoding only
+    sets the fields that are present on the wire, and encoding skips None.
+    """
+
+    def __init__(self, proto_files: Iterable[ProtoFile]):
+        self.proto_files = list(proto_files)
+        self.symbols = SymbolTable(self.proto_files)
+        self.messages: list[CodecMessage] = []
+        # The parsed message each CodecMessage came from, by full name.
+        self.message_nodes: dict[str, ProtoMessage] = {}
+        for proto_file in self.proto_files:
+            self.add_file(proto_file)
+
+    def add_file(self, proto_file: ProtoFile) -> None:
+        proto3 = proto_file.syntax.syntax.value == "proto3"
+        stack: list[tuple[str, ProtoMessage]] = [
+            (package_scope(proto_file), m) for m in reversed(proto_file.messages)
+        ]
+        while stack:
+            scope, message = stack.pop()
+            full_name = f"{scope}.{message.name.identifier}"
+            self.message_nodes[full_name] = message
+            self.messages.append(
+                CodecMessage(
+                    full_name,
+                    codec_name(full_name),
+                    self.message_fields(message, full_name, proto3),
+                )
+            )
+            stack.extend(
+                (full_name, m) for m in reversed(message.nodes_of_type(ProtoMessage))
+            )
+
+    def message_fields(
+        self, message: ProtoMessage, scope: str, proto3: bool
+    ) -> list[CodecField]:
+        fields = []
+        for node in message.nodes:
+            if isinstance(node, ProtoMessageField):
+                fields.append(self.field(node, scope, proto3, None))
+            elif isinstance(node, ProtoMap):
+                fields.append(self.map_field(node, scope))
+            elif isinstance(node, ProtoOneOf):
+                members = node.nodes_of_type(ProtoMessageField)
+                names = [f.name.identifier for f in members]
+                for member in members:
+                    siblings = tuple(n for n in names if n != member.name.identifier)
+                    fields.append(self.field(member, scope, proto3, siblings))
+        return fields
+
+    def resolve_kind(
+        self,
+        field_type: ProtoMessageFieldTypesEnum,
+        type_name: Optional[ProtoEnumOrMessageIdentifier],
+        scope: str,
+    ) -> tuple[str, Optional[str]]:
+        if field_type != ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
+            return field_type.value, None
+        assert type_name is not None
+        full_name, kind = self.symbols.resolve(type_name.identifier, scope)
+        if kind == TYPE_ENUM:
+            return "enum", codec_name(full_name)
+        if kind == TYPE_MESSAGE:
+            return "message", codec_name(full_name)
+        raise ValueError(f"Can't resolve type {type_name.identifier} in {scope}")
+
+    def field(
+        self,
+        field: ProtoMessageField,
+        scope: str,
+        proto3: bool,
+        oneof_siblings: Optional[tuple[str, ...]],
+    ) -> CodecField:
+        kind, message = self.resolve_kind(
+            field.type, field.enum_or_message_type_name, scope
+        )
+        packed = field_option(field, "packed")
+        if packed is None:
+            packed = proto3
+        return CodecField(
+            name=field.name.identifier,
+            number=int(field.number),
+            kind=kind,
+            message=message,
+            repeated=field.repeated,
+            packed=field.repeated and packed and wire_type(kind) != LEN,
+            implicit_presence=proto3
+            and not field.repeated
+            and not field.optional
+            and oneof_siblings is None
+            and kind != "message",
+            oneof_siblings=oneof_siblings,
+            map_entry=None,
+        )
+
+    def map_field(self, proto_map: ProtoMap, scope: str) -> CodecField:
+        value_kind, value_message = self.resolve_kind(
+            proto_map.value_type, proto_map.enum_or_message_type_name, scope
+        )
+        key = CodecField(
+            "key", 1, proto_map.key_type.value, None, False, False, True, None, None
+        )
+        value = CodecField(
+            "value", 2, value_kind, value_message, False, False, True, None, None
+        )
+        return CodecField(
+            name=proto_map.name.identifier,
+            number=int(proto_map.number),
+            kind="message",
+            message=None,
+            repeated=True,
+            packed=False,
+            implicit_presence=False,
+            oneof_siblings=None,
+            map_entry=(key, value),
+        )
+
+    def generate(self) -> str:
+        lines = [
+            "# Generated by src/util/codec_generator.py. Do not edit.",
+            PRELUDE,
+        ]
+        for message in self.messages:
+            lines.extend(self.decoder(message))
+            lines.extend(self.encoder(message))
+            for field in message.fields:
+                if field.map_entry is not None:
+                    entry_name = f"{message.codec_name}__{field.name}_entry"
+                    lines.extend(self.entry_decoder(entry_name, field.map_entry))
+        lines += ["", "", "DECODERS = {"]
+        for message in self.messages:
+            lines.append(f"    {message.full_name[1:]!r}: decode_{message.codec_name},")
+        lines.append("}")
+        lines.append("ENCODERS = {")
+        for message in self.messages:
+            lines.append(f"    {message.full_name[1:]!r}: encode_{message.codec_name},")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def decoder(self, message: CodecMessage) -> list[str]:
+        name = message.codec_name
+        # Each branch is a tag, a comment, and the field and whether it's packed.
+        branches: list[tuple[int, str, CodecField, bool]] = []
+        for field in message.fields:
+            branches.append(
+                (
+                    tag_value(field.number, wire_type(field.kind)),
+                    field.name,
+                    field,
+                    False,
+                )
+            )
+            if field.repeated and wire_type(field.kind) != LEN:
+                # Repeated scalars may be packed or not, whatever the schema says.
+                branches.append(
+                    (tag_value(field.number, LEN), f"{field.name}, packed", field, True)
+                )
+
+        lines = [
+            "",
+            "",
+            f"def decode_{name}(data):",
+            "    view = _as_view(data)",
+            f"    return _decode_{name}(view, 0, len(view))",
+        ]
+        dispatch = len(branches) > MAX_TAG_COMPARISONS
+        if dispatch:
+            # Looking tags up in a dict costs about as much as a handful of
+            # comparisons, but doesn't grow with the number of fields.
+            for tag, comment, field, packed in branches:
+                lines += [
+                    "",
+                    "",
+                    f"def _read_{name}_{tag}(view, pos, message):  # {comment}",
+                ]
+                lines += self.read_field(field, name, packed, "    ")
+                lines.append("    return pos")
+            lines += ["", "", f"_DISPATCH_{name} = {{"]
+            lines += [f"    {tag}: _read_{name}_{tag}," for tag, _, _, _ in branches]
+            lines.append("}")
+
+        lines += [
+            "",
+            "",
+            f"def _decode_{name}(view, pos, end, message=None):",
+            "    if message is None:",
+            "        message = {}",
+            "    while pos < end:",
+            "        tag = view[pos]",
+            "        if tag < 0x80:",
+            "            pos += 1",
+            "        else:",
+            "            tag, pos = _decode_varint(view, pos)",
+        ]
+        if dispatch:
+            lines += [
+                f"        read = _DISPATCH_{name}.get(tag)",
+                "        if read is not None:",
+                "            pos = read(view, pos, message)",
+                "        else:",
+                "            pos = _skip_field(view, pos, tag & 7)",
+            ]
+        elif branches:
+            for index, (tag, comment, field, packed) in enumerate(branches):
+                branch = "if" if index == 0 else "elif"
+                lines.append(f"        {branch} tag == {tag}:  # {comment}")
+                lines += self.read_field(field, name, packed, "            ")
+            lines.append("        else:")
+            lines.append("            pos = _skip_field(view, pos, tag & 7)")
+        else:
+            lines.append("        pos = _skip_field(view, pos, tag & 7)")
+        lines.append("    return message")
+        return lines
+
+    def read_field(
+        self, field: CodecField, message_name: str, packed: bool, indent: str
+    ) -> list[str]:
+        if packed:
+            return self.decode_packed(field, indent)
+        return self.decode_field(field, message_name, indent)
+
+    def entry_decoder(
+        self, entry_name: str, entry: tuple[CodecField, CodecField]
+    ) -> list[str]:
+        key, value = entry
+        lines = [
+            "",
+            "",
+            f"def _decode_{entry_name}(view, pos, end):",
+            f"    key = {self.default(key)}",
+            f"    value = {self.default(value)}",
+            "    while pos < end:",
+            "        tag = view[pos]",
+            "        if tag < 0x80:",
+            "            pos += 1",
+            "        else:",
+            "            tag, pos = _decode_varint(view, pos)",
+        ]
+        for branch, field in [("if", key), ("elif", value)]:
+            lines.append(
+                f"        {branch} tag == {tag_value(field.number, wire_type(field.kind))}:"
+            )
+            lines.extend(
+                self.read_value(field, "            ", field.name, merge=field.name)
+            )
+        lines.append("        else:")
+        lines.append("            pos = _skip_field(view, pos, tag & 7)")
+        lines.append("    return key, value")
+        return lines
+
+    def default(self, field: CodecField) -> str:
+        return DEFAULTS.get(field.kind, "0")
+
+    def read_value(
+        self, field: CodecField, indent: str, target: str, merge: str = "None"
+    ) -> list[str]:
+        """Returns lines that read one value of field at pos into target.
+
+        A message value is merged into the dict merge evaluates to, if any, the
+        way protobuf merges repeated occurrences of a singular message field.
+        """
+        kind = field.kind
+        if kind in VARINT_TYPES:
+            lines = [
+                f"{target} = view[pos]",
+                f"if {target} < 0x80:",
+                "    pos += 1",
+                "else:",
+                f"    {target}, pos = _decode_varint(view, pos)",
+            ]
+            if kind in ("int32", "int64", "enum"):
+                lines += [
+                    f"if {target} > 0x7FFFFFFFFFFFFFFF:",
+                    f"    {target} -= 0x10000000000000000",
+                ]
+            elif kind in ("sint32", "sint64"):
+                lines.append(f"{target} = ({target} >> 1) ^ -({target} & 1)")
+            elif kind == "bool":
+                lines.append(f"{target} = {target} != 0")
+            return [indent + line for line in lines]
+        if kind in FIXED_TYPES:
+            size = 4 if wire_type(kind) == I32 else 8
+            return [
+                f"{indent}{target} = _{kind.upper()}.unpack_from(view, pos)[0]",
+                f"{indent}pos += {size}",
+            ]
+
+        lines = [
+            "length = view[pos]",
+            "if length < 0x80:",
+            "    pos += 1",
+            "else:",
+            "    length, pos = _decode_varint(view, pos)",
+        ]
+        if kind == "string":
+            lines.append(f'{target} = str(view[pos : pos + length], "utf-8")')
+        elif kind == "bytes":
+            lines.append(f"{target} = bytes(view[pos : pos + length])")
+        else:
+            lines.append(
+                f"{target} = _decode_{field.message}(view, pos, pos + length, {merge})"
+            )
+        lines.append("pos += length")
+        return [indent + line for line in lines]
+
+    def decode_field(
+        self, field: CodecField, message_name: str, indent: str
+    ) -> list[str]:
+        if field.map_entry is not None:
+            entry_name = f"{message_name}__{field.name}_entry"
+            return [
+                f"{indent}length = view[pos]",
+                f"{indent}if length < 0x80:",
+                f"{indent}    pos += 1",
+                f"{indent}else:",
+                f"{indent}    length, pos = _decode_varint(view, pos)",
+                f"{indent}key, value = _decode_{entry_name}(view, pos, pos + length)",
+                f"{indent}pos += length",
+                f"{indent}entries = message.get({field.name!r})",
+                f"{indent}if entries is None:",
+                f"{indent}    entries = message[{field.name!r}] = {{}}",
+                f"{indent}entries[key] = value",
+            ]
+
+        if field.repeated:
+            lines = self.read_value(field, indent, "value")
+            lines += [
+                f"{indent}values = message.get({field.name!r})",
+                f"{indent}if values is None:",
+                f"{indent}    message[{field.name!r}] = [value]",
+                f"{indent}else:",
+                f"{indent}    values.append(value)",
+            ]
+        else:
+            merge = f"message.get({field.name!r})"
+            lines = self.read_value(field, indent, "value", merge)
+            lines.append(f"{indent}message[{field.name!r}] = value")
+            for sibling in field.oneof_siblings or ():
+                lines.append(f"{indent}message.pop({sibling!r}, None)")
+        return lines
+
+    def decode_packed(self, field: CodecField, indent: str) -> list[str]:
+        lines = [
+            f"{indent}length = view[pos]",
+            f"{indent}if length < 0x80:",
+            f"{indent}    pos += 1",
+            f"{indent}else:",
+            f"{indent}    length, pos = _decode_varint(view, pos)",
+            f"{indent}packed_end = pos + length",
+            f"{indent}values = message.get({field.name!r})",
+            f"{indent}if values is None:",
+            f"{indent}    values = message[{field.name!r}] = []",
+            f"{indent}while pos < packed_end:",
+        ]
+        lines += self.read_value(field, indent + "    ", "value")
+        lines.append(f"{indent}    values.append(value)")
+        return lines
+
+    def encoder(self, message: CodecMessage) -> list[str]:
+        name = message.codec_name
+        lines = [
+            "",
+            "",
+            f"def encode_{name}(message):",
+            "    out = bytearray()",
+            f"    _encode_{name}(message, out)",
+            "    return bytes(out)",
+            "",
+            "",
+            f"def _encode_{name}(message, out):",
+        ]
+        for field in message.fields:
+            lines.append(f"    value = message.get({field.name!r})")
+            condition = "value is not None"
+            if field.implicit_presence or field.repeated or field.map_entry:
+                # Fields without presence aren't written when they're the default,
+                # and neither are empty repeated fields.
+                condition = "value"
+            lines.append(f"    if {condition}:")
+            lines.extend(self.encode_field(field, "        "))
+        if not message.fields:
+            lines.append("    pass")
+        return lines
+
+    def write_value(
+        self, field: CodecField, indent: str, value: str, out: str
+    ) -> list[str]:
+        """Returns lines that write value (without a tag) to out."""
+        kind = field.kind
+        if kind == "bool":
+            return [f"{indent}{out}.append(1 if {value} else 0)"]
+        if kind in ("sint32", "sint64"):
+            return [f"{indent}_encode_varint(({value} << 1) ^ ({value} >> 63), {out})"]
+        if kind in VARINT_TYPES:
+            return [
+                f"{indent}if 0 <= {value} < 0x80:",
+                f"{indent}    {out}.append({value})",
+                f"{indent}else:",
+                f"{indent}    _encode_varint({value}, {out})",
+            ]
+        if kind in FIXED_TYPES:
+            return [f"{indent}{out} += _{kind.upper()}.pack({value})"]
+        if kind == "string":
+            return [
+                f'{indent}encoded = {value}.encode("utf-8")',
+                f"{indent}_encode_varint(len(encoded), {out})",
+                f"{indent}{out} += encoded",
+            ]
+        if kind == "bytes":
+            return [
+                f"{indent}_encode_varint(len({value}), {out})",
+                f"{indent}{out} += {value}",
+            ]
+        return [
+            f"{indent}nested = bytearray()",
+            f"{indent}_encode_{field.message}({value}, nested)",
+            f"{indent}_encode_varint(len(nested), {out})",
+            f"{indent}{out} += nested",
+        ]
+
+    def encode_field(self, field: CodecField, indent: str) -> list[str]:
+        if field.map_entry is not None:
+            key, value = field.map_entry
+            tag = tag_bytes(field.number, LEN)
+            lines = [
+                f"{indent}for entry_key, entry_value in value.items():",
+                f"{indent}    entry = bytearray({tag_bytes(key.number, wire_type(key.kind))!r})",
+            ]
+            lines += self.write_value(key, indent + "    ", "entry_key", "entry")
+            lines.append(
+                f"{indent}    entry += {tag_bytes(value.number, wire_type(value.kind))!r}"
+            )
+            lines += self.write_value(value, indent + "    ", "entry_value", "entry")
+            lines += [
+                f"{indent}    out += {tag!r}",
+                f"{indent}    _encode_varint(len(entry), out)",
+                f"{indent}    out += entry",
+            ]
+            return lines
+
+        if field.packed:
+            lines = [
+                f"{indent}packed = bytearray()",
+                f"{indent}for item in value:",
+            ]
+            lines += self.write_value(field, indent + "    ", "item", "packed")
+            lines += [
+                f"{indent}out += {tag_bytes(field.number, LEN)!r}",
+                f"{indent}_encode_varint(len(packed), out)",
+                f"{indent}out += packed",
+            ]
+            return lines
+
+        tag = tag_bytes(field.number, wire_type(field.kind))
+        if field.repeated:
+            lines = [
+                f"{indent}for item in value:",
+                f"{indent}    out += {tag!r}",
+            ]
+            return lines + self.write_value(field, indent + "    ", "item", "out")
+        return [f"{indent}out += {tag!r}"] + self.write_value(
+            field, indent, "value", "out"
+        )
+
+
+def generate_codecs(proto_files: Iterable[ProtoFile]) -> str:
+    """Returns the source of a Python module that encodes and decodes every message.
+
+    The module has encode_<name>(message) and decode_<name>(data) functions, named
+    after each message's full name with dots replaced by underscores, along with
+    DECODERS and ENCODERS dicts keyed by full name.
+    """
+    return CodecGenerator(proto_files).generate()
+
+
+def compile_codecs(proto_files: Iterable[ProtoFile]) -> types.ModuleType:
+    """Generates codecs for proto_files, and loads them as a module."""
+    module = types.ModuleType("generated_codecs")
+    exec(
+        compile(generate_codecs(proto_files), "<generated_codecs>", "exec"),
+        module.__dict__,
+    )
+    return module
@@ -0,0 +1,287 @@
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from src.proto_bool import ProtoBool
+from src.proto_constant import ProtoAggregateField
+from src.proto_enum import ProtoEnum, ProtoEnumValue, ProtoEnumValueOption
+from src.proto_extend import ProtoExtend
+from src.proto_identifier import (
+    ProtoEnumOrMessageIdentifier,
+    ProtoFullIdentifier,
+    ProtoIdentifier,
+)
+from src.proto_import import ProtoImport
+from src.proto_int import ProtoInt
+from src.proto_map import ProtoMap
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField, ProtoMessageFieldOption
+from src.proto_node import ProtoNode, parent_link
+from src.proto_oneof import ProtoOneOf
+from src.proto_option import ProtoOption
+from src.proto_package import ProtoPackage
+from src.proto_range import ProtoRange
+from src.proto_service import ProtoService, ProtoServiceRPC
+from src.proto_string_literal import ProtoStringLiteral
+from src.util.binary_ast import KIND_TAGS, NODE_KINDS, Reader, Writer, instance_dict
+
+# The range of the values column. Values outside it, like uint64 option values,
+# are clamped to it, though their payloads keep them exactly.
+VALUE_MIN = -(1 << 63)
+VALUE_MAX = (1 << 63) - 1
+
+# The columns with one entry per row.
+COLUMNS = [
+    "kinds",
+    "parents",
+    "first_children",
+    "next_siblings",
+    "names",
+    "values",
+    "payload_offsets",
+]
+
+
+def named(node: Any) -> tuple[Optional[str], int]:
+    return node.name.identifier, 0
+
+
+def numbered(node: Any) -> tuple[Optional[str], int]:
+    return node.name.identifier, int(node.number)
+
+
+# What goes in the name and value columns for each node type. Other nodes have
+# neither, though everything about them is kept in their payloads.
+COLUMN_VALUES: dict[type[ProtoNode], Callable[[Any], tuple[Optional[str], int]]] = {
+    ProtoIdentifier: lambda node: (node.identifier, 0),
+    ProtoFullIdentifier: lambda node: (node.identifier, 0),
+    ProtoEnumOrMessageIdentifier: lambda node: (node.identifier, 0),
+    ProtoStringLiteral: lambda node: (node.value, 0),
+    ProtoInt: lambda node: (None, int(node)),
+    ProtoBool: lambda node: (None, int(node.value)),
+    ProtoPackage: lambda node: (node.package, 0),
+    ProtoImport: lambda node: (node.path.value, 0),
+    ProtoOption: named,
+    ProtoEnumValueOption: named,
+    ProtoMessageFieldOption: named,
+    ProtoMessage: named,
+    ProtoEnum: named,
+    ProtoOneOf: named,
+    ProtoService: named,
+    ProtoServiceRPC: named,
+    ProtoExtend: named,
+    ProtoAggregateField: named,
+    ProtoMessageField: numbered,
+    ProtoMap: numbered,
+    ProtoEnumValue: lambda node: (node.identifier.identifier, int(node.value)),
+    ProtoRange: lambda node: (None, int(node.min)),
+}
+
+
+def load_numpy() -> Any:
+    # numpy is optional, and only needed for vectorized scans.
+    try:
+        import numpy  # type: ignore[import-not-found]
+    except ImportError as e:
+        raise ImportError("Viewing columns as arrays requires numpy") from e
+    return numpy
+
+
+class ColumnarAst:
+    """Any number of trees, stored as one row per node in parallel typed arrays.
+
+    This takes a fraction of the memory of the trees themselves, for analyzing
+    whole corpora. Rows are in pre-order, so each tree's and each subtree's rows
+    are contiguous, and parents come before their children. The columns are:
+
+        kinds: the node's type, as its tag in binary_ast.NODE_KINDS.
+        parents, first_children, next_siblings: rows of related nodes, or -1.
+        names: the index in strings of the node's name, identifier or string
+            value, or -1.
+        values: the node's number or int value, e.g. a field's number.
+        payload_offsets: where the node's other fields are encoded in payload.
+
+    Trees are converted back with tree(), exactly as they were appended.
+
+        store = ColumnarAst()
+        for proto_file in proto_files:
+            store.append(proto_file)
+        big_numbers = store.rows(ProtoMessageField, minimum=10000)
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self.names = array("i")
+        self.values = array("q")
+        self.payload_offsets = array("q")
+        # The row of each tree's root.
+        self.roots = array("i")
+        self.strings: list[str] = []
+        self.writer = Writer()
+
+    @classmethod
+    def from_trees(cls, trees: Iterable[ProtoNode]) -> "ColumnarAst":
+        store = cls()
+        for tree in trees:
+            store.append(tree)
+        return store
+
+    @property
+    def payload(self) -> bytearray:
+        return self.writer.output
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, tree: ProtoNode) -> int:
+        """Adds a tree (usually a ProtoFile), returning the row of its root.
+
+        If the tree can't be added, the store is left as it was. Raises BufferError
+        while arrays from numpy_columns() are still in use.
+        """
+        self.check_resizable()
+        root = len(self.kinds)
+        payload_start = len(self.writer.output)
+        try:
+            self.append_rows(tree)
+        except BaseException:
+            for name in COLUMNS:
+                del getattr(self, name)[root:]
+            del self.writer.output[payload_start:]
+            raise
+        self.roots.append(root)
+        self.strings.extend(islice(self.writer.strings, len(self.strings), None))
+        return root
+
+    def check_resizable(self) -> None:
+        # Arrays can't be resized while their memory is shared, e.g. with numpy,
+        # and there's no way to ask whether it is but to try.
+        for column in [*(getattr(self, name) for name in COLUMNS), self.roots]:
+            try:
+                column.append(0)
+            except BufferError:
+                raise BufferError(
+                    "Can't append to a ColumnarAst while arrays from numpy_columns() "
+                    "are in use"
+                ) from None
+            column.pop()
+
+    def append_rows(self, tree: ProtoNode) -> None:
+        # The last child added to each row with children, to link its next one.
+        last_children: dict[int, int] = {}
+        stack: list[tuple[ProtoNode, int]] = [(tree, -1)]
+        while stack:
+            node, parent = stack.pop()
+            tag = KIND_TAGS.get(node.__class__)
+            if tag is None:
+                raise ValueError(f"Can't store node of type {node.__class__.__name__}")
+            row = len(self.kinds)
+            name, value = None, 0
+            column_values = COLUMN_VALUES.get(node.__class__)
+            if column_values is not None:
+                name, value = column_values(node)
+
+            self.kinds.append(tag)
+            self.parents.append(parent)
+            self.first_children.append(-1)
+            self.next_siblings.append(-1)
+            self.names.append(-1 if name is None else self.writer.string_index(name))
+            self.values.append(min(max(value, VALUE_MIN), VALUE_MAX))
+            self.payload_offsets.append(len(self.writer.output))
+            NODE_KINDS[tag].encode(self.writer, node)
+
+            if parent >= 0:
+                previous = last_children.get(parent)
+                if previous is None:
+                    self.first_children[parent] = row
+                else:
+                    self.next_siblings[previous] = row
+                last_children[parent] = row
+            stack.extend((child, row) for child in reversed(node.children()))
+
+    def children(self, row: int) -> list[int]:
+        rows = []
+        child = self.first_children[row]
+        while child >= 0:
+            rows.append(child)
+            child = self.next_siblings[child]
+        return rows
+
+    def name(self, row: int) -> Optional[str]:
+        index = self.names[row]
+        return None if index < 0 else self.strings[index]
+
+    def node_type(self, row: int) -> type[ProtoNode]:
+        return NODE_KINDS[self.kinds[row]].node_type
+
+    def tree_index(self, row: int) -> int:
+        """Returns which appended tree row belongs to."""
+        return bisect_right(self.roots, row) - 1
+
+    def rows(
+        self,
+        node_type: type[ProtoNode],
+        minimum: Optional[int] = None,
+        maximum: Optional[int] = None,
+    ) -> list[int]:
+        """Returns the rows of node_type, optionally only those within a value range.
+
+        This scans the arrays without building any nodes. For faster scans, use
+        numpy_columns().
+        """
+        tag = KIND_TAGS[node_type]
+        low = minimum if minimum is not None else VALUE_MIN
+        high = maximum if maximum is not None else VALUE_MAX
+        values = self.values
+        return [
+            row
+            for row, kind in enumerate(self.kinds)
+            if kind == tag and low <= values[row] <= high
+        ]
+
+    def numpy_columns(self) -> dict[str, Any]:
+        """Returns numpy arrays of the columns, sharing memory with them.
+
+        Nothing is copied, so the store can't grow while the arrays are in use:
+        append raises BufferError until they've all been deleted.
+        """
+        np = load_numpy()
+        dtypes = [np.uint8, np.intc, np.intc, np.intc, np.intc, np.int64, np.int64]
+        return {
+            name: np.frombuffer(getattr(self, name), dtype=dtype)
+            for name, dtype in zip(COLUMNS, dtypes)
+        }
+
+    def tree(self, index: int) -> ProtoNode:
+        """Builds the index-th appended tree."""
+        return self.node(self.roots[index])
+
+    def trees(self) -> Iterator[ProtoNode]:
+        for index in range(len(self.roots)):
+            yield self.tree(index)
+
+    def node(self, row: int) -> ProtoNode:
+        """Builds the subtree rooted at row, with no parent."""
+        # The subtree ends at its last descendant.
+        end = row
+        while self.first_children[end] >= 0:
+            end = self.children(end)[-1]
+
+        reader = Reader(self.writer.output, 0, self.strings)
+        decoders = [kind.decode for kind in NODE_KINDS]
+        built: dict[int, ProtoNode] = {}
+        # Children come after their parents, so build backwards.
+        for current in range(end, row - 1, -1):
+            children = [built.pop(child) for child in self.children(current)]
+            reader.position = self.payload_offsets[current]
+            node = decoders[self.kinds[current]](reader, children)
+            if children:
+                link = parent_link(node)
+                for child in children:
+                    instance_dict(child)["_parent"] = link
+            built[current] = node
+        return built[row]
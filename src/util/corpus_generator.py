@@ -0,0 +1,320 @@
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from src.proto_bool import ProtoBool
+from src.proto_comment import ProtoMultiLineComment, ProtoSingleLineComment
+from src.proto_constant import ProtoConstant
+from src.proto_enum import ProtoEnum, ProtoEnumValue, ProtoEnumValueOption
+from src.proto_file import ProtoFile
+from src.proto_identifier import ProtoEnumOrMessageIdentifier, ProtoIdentifier
+from src.proto_int import ProtoInt, ProtoIntSign
+from src.proto_map import ProtoMap, ProtoMapKeyTypesEnum, ProtoMapValueTypesEnum
+from src.proto_message import ProtoMessage, ProtoMessageAdded, ProtoMessageRemoved
+from src.proto_message_field import (
+    ProtoMessageField,
+    ProtoMessageFieldAdded,
+    ProtoMessageFieldNameChanged,
+    ProtoMessageFieldOption,
+    ProtoMessageFieldRemoved,
+    ProtoMessageFieldTypesEnum,
+)
+from src.proto_node import ProtoNode, ProtoNodeDiff
+from src.proto_option import ProtoOption, ProtoOptionValueChanged
+from src.proto_package import ProtoPackage
+from src.proto_service import ProtoService, ProtoServiceRPC
+from src.proto_string_literal import ProtoStringLiteral
+from src.proto_syntax import ProtoSyntax
+
+SCALAR_TYPES = [
+    t
+    for t in ProtoMessageFieldTypesEnum
+    if t != ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE
+]
+WORDS = [
+    "account",
+    "amount",
+    "batch",
+    "cursor",
+    "device",
+    "event",
+    "label",
+    "owner",
+    "region",
+    "status",
+    "target",
+    "token",
+    "usage",
+    "window",
+]
+MUTATIONS = [
+    "add_message",
+    "remove_message",
+    "add_field",
+    "remove_field",
+    "rename_field",
+    "change_option",
+]
+
+
+@dataclass
+class CorpusShape:
+    """How big, and what shape, generated files are."""
+
+    messages: int = 50
+    fields_per_message: int = 8
+    # How many levels of messages are nested inside each top-level message.
+    nesting_depth: int = 1
+    nested_messages: int = 1
+    enums: int = 5
+    enum_values: int = 6
+    services: int = 2
+    rpcs_per_service: int = 4
+    options_per_message: int = 2
+    # The chance that each field has options.
+    field_option_rate: float = 0.25
+    map_rate: float = 0.1
+    # Lines in the comment before each message and field, if any.
+    comment_lines: int = 1
+    comment_rate: float = 0.3
+
+
+def integer(value: int) -> ProtoInt:
+    return ProtoInt(
+        abs(value), ProtoIntSign.NEGATIVE if value < 0 else ProtoIntSign.POSITIVE
+    )
+
+
+class CorpusGenerator:
+    """Generates valid proto3 files out of this library's nodes.
+
+    The same seed and shape always generate the same file.
+    """
+
+    def __init__(self, seed: int = 0, shape: Optional[CorpusShape] = None):
+        self.seed = seed
+        self.shape = shape if shape is not None else CorpusShape()
+
+    def generate(self, lines: Optional[int] = None) -> ProtoFile:
+        """Generates a file, with about the given number of lines if it's set.
+
+        Otherwise, the file has shape.messages top-level messages.
+        """
+        self.random = random.Random(self.seed)
+        self.enum_names = [f"Enum{index}" for index in range(self.shape.enums)]
+        nodes: list[ProtoNode] = [
+            ProtoPackage("corpus"),
+            ProtoOption(
+                ProtoIdentifier("java_package"),
+                ProtoConstant(ProtoStringLiteral("com.example.corpus")),
+            ),
+        ]
+        nodes += [self.enum(name) for name in self.enum_names]
+        for index in range(self.shape.services):
+            nodes.append(self.service(index))
+
+        index = 0
+        line_count = sum(node.serialize().count("\n") + 1 for node in nodes)
+        while line_count < lines if lines is not None else index < self.shape.messages:
+            for node in self.comments() + [self.message(f"Message{index}", 1)]:
+                nodes.append(node)
+                if lines is not None:
+                    line_count += node.serialize().count("\n") + 1
+            index += 1
+        return ProtoFile(
+            syntax=ProtoSyntax(ProtoStringLiteral("proto3")),
+            nodes=nodes,
+        )
+
+    def generate_pair(
+        self, mutations: int, lines: Optional[int] = None
+    ) -> tuple[ProtoFile, ProtoFile, list[ProtoNodeDiff]]:
+        """Generates a file, and a copy with some mutations applied.
+
+        Returns both, along with the diffs ProtoFile.diff finds between them. Each
+        mutation touches a different message, so the diffs don't overlap.
+        """
+        before = self.generate(lines)
+        after = self.generate(lines)
+        mutation_random = random.Random(f"{self.seed}-mutations")
+        diffs: list[ProtoNodeDiff] = []
+        after_messages = {m.name.identifier: m for m in after.messages}
+        before_messages = {m.name.identifier: m for m in before.messages}
+        candidates = sorted(after_messages)
+        mutation_random.shuffle(candidates)
+        removed: list[ProtoNode] = []
+        for index in range(mutations):
+            kind = MUTATIONS[index % len(MUTATIONS)]
+            if kind == "add_message":
+                message = self.message(f"AddedMessage{index}", 1)
+                after.nodes.append(message)
+                diffs.append(ProtoMessageAdded(before, message))
+                continue
+            if not candidates:
+                break
+            name = candidates.pop()
+            message, before_message = after_messages[name], before_messages[name]
+            fields = message.nodes_of_type(ProtoMessageField)
+            before_fields = before_message.nodes_of_type(ProtoMessageField)
+            if kind == "remove_message":
+                removed.append(message)
+                diffs.append(ProtoMessageRemoved(before, before_message))
+            elif kind == "add_field":
+                number = max(int(f.number) for f in fields) + 1 if fields else 1
+                field = ProtoMessageField(
+                    ProtoMessageFieldTypesEnum.STRING,
+                    ProtoIdentifier(f"added_{index}"),
+                    integer(number),
+                )
+                message.nodes.append(field)
+                diffs.append(ProtoMessageFieldAdded(before_message, field))
+            elif kind == "remove_field" and fields:
+                position = mutation_random.randrange(len(fields))
+                message.set_nodes(
+                    [n for n in message.nodes if n is not fields[position]]
+                )
+                diffs.append(
+                    ProtoMessageFieldRemoved(before_message, before_fields[position])
+                )
+            elif kind == "rename_field" and fields:
+                position = mutation_random.randrange(len(fields))
+                new_name = ProtoIdentifier(f"renamed_{index}")
+                fields[position].name = new_name
+                new_name.parent = fields[position]
+                fields[position].mark_changed()
+                diffs.append(
+                    ProtoMessageFieldNameChanged(
+                        before_message, before_fields[position], new_name
+                    )
+                )
+            elif kind == "change_option" and message.options:
+                option = message.options[0]
+                before_value = before_message.options[0].value
+                option.value = ProtoConstant(ProtoStringLiteral(f"changed {index}"))
+                option.value.parent = option
+                option.mark_changed()
+                diffs.append(
+                    ProtoOptionValueChanged(
+                        before_message, option.name, before_value, option.value
+                    )
+                )
+        if removed:
+            after.set_nodes([n for n in after.nodes if n not in removed])
+        return before, after, diffs
+
+    def name(self) -> str:
+        return "_".join(self.random.sample(WORDS, 2))
+
+    def comments(self) -> list[ProtoNode]:
+        if self.random.random() >= self.shape.comment_rate:
+            return []
+        words = [self.random.choice(WORDS) for _ in range(10)]
+        if self.shape.comment_lines > 1:
+            body = "\n".join(
+                f" * {' '.join(words)}" for _ in range(self.shape.comment_lines)
+            )
+            return [ProtoMultiLineComment(f"\n{body}\n ")]
+        return [
+            ProtoSingleLineComment(f" {' '.join(words)}")
+            for _ in range(self.shape.comment_lines)
+        ]
+
+    def enum(self, name: str) -> ProtoEnum:
+        prefix = name.upper()
+        nodes: list[ProtoNode] = [
+            ProtoEnumValue(ProtoIdentifier(f"{prefix}_UNSPECIFIED"), integer(0))
+        ]
+        for value in range(1, self.shape.enum_values):
+            options = None
+            if self.random.random() < self.shape.field_option_rate:
+                options = [
+                    ProtoEnumValueOption(
+                        ProtoIdentifier("deprecated"), ProtoConstant(ProtoBool(True))
+                    )
+                ]
+            nodes.append(
+                ProtoEnumValue(
+                    ProtoIdentifier(f"{prefix}_VALUE_{value}"), integer(value), options
+                )
+            )
+        return ProtoEnum(ProtoIdentifier(name), nodes=nodes)
+
+    def field_options(self) -> Optional[list[ProtoMessageFieldOption]]:
+        if self.random.random() >= self.shape.field_option_rate:
+            return None
+        return [
+            ProtoMessageFieldOption(
+                ProtoIdentifier("deprecated"), ProtoConstant(ProtoBool(True))
+            ),
+            ProtoMessageFieldOption(
+                ProtoIdentifier("(corpus.annotation)"),
+                ProtoConstant(ProtoStringLiteral(self.name())),
+            ),
+        ]
+
+    def field(self, number: int, message_names: list[str]) -> ProtoNode:
+        name = ProtoIdentifier(f"{self.name()}_{number}")
+        if self.random.random() < self.shape.map_rate:
+            return ProtoMap(
+                ProtoMapKeyTypesEnum.STRING,
+                ProtoMapValueTypesEnum.INT64,
+                name,
+                integer(number),
+                options=self.field_options(),
+            )
+        type_name = None
+        choice = self.random.random()
+        if choice < 0.15 and self.enum_names:
+            type_name = self.random.choice(self.enum_names)
+        elif choice < 0.25 and message_names:
+            type_name = self.random.choice(message_names)
+        repeated = self.random.random() < 0.2
+        return ProtoMessageField(
+            (
+                ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE
+                if type_name is not None
+                else self.random.choice(SCALAR_TYPES)
+            ),
+            name,
+            integer(number),
+            repeated=repeated,
+            optional=not repeated and self.random.random() < 0.1,
+            enum_or_message_type_name=(
+                ProtoEnumOrMessageIdentifier(type_name)
+                if type_name is not None
+                else None
+            ),
+            options=self.field_options(),
+        )
+
+    def message(self, name: str, depth: int) -> ProtoMessage:
+        nodes: list[ProtoNode] = [
+            ProtoOption(
+                ProtoIdentifier(f"(corpus.message_option_{index})"),
+                ProtoConstant(ProtoStringLiteral(self.name())),
+            )
+            for index in range(self.shape.options_per_message)
+        ]
+        nested_names = []
+        if depth <= self.shape.nesting_depth:
+            for index in range(self.shape.nested_messages):
+                nested_names.append(f"Nested{depth}x{index}")
+                nodes.append(self.message(nested_names[-1], depth + 1))
+        for number in range(1, self.shape.fields_per_message + 1):
+            nodes += self.comments()
+            nodes.append(self.field(number, nested_names))
+        return ProtoMessage(ProtoIdentifier(name), nodes=nodes)
+
+    def service(self, index: int) -> ProtoService:
+        nodes: list[ProtoNode] = []
+        for rpc in range(self.shape.rpcs_per_service):
+            nodes.append(
+                ProtoServiceRPC(
+                    ProtoIdentifier(f"Call{rpc}"),
+                    ProtoEnumOrMessageIdentifier(f"Message{rpc}"),
+                    ProtoEnumOrMessageIdentifier(f"Message{rpc + 1}"),
+                    request_stream=self.random.random() < 0.2,
+                    response_stream=self.random.random() < 0.2,
+                )
+            )
+        return ProtoService(ProtoIdentifier(f"Service{index}"), nodes=nodes)
@@ -0,0 +1,631 @@
+import re
+from typing import Iterable, Mapping, Optional, Sequence
+
+from src.proto_bool import ProtoBool
+from src.proto_constant import ProtoAggregate
+from src.proto_enum import ProtoEnum, ProtoEnumValue
+from src.proto_extend import ProtoExtend
+from src.proto_extensions import ProtoExtensions
+from src.proto_file import ProtoFile
+from src.proto_float import ProtoFloat, ProtoFloatSign
+from src.proto_identifier import ProtoIdentifier
+from src.proto_int import ProtoInt
+from src.proto_map import ProtoMap
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField, ProtoMessageFieldTypesEnum
+from src.proto_node import ProtoNode
+from src.proto_oneof import ProtoOneOf
+from src.proto_option import ProtoOption
+from src.proto_range import ProtoRange, ProtoRangeEnum
+from src.proto_reserved import ProtoReserved
+from src.proto_service import ProtoService, ProtoServiceRPC
+from src.proto_string_literal import ProtoStringLiteral
+from src.util.wire_format import (
+    encode_bytes_field,
+    encode_double_field,
+    encode_string_field,
+    encode_varint_field,
+)
+
+# Enum values and field numbers below come from google/protobuf/descriptor.proto.
+FIELD_TYPES = {
+    "double": 1,
+    "float": 2,
+    "int64": 3,
+    "uint64": 4,
+    "int32": 5,
+    "fixed64": 6,
+    "fixed32": 7,
+    "bool": 8,
+    "string": 9,
+    "bytes": 12,
+    "uint32": 13,
+    "sfixed32": 15,
+    "sfixed64": 16,
+    "sint32": 17,
+    "sint64": 18,
+}
+TYPE_MESSAGE = 11
+TYPE_ENUM = 14
+# Package names are symbols too, since they can shadow outer scopes.
+PACKAGE = 0
+
+LABEL_OPTIONAL = 1
+LABEL_REPEATED = 3
+
+# Exclusive upper bounds for "max" in message and enum ranges.
+MESSAGE_RANGE_MAX = 536870912
+ENUM_RANGE_MAX = 2147483647
+
+UNINTERPRETED_OPTION = 999
+
+# The options each kind of declaration understands, by name. Each maps to its
+# field number in the options message and, for enum-typed options, the values
+# of that enum. Anything else (including every custom option) is written as an
+# uninterpreted option, just like protoc does before it resolves extensions.
+OptionFields = dict[str, tuple[int, Optional[dict[str, int]]]]
+FILE_OPTIONS: OptionFields = {
+    "java_package": (1, None),
+    "java_outer_classname": (8, None),
+    "optimize_for": (9, {"SPEED": 1, "CODE_SIZE": 2, "LITE_RUNTIME": 3}),
+    "java_multiple_files": (10, None),
+    "go_package": (11, None),
+    "cc_generic_services": (16, None),
+    "java_generic_services": (17, None),
+    "py_generic_services": (18, None),
+    "java_generate_equals_and_hash": (20, None),
+    "deprecated": (23, None),
+    "java_string_check_utf8": (27, None),
+    "cc_enable_arenas": (31, None),
+    "objc_class_prefix": (36, None),
+    "csharp_namespace": (37, None),
+    "swift_prefix": (39, None),
+    "php_class_prefix": (40, None),
+    "php_namespace": (41, None),
+    "php_metadata_namespace": (44, None),
+    "ruby_package": (45, None),
+}
+MESSAGE_OPTIONS: OptionFields = {
+    "message_set_wire_format": (1, None),
+    "no_standard_descriptor_accessor": (2, None),
+    "deprecated": (3, None),
+    "map_entry": (7, None),
+}
+FIELD_OPTIONS: OptionFields = {
+    "ctype": (1, {"STRING": 0, "CORD": 1, "STRING_PIECE": 2}),
+    "packed": (2, None),
+    "deprecated": (3, None),
+    "lazy": (5, None),
+    "jstype": (6, {"JS_NORMAL": 0, "JS_STRING": 1, "JS_NUMBER": 2}),
+    "weak": (10, None),
+    "unverified_lazy": (15, None),
+}
+ONEOF_OPTIONS: OptionFields = {}
+ENUM_OPTIONS: OptionFields = {
+    "allow_alias": (2, None),
+    "deprecated": (3, None),
+}
+ENUM_VALUE_OPTIONS: OptionFields = {
+    "deprecated": (1, None),
+}
+SERVICE_OPTIONS: OptionFields = {
+    "deprecated": (33, None),
+}
+METHOD_OPTIONS: OptionFields = {
+    "deprecated": (33, None),
+    "idempotency_level": (
+        34,
+        {"IDEMPOTENCY_UNKNOWN": 0, "NO_SIDE_EFFECTS": 1, "IDEMPOTENT": 2},
+    ),
+}
+
+OPTION_NAME_PARTS = re.compile(r"\(([^)]*)\)|([^.()]+)")
+
+
+def package_scope(proto_file: ProtoFile) -> str:
+    package = proto_file.package
+    return f".{package.package}" if package is not None else ""
+
+
+def declarations(container: ProtoNode) -> Sequence[ProtoNode]:
+    # Only messages hold nested declarations; files hold them in nodes as well.
+    if isinstance(container, (ProtoFile, ProtoMessage)):
+        return container.nodes
+    return ()
+
+
+class SymbolTable:
+    """The fully-qualified names of every package, message and enum in a workspace.
+
+    Names are written the way descriptors write them, with a leading ".".
+    """
+
+    def __init__(self, proto_files: Iterable[ProtoFile] = ()):
+        self.symbols: dict[str, int] = {}
+        for proto_file in proto_files:
+            self.add_file(proto_file)
+
+    def add_file(self, proto_file: ProtoFile) -> None:
+        scope = package_scope(proto_file)
+        package_name = ""
+        for part in scope[1:].split(".") if scope else []:
+            package_name = f"{package_name}.{part}"
+            self.symbols.setdefault(package_name, PACKAGE)
+
+        stack: list[tuple[str, ProtoNode]] = [(scope, proto_file)]
+        while stack:
+            scope, container = stack.pop()
+            for node in declarations(container):
+                if isinstance(node, ProtoMessage):
+                    name = f"{scope}.{node.name.identifier}"
+                    self.symbols[name] = TYPE_MESSAGE
+                    stack.append((name, node))
+                elif isinstance(node, ProtoEnum):
+                    self.symbols[f"{scope}.{node.name.identifier}"] = TYPE_ENUM
+                elif isinstance(node, ProtoMap):
+                    self.symbols[f"{scope}.{map_entry_name(node)}"] = TYPE_MESSAGE
+
+    def resolve(self, name: str, scope: str) -> tuple[str, Optional[int]]:
+        """Resolves a type name used inside scope, following protoc's scoping rules.
+
+        Returns the fully-qualified name along with TYPE_MESSAGE or TYPE_ENUM. Names
+        that can't be resolved (e.g. ones from files outside the workspace) are
+        returned as written, without a type.
+        """
+        if name.startswith("."):
+            kind = self.symbols.get(name)
+            return name, kind if kind != PACKAGE else None
+
+        first_part = name.split(".", 1)[0]
+        while True:
+            if f"{scope}.{first_part}" in self.symbols:
+                kind = self.symbols.get(f"{scope}.{name}")
+                if kind is not None and kind != PACKAGE:
+                    return f"{scope}.{name}", kind
+            if not scope:
+                return name, None
+            scope = scope.rpartition(".")[0]
+
+
+def json_name(name: str) -> str:
+    parts = name.split("_")
+    return parts[0] + "".join(p[:1].upper() + p[1:] for p in parts[1:])
+
+
+def map_entry_name(proto_map: ProtoMap) -> str:
+    name = json_name(proto_map.name.identifier)
+    return f"{name[:1].upper()}{name[1:]}Entry"
+
+
+def string_value(literal: ProtoStringLiteral) -> bytes:
+    return literal.bytes_value()
+
+
+def constant_text(value: ProtoNode) -> str:
+    """Formats a constant the way descriptors store default values."""
+    if isinstance(value, ProtoBool):
+        return "true" if value.value else "false"
+    if isinstance(value, ProtoInt):
+        return str(int(value))
+    if isinstance(value, ProtoFloat):
+        sign = "-" if value.sign == ProtoFloatSign.NEGATIVE else ""
+        return f"{sign}{value.value:g}"
+    if isinstance(value, ProtoStringLiteral):
+        return string_value(value).decode("utf-8", errors="backslashreplace")
+    assert isinstance(value, ProtoIdentifier)
+    return value.identifier
+
+
+def option_name(option: ProtoOption) -> str:
+    return option.name.identifier
+
+
+def field_json_name(field: ProtoMessageField) -> str:
+    """Returns the field's json_name option, or its name in lowerCamelCase."""
+    for option in field.options:
+        if option_name(option) == "json_name" and isinstance(
+            option.value.value, ProtoStringLiteral
+        ):
+            return string_value(option.value.value).decode("utf-8")
+    return json_name(field.name.identifier)
+
+
+def encode_options(options: Sequence[ProtoOption], fields: OptionFields) -> bytes:
+    output = bytearray()
+    for option in options:
+        value = option.value.value
+        known = fields.get(option_name(option))
+        if known is not None:
+            field_number, enum_values = known
+            if enum_values is not None:
+                if (
+                    isinstance(value, ProtoIdentifier)
+                    and value.identifier in enum_values
+                ):
+                    encode_varint_field(
+                        field_number, enum_values[value.identifier], output
+                    )
+                    continue
+            elif isinstance(value, ProtoBool):
+                encode_varint_field(field_number, value.value, output)
+                continue
+            elif isinstance(value, ProtoStringLiteral):
+                encode_bytes_field(field_number, string_value(value), output)
+                continue
+        encode_bytes_field(UNINTERPRETED_OPTION, uninterpreted_option(option), output)
+    return bytes(output)
+
+
+def uninterpreted_option(option: ProtoOption) -> bytes:
+    output = bytearray()
+    for match in OPTION_NAME_PARTS.finditer(option_name(option)):
+        name_part = bytearray()
+        is_extension = match.group(1) is not None
+        encode_string_field(1, match.group(1) or match.group(2), name_part)
+        encode_varint_field(2, is_extension, name_part)
+        encode_bytes_field(2, name_part, output)
+
+    value = option.value.value
+    if isinstance(value, ProtoBool):
+        encode_string_field(3, "true" if value.value else "false", output)
+    elif isinstance(value, ProtoIdentifier):
+        encode_string_field(3, value.identifier, output)
+    elif isinstance(value, ProtoInt):
+        encode_varint_field(4 if int(value) >= 0 else 5, int(value), output)
+    elif isinstance(value, ProtoFloat):
+        if value.sign == ProtoFloatSign.NEGATIVE:
+            encode_double_field(6, -value.value, output)
+        else:
+            encode_double_field(6, value.value, output)
+    elif isinstance(value, ProtoStringLiteral):
+        encode_bytes_field(7, string_value(value), output)
+    elif isinstance(value, ProtoAggregate):
+        encode_string_field(8, value.text(), output)
+    return bytes(output)
+
+
+def encode_range(start: int, end: int) -> bytes:
+    output = bytearray()
+    encode_varint_field(1, start, output)
+    encode_varint_field(2, end, output)
+    return bytes(output)
+
+
+def range_bounds(proto_range: ProtoRange, max_value: int) -> tuple[int, int]:
+    """Returns a range's bounds, with an inclusive end."""
+    start = int(proto_range.min)
+    if proto_range.max is None:
+        return start, start
+    if proto_range.max is ProtoRangeEnum.MAX:
+        return start, max_value
+    assert isinstance(proto_range.max, ProtoInt)
+    return start, int(proto_range.max)
+
+
+class FileDescriptorEncoder:
+    """Encodes one parsed file as a google.protobuf.FileDescriptorProto."""
+
+    def __init__(self, proto_file: ProtoFile, symbols: SymbolTable):
+        self.proto_file = proto_file
+        self.symbols = symbols
+        self.syntax = proto_file.syntax.syntax.value
+
+    def encode(self, name: str) -> bytes:
+        proto_file = self.proto_file
+        scope = package_scope(proto_file)
+        output = bytearray()
+        encode_string_field(1, name, output)
+        if scope:
+            encode_string_field(2, scope[1:], output)
+
+        for proto_import in proto_file.imports:
+            encode_bytes_field(3, string_value(proto_import.path), output)
+        for index, proto_import in enumerate(proto_file.imports):
+            if proto_import.public:
+                encode_varint_field(10, index, output)
+        for index, proto_import in enumerate(proto_file.imports):
+            if proto_import.weak:
+                encode_varint_field(11, index, output)
+
+        for node in proto_file.nodes:
+            if isinstance(node, ProtoMessage):
+                encode_bytes_field(4, self.message(node, scope), output)
+            elif isinstance(node, ProtoEnum):
+                encode_bytes_field(5, self.enum(node), output)
+            elif isinstance(node, ProtoService):
+                encode_bytes_field(6, self.service(node, scope), output)
+            elif isinstance(node, ProtoExtend):
+                for extension in self.extensions(node, scope):
+                    encode_bytes_field(7, extension, output)
+
+        if proto_file.options:
+            encode_bytes_field(
+                8, encode_options(proto_file.options, FILE_OPTIONS), output
+            )
+        # Like protoc, only write the syntax when it isn't the default.
+        if self.syntax != "proto2":
+            encode_string_field(12, self.syntax, output)
+        return bytes(output)
+
+    def message(self, message: ProtoMessage, scope: str) -> bytes:
+        scope = f"{scope}.{message.name.identifier}"
+        output = bytearray()
+        encode_string_field(1, message.name.identifier, output)
+
+        oneofs: list[bytes] = []
+        # proto3 optional fields each get a synthetic oneof, after the real ones.
+        synthetic_oneofs: list[str] = []
+        fields: list[tuple[ProtoMessageField | ProtoMap, Optional[int]]] = []
+        for node in message.nodes:
+            if isinstance(node, (ProtoMessageField, ProtoMap)):
+                fields.append((node, None))
+            elif isinstance(node, ProtoOneOf):
+                for oneof_field in node.nodes_of_type(ProtoMessageField):
+                    fields.append((oneof_field, len(oneofs)))
+                oneofs.append(self.oneof(node))
+
+        for field, oneof_index in fields:
+            if isinstance(field, ProtoMap):
+                encode_bytes_field(2, self.map_field(field, scope), output)
+                continue
+            proto3_optional = field.optional and self.syntax == "proto3"
+            if proto3_optional:
+                oneof_index = len(oneofs) + len(synthetic_oneofs)
+                synthetic_oneofs.append(f"_{field.name.identifier}")
+            encode_bytes_field(
+                2, self.field(field, scope, oneof_index, proto3_optional), output
+            )
+
+        for node in message.nodes:
+            if isinstance(node, ProtoMessage):
+                encode_bytes_field(3, self.message(node, scope), output)
+            elif isinstance(node, ProtoMap):
+                encode_bytes_field(3, self.map_entry(node, scope), output)
+            elif isinstance(node, ProtoEnum):
+                encode_bytes_field(4, self.enum(node), output)
+            elif isinstance(node, ProtoExtensions):
+                for proto_range in node.ranges:
+                    start, end = range_bounds(proto_range, MESSAGE_RANGE_MAX - 1)
+                    encode_bytes_field(5, encode_range(start, end + 1), output)
+            elif isinstance(node, ProtoExtend):
+                for extension in self.extensions(node, scope):
+                    encode_bytes_field(6, extension, output)
+
+        if message.options:
+            encode_bytes_field(
+                7, encode_options(message.options, MESSAGE_OPTIONS), output
+            )
+        for oneof in oneofs:
+            encode_bytes_field(8, oneof, output)
+        for synthetic_oneof in synthetic_oneofs:
+            oneof_output = bytearray()
+            encode_string_field(1, synthetic_oneof, oneof_output)
+            encode_bytes_field(8, oneof_output, output)
+
+        for reserved in message.nodes_of_type(ProtoReserved):
+            for proto_range in reserved.ranges:
+                start, end = range_bounds(proto_range, MESSAGE_RANGE_MAX - 1)
+                encode_bytes_field(9, encode_range(start, end + 1), output)
+        for reserved in message.nodes_of_type(ProtoReserved):
+            for field_name in reserved.fields:
+                encode_string_field(10, field_name.identifier, output)
+        return bytes(output)
+
+    def field(
+        self,
+        field: ProtoMessageField,
+        scope: str,
+        oneof_index: Optional[int] = None,
+        proto3_optional: bool = False,
+        extendee: Optional[str] = None,
+    ) -> bytes:
+        output = bytearray()
+        name = field.name.identifier
+        encode_string_field(1, name, output)
+        if extendee is not None:
+            encode_string_field(2, extendee, output)
+        encode_varint_field(3, int(field.number), output)
+        encode_varint_field(
+            4, LABEL_REPEATED if field.repeated else LABEL_OPTIONAL, output
+        )
+        self.encode_type(field.type, field.enum_or_message_type_name, scope, output)
+
+        options: list[ProtoOption] = []
+        for option in field.options:
+            # default and json_name look like options, but are fields of their own.
+            if option_name(option) == "default":
+                encode_string_field(7, constant_text(option.value.value), output)
+            elif option_name(option) != "json_name" or not isinstance(
+                option.value.value, ProtoStringLiteral
+            ):
+                options.append(option)
+
+        if oneof_index is not None:
+            encode_varint_field(9, oneof_index, output)
+        encode_string_field(10, field_json_name(field), output)
+        if options:
+            encode_bytes_field(8, encode_options(options, FIELD_OPTIONS), output)
+        if proto3_optional:
+            encode_varint_field(17, True, output)
+        return bytes(output)
+
+    def encode_type(
+        self,
+        field_type: ProtoMessageFieldTypesEnum,
+        type_name: Optional[ProtoIdentifier],
+        scope: str,
+        output: bytearray,
+    ) -> None:
+        if field_type != ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE:
+            encode_varint_field(5, FIELD_TYPES[field_type.value], output)
+            return
+        assert type_name is not None
+        full_name, kind = self.symbols.resolve(type_name.identifier, scope)
+        # Descriptors may leave the type out when it hasn't been resolved yet.
+        if kind is not None:
+            encode_varint_field(5, kind, output)
+        encode_string_field(6, full_name, output)
+
+    def map_field(self, proto_map: ProtoMap, scope: str) -> bytes:
+        output = bytearray()
+        name = proto_map.name.identifier
+        encode_string_field(1, name, output)
+        encode_varint_field(3, int(proto_map.number), output)
+        encode_varint_field(4, LABEL_REPEATED, output)
+        encode_varint_field(5, TYPE_MESSAGE, output)
+        encode_string_field(6, f"{scope}.{map_entry_name(proto_map)}", output)
+        encode_string_field(10, json_name(name), output)
+        if proto_map.options:
+            encode_bytes_field(
+                8, encode_options(proto_map.options, FIELD_OPTIONS), output
+            )
+        return bytes(output)
+
+    def map_entry(self, proto_map: ProtoMap, scope: str) -> bytes:
+        output = bytearray()
+        encode_string_field(1, map_entry_name(proto_map), output)
+
+        key = bytearray()
+        encode_string_field(1, "key", key)
+        encode_varint_field(3, 1, key)
+        encode_varint_field(4, LABEL_OPTIONAL, key)
+        encode_varint_field(5, FIELD_TYPES[proto_map.key_type.value], key)
+        encode_string_field(10, "key", key)
+        encode_bytes_field(2, key, output)
+
+        value = bytearray()
+        encode_string_field(1, "value", value)
+        encode_varint_field(3, 2, value)
+        encode_varint_field(4, LABEL_OPTIONAL, value)
+        self.encode_type(
+            proto_map.value_type, proto_map.enum_or_message_type_name, scope, value
+        )
+        encode_string_field(10, "value", value)
+        encode_bytes_field(2, value, output)
+
+        options = bytearray()
+        encode_varint_field(MESSAGE_OPTIONS["map_entry"][0], True, options)
+        encode_bytes_field(7, options, output)
+        return bytes(output)
+
+    def oneof(self, oneof: ProtoOneOf) -> bytes:
+        output = bytearray()
+        encode_string_field(1, oneof.name.identifier, output)
+        if oneof.options:
+            encode_bytes_field(2, encode_options(oneof.options, ONEOF_OPTIONS), output)
+        return bytes(output)
+
+    def extensions(self, extend: ProtoExtend, scope: str) -> list[bytes]:
+        extendee, _ = self.symbols.resolve(extend.name.identifier, scope)
+        return [
+            self.field(field, scope, extendee=extendee)
+            for field in extend.nodes_of_type(ProtoMessageField)
+        ]
+
+    def enum(self, enum: ProtoEnum) -> bytes:
+        output = bytearray()
+        encode_string_field(1, enum.name.identifier, output)
+        for value in enum.values:
+            encode_bytes_field(2, self.enum_value(value), output)
+        if enum.options:
+            encode_bytes_field(3, encode_options(enum.options, ENUM_OPTIONS), output)
+        for reserved in enum.nodes_of_type(ProtoReserved):
+            for proto_range in reserved.ranges:
+                # Unlike message ranges, enum ranges include their end.
+                start, end = range_bounds(proto_range, ENUM_RANGE_MAX)
+                encode_bytes_field(4, encode_range(start, end), output)
+        for reserved in enum.nodes_of_type(ProtoReserved):
+            for field_name in reserved.fields:
+                encode_string_field(5, field_name.identifier, output)
+        return bytes(output)
+
+    def enum_value(self, value: ProtoEnumValue) -> bytes:
+        output = bytearray()
+        encode_string_field(1, value.identifier.identifier, output)
+        encode_varint_field(2, int(value.value), output)
+        if value.options:
+            encode_bytes_field(
+                3, encode_options(value.options, ENUM_VALUE_OPTIONS), output
+            )
+        return bytes(output)
+
+    def service(self, service: ProtoService, scope: str) -> bytes:
+        output = bytearray()
+        encode_string_field(1, service.name.identifier, output)
+        for rpc in service.nodes_of_type(ProtoServiceRPC):
+            encode_bytes_field(2, self.method(rpc, scope), output)
+        if service.options:
+            encode_bytes_field(
+                3, encode_options(service.options, SERVICE_OPTIONS), output
+            )
+        return bytes(output)
+
+    def method(self, rpc: ProtoServiceRPC, scope: str) -> bytes:
+        output = bytearray()
+        encode_string_field(1, rpc.name.identifier, output)
+        encode_string_field(
+            2, self.symbols.resolve(rpc.request_type.identifier, scope)[0], output
+        )
+        encode_string_field(
+            3, self.symbols.resolve(rpc.response_type.identifier, scope)[0], output
+        )
+        if rpc.options:
+            encode_bytes_field(4, encode_options(rpc.options, METHOD_OPTIONS), output)
+        if rpc.request_stream:
+            encode_varint_field(5, True, output)
+        if rpc.response_stream:
+            encode_varint_field(6, True, output)
+        return bytes(output)
+
+
+def file_descriptor_proto(
+    proto_file: ProtoFile,
+    name: str,
+    symbols: Optional[SymbolTable] = None,
+) -> bytes:
+    """Returns proto_file as a serialized google.protobuf.FileDescriptorProto.
+
+    name is the file's path, as other files import it. Type names are resolved
+    against symbols, which should hold every file in the workspace; by default,
+    only names declared in proto_file itself are resolved.
+    """
+    if symbols is None:
+        symbols = SymbolTable([proto_file])
+    return FileDescriptorEncoder(proto_file, symbols).encode(name)
+
+
+def file_descriptor_set(proto_files: Mapping[str, ProtoFile]) -> bytes:
+    """Returns a serialized google.protobuf.FileDescriptorSet of a workspace.
+
+    proto_files maps each file's path to its parsed contents. Like protoc, files
+    are written after the files they import.
+    """
+    symbols = SymbolTable(proto_files.values())
+    output = bytearray()
+    for name in dependency_order(proto_files):
+        encode_bytes_field(
+            1, file_descriptor_proto(proto_files[name], name, symbols), output
+        )
+    return bytes(output)
+
+
+def dependency_order(proto_files: Mapping[str, ProtoFile]) -> list[str]:
+    ordered: list[str] = []
+    visited: set[str] = set()
+    for name in proto_files:
+        # Each entry is a file, and whether its imports have been visited.
+        stack = [(name, False)]
+        while stack:
+            name, imports_visited = stack.pop()
+            if imports_visited:
+                ordered.append(name)
+                continue
+            if name in visited:
+                continue
+            visited.add(name)
+            stack.append((name, True))
+            for proto_import in reversed(proto_files[name].imports):
+                path = string_value(proto_import.path).decode("utf-8")
+                if path in proto_files and path not in visited:
+                    stack.append((path, False))
+    return ordered
@@ -0,0 +1,536 @@
+import base64
+import io
+import json
+import math
+import re
+from typing import Any, Iterable, NamedTuple, Sequence, TextIO
+
+from src.proto_enum import ProtoEnum, ProtoEnumValue
+from src.proto_file import ProtoFile
+from src.proto_map import ProtoMap
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField
+from src.proto_node import ProtoNode
+from src.proto_oneof import ProtoOneOf
+from src.util.codec_generator import (
+    CodecField,
+    CodecGenerator,
+    CodecMessage,
+    codec_name,
+    tag_bytes,
+    wire_type,
+)
+from src.util.descriptor import declarations, field_json_name, json_name, package_scope
+from src.util.lazy_decoder import (
+    STRUCTS,
+    Occurrence,
+    decode_scalar,
+    iter_packed,
+    present_occurrences,
+    scan,
+)
+from src.util.wire_format import LEN, encode_varint
+
+# 64-bit integers are written as strings, since JSON numbers are usually doubles.
+LONG_TYPES = {"int64", "uint64", "sint64", "fixed64", "sfixed64"}
+INT_RANGES = {
+    "int32": (-(1 << 31), (1 << 31) - 1),
+    "sint32": (-(1 << 31), (1 << 31) - 1),
+    "sfixed32": (-(1 << 31), (1 << 31) - 1),
+    "uint32": (0, (1 << 32) - 1),
+    "fixed32": (0, (1 << 32) - 1),
+    "int64": (-(1 << 63), (1 << 63) - 1),
+    "sint64": (-(1 << 63), (1 << 63) - 1),
+    "sfixed64": (-(1 << 63), (1 << 63) - 1),
+    "uint64": (0, (1 << 64) - 1),
+    "fixed64": (0, (1 << 64) - 1),
+    "enum": (-(1 << 31), (1 << 31) - 1),
+}
+SPECIAL_FLOATS = {"NaN": math.nan, "Infinity": math.inf, "-Infinity": -math.inf}
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?")
+
+
+class JsonEnum(NamedTuple):
+    names: dict[int, str]
+    numbers: dict[str, int]
+
+
+class JsonField(NamedTuple):
+    field: CodecField
+    # The start of the field's JSON member, up to its value.
+    key: str
+    tag: bytes
+
+
+class JsonMessage:
+    """A message's fields, in the order they're written to JSON, and by name."""
+
+    def __init__(self, message: CodecMessage, json_names: dict[str, str]):
+        self.full_name = message.full_name
+        self.codec_fields = {field.name: field for field in message.fields}
+        self.fields = [
+            JsonField(
+                field,
+                json.dumps(json_names[field.name]) + ":",
+                tag_bytes(
+                    field.number, LEN if field.repeated else wire_type(field.kind)
+                ),
+            )
+            for field in message.fields
+        ]
+        # Parsers accept either the JSON name or the field's own name.
+        self.by_name = {field.field.name: field for field in self.fields}
+        self.by_name.update(
+            (json_names[field.field.name], field) for field in self.fields
+        )
+
+
+def enum_tables(proto_files: Iterable[ProtoFile]) -> dict[str, JsonEnum]:
+    enums = {}
+    for proto_file in proto_files:
+        stack: list[tuple[str, ProtoNode]] = [(package_scope(proto_file), proto_file)]
+        while stack:
+            scope, container = stack.pop()
+            for node in declarations(container):
+                if isinstance(node, ProtoMessage):
+                    stack.append((f"{scope}.{node.name.identifier}", node))
+                elif isinstance(node, ProtoEnum):
+                    table = JsonEnum({}, {})
+                    for value in node.nodes_of_type(ProtoEnumValue):
+                        # With allow_alias, the first name for a number is used.
+                        table.names.setdefault(
+                            int(value.value), value.identifier.identifier
+                        )
+                        table.numbers[value.identifier.identifier] = int(value.value)
+                    enums[codec_name(f"{scope}.{node.name.identifier}")] = table
+    return enums
+
+
+def json_names(message: ProtoMessage) -> dict[str, str]:
+    names = {}
+    for node in message.nodes:
+        fields: Sequence[ProtoNode] = (
+            node.nodes_of_type(ProtoMessageField)
+            if isinstance(node, ProtoOneOf)
+            else [node]
+        )
+        for field in fields:
+            if isinstance(field, ProtoMessageField):
+                names[field.name.identifier] = field_json_name(field)
+            elif isinstance(field, ProtoMap):
+                names[field.name.identifier] = json_name(field.name.identifier)
+    return names
+
+
+def float32_text(value: float) -> str:
+    # The shortest text that reads back as the same 32-bit float.
+    for precision in range(6, 10):
+        text = f"{value:.{precision}g}"
+        if STRUCTS["float"].unpack(STRUCTS["float"].pack(float(text)))[0] == value:
+            break
+    return repr(float(text))
+
+
+class JsonReader:
+    """Reads JSON tokens from text, one at a time."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.position = 0
+
+    def error(self, expected: str) -> ValueError:
+        return ValueError(f"Expected {expected} at position {self.position}")
+
+    def peek(self) -> str:
+        match = WHITESPACE.match(self.text, self.position)
+        if match is not None:
+            self.position = match.end()
+        return self.text[self.position : self.position + 1]
+
+    def accept(self, token: str) -> bool:
+        if self.peek() == token[:1] and self.text.startswith(token, self.position):
+            self.position += len(token)
+            return True
+        return False
+
+    def expect(self, token: str) -> None:
+        if not self.accept(token):
+            raise self.error(repr(token))
+
+    def string(self) -> str:
+        if self.peek() != '"':
+            raise self.error("a string")
+        # typeshed leaves out scanstring, which is what json itself uses.
+        value, self.position = json.decoder.scanstring(  # type: ignore[attr-defined]
+            self.text, self.position + 1
+        )
+        return value
+
+    def scalar(self) -> Any:
+        """Reads a string, number, or boolean."""
+        if self.peek() == '"':
+            return self.string()
+        if self.accept("true"):
+            return True
+        if self.accept("false"):
+            return False
+        match = NUMBER.match(self.text, self.position)
+        if match is None or not match.group():
+            raise self.error("a value")
+        self.position = match.end()
+        if match.group(1) or match.group(2):
+            return float(match.group())
+        return int(match.group())
+
+    def end(self) -> None:
+        if self.peek():
+            raise self.error("the end of the input")
+
+
+class JsonTranscoder:
+    """Converts messages between the binary wire format and proto3 JSON.
+
+    Neither direction builds message objects: binary is scanned and written out as
+    JSON tokens as it's decoded, and JSON is encoded into binary as it's read.
+    Well-known types are converted like any other message, rather than with their
+    special JSON forms.
+    """
+
+    def __init__(self, proto_files: Iterable[ProtoFile]):
+        proto_files = list(proto_files)
+        generator = CodecGenerator(proto_files)
+        self.enums = enum_tables(proto_files)
+        self.messages: dict[str, JsonMessage] = {}
+        self.by_full_name: dict[str, JsonMessage] = {}
+        for message in generator.messages:
+            json_message = JsonMessage(
+                message, json_names(generator.message_nodes[message.full_name])
+            )
+            self.messages[message.codec_name] = json_message
+            self.by_full_name[message.full_name[1:]] = json_message
+
+    def message(self, message_name: str) -> JsonMessage:
+        message = self.by_full_name.get(message_name)
+        if message is None:
+            raise ValueError(f"Unknown message {message_name}")
+        return message
+
+    def to_json(self, message_name: str, data: bytes | memoryview) -> str:
+        output = io.StringIO()
+        self.write_json(message_name, data, output)
+        return output.getvalue()
+
+    def write_json(
+        self, message_name: str, data: bytes | memoryview, output: TextIO
+    ) -> None:
+        """Writes the binary message data, of type message_name, to output as JSON."""
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        self.write_message(self.message(message_name), view, output)
+
+    def write_message(
+        self, message: JsonMessage, view: memoryview, output: TextIO
+    ) -> None:
+        offsets = scan(view)
+        write = output.write
+        write("{")
+        separator = ""
+        for field, key, _ in message.fields:
+            occurrences = present_occurrences(offsets, message.codec_fields, field)
+            if not occurrences:
+                continue
+            if field.map_entry is not None:
+                write(separator + key + "{")
+                self.write_map(field.map_entry, view, occurrences, output)
+                write("}")
+            elif field.repeated:
+                write(separator + key + "[")
+                self.write_repeated(field, view, occurrences, output)
+                write("]")
+            elif field.kind == "message":
+                write(separator + key)
+                self.write_singular(field, view, occurrences, output)
+            else:
+                # The last occurrence of a singular field wins.
+                value = decode_scalar(field, view, occurrences[-1])
+                if field.implicit_presence and not value:
+                    continue
+                write(separator + key + self.scalar_json(field, value))
+            separator = ","
+        write("}")
+
+    def write_repeated(
+        self,
+        field: CodecField,
+        view: memoryview,
+        occurrences: list[Occurrence],
+        output: TextIO,
+    ) -> None:
+        separator = ""
+        for occurrence in occurrences:
+            if occurrence[0] == LEN and wire_type(field.kind) != LEN:
+                for value in iter_packed(field, view, occurrence):
+                    output.write(separator + self.scalar_json(field, value))
+                    separator = ","
+            else:
+                output.write(separator)
+                self.write_value(field, view, occurrence, output)
+                separator = ","
+
+    def write_map(
+        self,
+        map_entry: tuple[CodecField, CodecField],
+        view: memoryview,
+        occurrences: list[Occurrence],
+        output: TextIO,
+    ) -> None:
+        key_field, value_field = map_entry
+        separator = ""
+        for _, start, end in occurrences:
+            entry = view[start:end]
+            offsets = scan(entry)
+            keys = offsets.get(1)
+            key = decode_scalar(key_field, entry, keys[-1]) if keys else None
+            output.write(separator + self.map_key_json(key_field, key) + ":")
+            values = offsets.get(2)
+            if values:
+                self.write_singular(value_field, entry, values, output)
+            elif value_field.kind == "message":
+                output.write("{}")
+            else:
+                output.write(self.scalar_json(value_field, self.default(value_field)))
+            separator = ","
+
+    def write_singular(
+        self,
+        field: CodecField,
+        view: memoryview,
+        occurrences: list[Occurrence],
+        output: TextIO,
+    ) -> None:
+        """Writes the value of a singular field that's set at occurrences.
+
+        The last occurrence of a scalar wins, while the occurrences of a message
+        are merged, which is what parsing their concatenation does.
+        """
+        if field.kind == "message" and len(occurrences) > 1:
+            assert field.message is not None
+            merged = memoryview(b"".join(view[s:e] for _, s, e in occurrences))
+            self.write_message(self.messages[field.message], merged, output)
+        else:
+            self.write_value(field, view, occurrences[-1], output)
+
+    def write_value(
+        self,
+        field: CodecField,
+        view: memoryview,
+        occurrence: Occurrence,
+        output: TextIO,
+    ) -> None:
+        _, start, end = occurrence
+        if field.kind == "message":
+            assert field.message is not None
+            self.write_message(self.messages[field.message], view[start:end], output)
+        else:
+            output.write(
+                self.scalar_json(field, decode_scalar(field, view, occurrence))
+            )
+
+    def default(self, field: CodecField) -> Any:
+        if field.kind == "string":
+            return ""
+        if field.kind == "bytes":
+            return b""
+        if field.kind in ("float", "double"):
+            return 0.0
+        return False if field.kind == "bool" else 0
+
+    def scalar_json(self, field: CodecField, value: Any) -> str:
+        kind = field.kind
+        if kind == "string":
+            return json.dumps(value, ensure_ascii=False)
+        if kind in LONG_TYPES:
+            return f'"{value}"'
+        if kind == "enum":
+            assert field.message is not None
+            enum = self.enums.get(field.message)
+            name = enum.names.get(value) if enum is not None else None
+            return f'"{name}"' if name is not None else str(value)
+        if kind == "bool":
+            return "true" if value else "false"
+        if kind in ("float", "double"):
+            if math.isnan(value):
+                return '"NaN"'
+            if math.isinf(value):
+                return '"Infinity"' if value > 0 else '"-Infinity"'
+            return float32_text(value) if kind == "float" else repr(value)
+        if kind == "bytes":
+            return '"' + base64.b64encode(value).decode("ascii") + '"'
+        return str(value)
+
+    def map_key_json(self, field: CodecField, key: Any) -> str:
+        if key is None:
+            key = self.default(field)
+        if field.kind == "string":
+            return json.dumps(key, ensure_ascii=False)
+        if field.kind == "bool":
+            return '"true"' if key else '"false"'
+        return f'"{key}"'
+
+    def to_binary(self, message_name: str, text: str) -> bytes:
+        """Returns the binary form of a JSON message of type message_name."""
+        reader = JsonReader(text)
+        output = bytearray()
+        self.read_message(self.message(message_name), reader, output)
+        reader.end()
+        return bytes(output)
+
+    def read_message(
+        self, message: JsonMessage, reader: JsonReader, output: bytearray
+    ) -> None:
+        reader.expect("{")
+        if reader.accept("}"):
+            return
+        while True:
+            name = reader.string()
+            json_field = message.by_name.get(name)
+            if json_field is None:
+                raise ValueError(f"{message.full_name[1:]} has no field {name!r}")
+            reader.expect(":")
+            if not reader.accept("null"):
+                self.read_field(json_field, reader, output)
+            if not reader.accept(","):
+                reader.expect("}")
+                return
+
+    def read_field(
+        self, json_field: JsonField, reader: JsonReader, output: bytearray
+    ) -> None:
+        field, _, tag = json_field
+        if field.map_entry is not None:
+            key_field, value_field = field.map_entry
+            reader.expect("{")
+            if reader.accept("}"):
+                return
+            while True:
+                entry = bytearray(tag_bytes(1, wire_type(key_field.kind)))
+                self.write_scalar(
+                    key_field, self.map_key(key_field, reader.string()), entry
+                )
+                reader.expect(":")
+                entry += tag_bytes(2, wire_type(value_field.kind))
+                self.read_value(value_field, reader, entry)
+                output += tag
+                encode_varint(len(entry), output)
+                output += entry
+                if not reader.accept(","):
+                    reader.expect("}")
+                    return
+        elif field.repeated:
+            reader.expect("[")
+            if reader.accept("]"):
+                return
+            packed = bytearray()
+            item_tag = tag_bytes(field.number, wire_type(field.kind))
+            while True:
+                if field.packed:
+                    self.read_value(field, reader, packed)
+                else:
+                    output += item_tag
+                    self.read_value(field, reader, output)
+                if not reader.accept(","):
+                    reader.expect("]")
+                    break
+            if field.packed:
+                output += tag
+                encode_varint(len(packed), output)
+                output += packed
+        elif field.kind == "message":
+            output += tag
+            self.read_value(field, reader, output)
+        else:
+            value = self.scalar_value(field, reader.scalar())
+            if field.implicit_presence and not value:
+                return
+            output += tag
+            self.write_scalar(field, value, output)
+
+    def read_value(
+        self, field: CodecField, reader: JsonReader, output: bytearray
+    ) -> None:
+        if field.kind == "message":
+            assert field.message is not None
+            nested = bytearray()
+            self.read_message(self.messages[field.message], reader, nested)
+            encode_varint(len(nested), output)
+            output += nested
+        else:
+            self.write_scalar(field, self.scalar_value(field, reader.scalar()), output)
+
+    def map_key(self, field: CodecField, key: str) -> Any:
+        if field.kind == "string":
+            return key
+        if field.kind == "bool":
+            if key not in ("true", "false"):
+                raise ValueError(f"Invalid bool map key {key!r}")
+            return key == "true"
+        return self.scalar_value(field, key)
+
+    def scalar_value(self, field: CodecField, token: Any) -> Any:
+        """Converts a JSON token to the value of a field, checking its type."""
+        kind = field.kind
+        if kind == "string":
+            if not isinstance(token, str):
+                raise ValueError(f"Expected a string for {field.name}, got {token!r}")
+            return token
+        if kind == "bytes":
+            if not isinstance(token, str):
+                raise ValueError(f"Expected base64 for {field.name}, got {token!r}")
+            # Both the standard and URL-safe alphabets are accepted, padded or not.
+            return base64.b64decode(
+                token.replace("-", "+").replace("_", "/") + "=" * (-len(token) % 4)
+            )
+        if kind == "bool":
+            if not isinstance(token, bool):
+                raise ValueError(f"Expected a bool for {field.name}, got {token!r}")
+            return token
+        if isinstance(token, bool):
+            raise ValueError(f"Expected a number for {field.name}, got {token!r}")
+        if kind in ("float", "double"):
+            if isinstance(token, str) and token in SPECIAL_FLOATS:
+                return SPECIAL_FLOATS[token]
+            return float(token)
+        if kind == "enum" and isinstance(token, str):
+            assert field.message is not None
+            enum = self.enums.get(field.message)
+            if enum is None or token not in enum.numbers:
+                raise ValueError(f"Unknown value {token!r} for {field.name}")
+            return enum.numbers[token]
+        try:
+            value = int(token)
+        except ValueError:
+            raise ValueError(
+                f"Expected an integer for {field.name}, got {token!r}"
+            ) from None
+        minimum, maximum = INT_RANGES.get(kind, INT_RANGES["int64"])
+        fractional = isinstance(token, float) and not token.is_integer()
+        if fractional or not minimum <= value <= maximum:
+            raise ValueError(f"Invalid {kind} for {field.name}: {token!r}")
+        return value
+
+    def write_scalar(self, field: CodecField, value: Any, output: bytearray) -> None:
+        kind = field.kind
+        if kind in STRUCTS:
+            output += STRUCTS[kind].pack(value)
+        elif kind in ("sint32", "sint64"):
+            encode_varint((value << 1) ^ (value >> 63), output)
+        elif kind == "string":
+            encoded = value.encode("utf-8")
+            encode_varint(len(encoded), output)
+            output += encoded
+        elif kind == "bytes":
+            encode_varint(len(value), output)
+            output += value
+        else:
+            encode_varint(int(value), output)
@@ -0,0 +1,282 @@
+import struct
+from typing import Any, Iterable, Iterator, Optional
+
+from src.proto_file import ProtoFile
+from src.proto_message import ProtoMessage
+from src.proto_node import ProtoNode
+from src.util.codec_generator import (
+    FIXED_TYPES,
+    VARINT_TYPES,
+    CodecField,
+    CodecGenerator,
+    CodecMessage,
+    wire_type,
+)
+from src.util.descriptor import package_scope
+from src.util.wire_format import I32, I64, LEN, VARINT, decode_varint
+
+STRUCTS = {kind: struct.Struct(fmt) for kind, fmt in FIXED_TYPES.items()}
+
+DEFAULTS: dict[str, Any] = {
+    "string": "",
+    "bytes": b"",
+    "bool": False,
+    "float": 0.0,
+    "double": 0.0,
+    "message": None,
+}
+
+# Where one occurrence of a field is on the wire: its wire type, and the start and
+# end of its value. Length-delimited values start after their length.
+Occurrence = tuple[int, int, int]
+
+
+def scan(view: memoryview) -> dict[int, list[Occurrence]]:
+    """Returns where each occurrence of each field number is in a message.
+
+    This only reads tags and lengths, so length-delimited fields are skipped over
+    without looking at their contents.
+    """
+    offsets: dict[int, list[Occurrence]] = {}
+    position = 0
+    end = len(view)
+    try:
+        while position < end:
+            tag, position = decode_varint(view, position)
+            field_wire_type = tag & 0x7
+            start = position
+            if field_wire_type == VARINT:
+                while view[position] & 0x80:
+                    position += 1
+                position += 1
+            elif field_wire_type == LEN:
+                length, start = decode_varint(view, position)
+                position = start + length
+            elif field_wire_type == I64:
+                position += 8
+            elif field_wire_type == I32:
+                position += 4
+            else:
+                raise ValueError(f"Unsupported wire type {field_wire_type}")
+            occurrences = offsets.get(tag >> 3)
+            if occurrences is None:
+                offsets[tag >> 3] = [(field_wire_type, start, position)]
+            else:
+                occurrences.append((field_wire_type, start, position))
+    except IndexError:
+        raise ValueError("Message is truncated") from None
+    if position > end:
+        raise ValueError("Message is truncated")
+    return offsets
+
+
+class LazyType:
+    """The fields of one message type, and the types of its message fields."""
+
+    def __init__(self, message: CodecMessage, types: dict[str, "LazyType"]):
+        self.full_name = message.full_name
+        self.types = types
+        self.fields = {field.name: field for field in message.fields}
+        self.map_entries = {
+            field.name: LazyType(
+                CodecMessage(
+                    f"{message.full_name}.{field.name}_entry",
+                    "",
+                    list(field.map_entry),
+                ),
+                types,
+            )
+            for field in message.fields
+            if field.map_entry is not None
+        }
+
+
+class LazyMessage:
+    """A read-only view of a serialized message that decodes fields on access.
+
+    Creating one scans the message once to find each field, and each field is only
+    decoded the first time it's read. Nested messages are lazy views over slices of
+    the same buffer, and bytes fields are memoryviews, so nothing is copied until a
+    string or number is decoded. Absent fields read as their defaults, or None for
+    messages.
+    """
+
+    __slots__ = ("_type", "_view", "_offsets", "_values")
+
+    def __init__(self, lazy_type: LazyType, view: memoryview):
+        self._type = lazy_type
+        self._view = view
+        self._offsets = scan(view)
+        self._values: dict[str, Any] = {}
+
+    def __repr__(self) -> str:
+        return f"<LazyMessage {self._type.full_name[1:]} ({len(self._view)} bytes)>"
+
+    def __contains__(self, name: str) -> bool:
+        """Whether the field called name is set."""
+        field = self._type.fields.get(name)
+        return field is not None and bool(self._occurrences(field))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        field = self._type.fields.get(name)
+        if field is None:
+            raise AttributeError(
+                f"{self._type.full_name[1:]} has no field {name!r}"
+            ) from None
+        value = self._decode(field)
+        self._values[name] = value
+        return value
+
+    def _occurrences(self, field: CodecField) -> list[Occurrence]:
+        return present_occurrences(self._offsets, self._type.fields, field)
+
+    def _decode(self, field: CodecField) -> Any:
+        occurrences = self._occurrences(field)
+        if field.map_entry is not None:
+            entry_type = self._type.map_entries[field.name]
+            entries = {}
+            for _, start, end in occurrences:
+                entry = LazyMessage(entry_type, self._view[start:end])
+                entries[entry.key] = entry.value
+            return entries
+        if field.repeated:
+            values: list[Any] = []
+            for occurrence in occurrences:
+                if occurrence[0] == LEN and wire_type(field.kind) != LEN:
+                    values.extend(iter_packed(field, self._view, occurrence))
+                else:
+                    values.append(self._decode_value(field, occurrence))
+            return values
+        if not occurrences:
+            return DEFAULTS.get(field.kind, 0)
+        if field.kind == "message" and len(occurrences) > 1:
+            # Occurrences of a singular message are merged, which is what parsing
+            # their concatenation does. This copies them, but it's rare.
+            assert field.message is not None
+            view = memoryview(b"".join(self._view[s:e] for _, s, e in occurrences))
+            return LazyMessage(self._type.types[field.message], view)
+        # The last occurrence of a singular scalar wins.
+        return self._decode_value(field, occurrences[-1])
+
+    def _decode_value(self, field: CodecField, occurrence: Occurrence) -> Any:
+        if field.kind != "message":
+            return decode_scalar(field, self._view, occurrence)
+        assert field.message is not None
+        _, start, end = occurrence
+        return LazyMessage(self._type.types[field.message], self._view[start:end])
+
+
+def present_occurrences(
+    offsets: dict[int, list[Occurrence]],
+    fields: dict[str, CodecField],
+    field: CodecField,
+) -> list[Occurrence]:
+    """Returns the occurrences of field in a scanned message.
+
+    Oneof members are only set if no other member of their oneof comes after them,
+    and setting another member clears them, so only the occurrences after the last
+    other member count.
+    """
+    occurrences = offsets.get(field.number)
+    if not occurrences or not field.oneof_siblings:
+        return occurrences or []
+    cleared = -1
+    for sibling in field.oneof_siblings:
+        sibling_occurrences = offsets.get(fields[sibling].number)
+        if sibling_occurrences:
+            cleared = max(cleared, sibling_occurrences[-1][1])
+    if cleared < occurrences[0][1]:
+        return occurrences
+    return [occurrence for occurrence in occurrences if occurrence[1] > cleared]
+
+
+def iter_packed(
+    field: CodecField, view: memoryview, occurrence: Occurrence
+) -> Iterator[Any]:
+    """Yields each value in a packed occurrence of a repeated scalar field."""
+    _, position, end = occurrence
+    if field.kind in STRUCTS:
+        for (value,) in STRUCTS[field.kind].iter_unpack(view[position:end]):
+            yield value
+        return
+    while position < end:
+        value, position = decode_varint(view, position)
+        yield convert_varint(field.kind, value)
+
+
+def decode_scalar(field: CodecField, view: memoryview, occurrence: Occurrence) -> Any:
+    """Decodes one occurrence of a field that isn't a message."""
+    _, start, end = occurrence
+    kind = field.kind
+    if kind in VARINT_TYPES:
+        return convert_varint(kind, decode_varint(view, start)[0])
+    if kind in STRUCTS:
+        return STRUCTS[kind].unpack_from(view, start)[0]
+    if kind == "string":
+        return str(view[start:end], "utf-8")
+    return view[start:end]
+
+
+def convert_varint(kind: str, value: int) -> Any:
+    if kind in ("int32", "int64", "enum"):
+        return value - (1 << 64) if value > 0x7FFFFFFFFFFFFFFF else value
+    if kind in ("sint32", "sint64"):
+        return (value >> 1) ^ -(value & 1)
+    if kind == "bool":
+        return value != 0
+    return value
+
+
+def full_name(message: ProtoMessage) -> str:
+    names = [message.name.identifier]
+    node: Optional[ProtoNode] = message.parent
+    while isinstance(node, ProtoMessage):
+        names.append(node.name.identifier)
+        node = node.parent
+    if not isinstance(node, ProtoFile):
+        raise ValueError(f"Message {message.name.identifier} isn't in a file")
+    return ".".join([package_scope(node)] + list(reversed(names)))
+
+
+def root_file(message: ProtoMessage) -> ProtoFile:
+    node: Optional[ProtoNode] = message
+    while node is not None and not isinstance(node, ProtoFile):
+        node = node.parent
+    if node is None:
+        raise ValueError(f"Message {message.name.identifier} isn't in a file")
+    return node
+
+
+class LazyDecoder:
+    """Decodes serialized messages of one type into LazyMessages.
+
+    Types are resolved across proto_files, which defaults to the file that
+    message is in.
+    """
+
+    def __init__(
+        self,
+        message: ProtoMessage,
+        proto_files: Optional[Iterable[ProtoFile]] = None,
+    ):
+        if proto_files is None:
+            proto_files = [root_file(message)]
+        generator = CodecGenerator(proto_files)
+        types: dict[str, LazyType] = {}
+        for codec_message in generator.messages:
+            types[codec_message.codec_name] = LazyType(codec_message, types)
+        name = full_name(message)
+        for lazy_type in types.values():
+            if lazy_type.full_name == name:
+                self.type = lazy_type
+                break
+        else:
+            raise ValueError(f"Message {name[1:]} isn't in proto_files")
+
+    def decode(self, data: bytes | bytearray | memoryview) -> LazyMessage:
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        return LazyMessage(self.type, view)
@@ -0,0 +1,103 @@
+from typing import Any
+
+from src.proto_message_field import ProtoMessageField, ProtoMessageFieldTypesEnum
+from src.util.lazy_decoder import scan
+
+# Little-endian dtypes for the fixed-width types, which are decoded in place.
+FIXED_DTYPES = {
+    ProtoMessageFieldTypesEnum.DOUBLE: "<f8",
+    ProtoMessageFieldTypesEnum.FLOAT: "<f4",
+    ProtoMessageFieldTypesEnum.FIXED32: "<u4",
+    ProtoMessageFieldTypesEnum.FIXED64: "<u8",
+    ProtoMessageFieldTypesEnum.SFIXED32: "<i4",
+    ProtoMessageFieldTypesEnum.SFIXED64: "<i8",
+}
+# Dtypes for the varint types, which are decoded as 64-bit ints and then converted.
+VARINT_DTYPES = {
+    ProtoMessageFieldTypesEnum.INT32: "i4",
+    ProtoMessageFieldTypesEnum.INT64: "i8",
+    ProtoMessageFieldTypesEnum.UINT32: "u4",
+    ProtoMessageFieldTypesEnum.UINT64: "u8",
+    ProtoMessageFieldTypesEnum.SINT32: "i4",
+    ProtoMessageFieldTypesEnum.SINT64: "i8",
+    ProtoMessageFieldTypesEnum.BOOL: "?",
+}
+
+
+def load_numpy() -> Any:
+    # numpy is optional, and only needed to decode into arrays.
+    try:
+        import numpy  # type: ignore[import-not-found]
+    except ImportError as e:
+        raise ImportError("Decoding into arrays requires numpy") from e
+    return numpy
+
+
+def decode_varints(np: Any, data: bytes | memoryview) -> Any:
+    """Decodes a run of varints into an array of unsigned 64-bit ints.
+
+    Rather than decoding one varint at a time, this finds every varint's last byte
+    at once, then ORs in each varint's nth byte for every n up to the longest.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size and raw[-1] & 0x80:
+        raise ValueError("Packed field is truncated")
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    payload = (raw & 0x7F).astype(np.uint64)
+    values = payload[starts]
+    for index in range(1, int(lengths.max()) if lengths.size else 0):
+        longer = np.flatnonzero(lengths > index)
+        values[longer] |= payload[starts[longer] + index] << np.uint64(7 * index)
+    return values
+
+
+def decode_packed(
+    field_type: ProtoMessageFieldTypesEnum, data: bytes | memoryview
+) -> Any:
+    """Decodes the payload of a packed repeated field into a numpy array.
+
+    Fixed-width types are decoded without copying, so the array shares memory with
+    data and is read-only if data is.
+    """
+    np = load_numpy()
+    if field_type in FIXED_DTYPES:
+        return np.frombuffer(data, dtype=FIXED_DTYPES[field_type])
+    if field_type not in VARINT_DTYPES:
+        raise ValueError(f"Can't decode packed {field_type.value} fields into arrays")
+    values = decode_varints(np, data)
+    if field_type in (
+        ProtoMessageFieldTypesEnum.SINT32,
+        ProtoMessageFieldTypesEnum.SINT64,
+    ):
+        values = (values >> np.uint64(1)) ^ (np.uint64(0) - (values & np.uint64(1)))
+    if field_type == ProtoMessageFieldTypesEnum.BOOL:
+        return values != 0
+    # Negative ints are sign-extended to 64 bits, so they survive the cast.
+    return values.view(np.int64).astype(VARINT_DTYPES[field_type])
+
+
+def decode_repeated_field(
+    field: ProtoMessageField, message: bytes | bytearray | memoryview
+) -> Any:
+    """Decodes every value of a repeated numeric field in a message into an array.
+
+    The values can be packed, unpacked or a mix, as long as the field is numeric.
+    """
+    if not field.repeated:
+        raise ValueError(f"Field {field.name.identifier} isn't repeated")
+    view = message if isinstance(message, memoryview) else memoryview(message)
+    # An unpacked value is decoded the same way as a packed field holding only it.
+    arrays = [
+        decode_packed(field.type, view[start:end])
+        for _, start, end in scan(view).get(int(field.number), [])
+    ]
+    if len(arrays) == 1:
+        return arrays[0]
+    np = load_numpy()
+    if not arrays:
+        return decode_packed(field.type, b"")
+    return np.concatenate(arrays)
@@ -0,0 +1,147 @@
+import functools
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional, TextIO
+
+from src.proto_node import ProtoNode
+
+# The classmethods that are counted and timed on every node class.
+PROFILED_METHODS = ["match", "match_header", "match_footer"]
+
+
+@dataclass
+class MatchStats:
+    calls: int = 0
+    # Calls that returned a match, and calls that returned None.
+    matches: int = 0
+    failures: int = 0
+    exceptions: int = 0
+    # Time spent in this method, including any nested matches.
+    seconds: float = 0.0
+    # Time spent in this method, excluding nested matches.
+    self_seconds: float = 0.0
+
+
+def node_types() -> list[type]:
+    """Returns every subclass of ProtoNode that's been imported."""
+    found: list[type] = []
+    pending = ProtoNode.__subclasses__()
+    while pending:
+        node_type = pending.pop()
+        if node_type not in found:
+            found.append(node_type)
+            pending += node_type.__subclasses__()
+    return found
+
+
+class ParseProfiler:
+    """Counts and times calls to each node type's match methods while enabled.
+
+    Enabling it swaps those classmethods for instrumented wrappers, and disabling
+    it puts the originals back, so parsing costs nothing extra the rest of the time.
+    Only one profiler can be enabled at once.
+
+        with ParseProfiler() as profiler:
+            Parser.loads(proto_content)
+        print(profiler.report())
+    """
+
+    active: Optional["ParseProfiler"] = None
+
+    def __init__(self) -> None:
+        # Keyed by e.g. "ProtoMessage.match_header".
+        self.stats: dict[str, MatchStats] = {}
+        self.originals: list[tuple[type, str, Any]] = []
+        # Time spent in nested matches, for each profiled call in progress.
+        self.nested_seconds: list[float] = []
+
+    def __enter__(self) -> "ParseProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.disable()
+
+    def enable(self) -> None:
+        if ParseProfiler.active is not None:
+            raise RuntimeError("Another ParseProfiler is already enabled")
+        ParseProfiler.active = self
+        for node_type in node_types():
+            for method in PROFILED_METHODS:
+                original = node_type.__dict__.get(method)
+                if not isinstance(original, classmethod):
+                    continue
+                self.originals.append((node_type, method, original))
+                setattr(node_type, method, self.wrap(method, original.__func__))
+
+    def disable(self) -> None:
+        for node_type, method, original in reversed(self.originals):
+            setattr(node_type, method, original)
+        self.originals = []
+        if ParseProfiler.active is self:
+            ParseProfiler.active = None
+
+    def wrap(self, method: str, function: Callable[..., Any]) -> classmethod:
+        stats = self.stats
+        nested_seconds = self.nested_seconds
+
+        @functools.wraps(function)
+        def profiled(node_type: type[ProtoNode], *args, **kwargs) -> Any:
+            # Inherited methods are counted against the class they're called on.
+            key = f"{node_type.__name__}.{method}"
+            method_stats = stats.get(key)
+            if method_stats is None:
+                method_stats = stats[key] = MatchStats()
+            method_stats.calls += 1
+            nested_seconds.append(0.0)
+            start = time.perf_counter()
+            try:
+                result = function(node_type, *args, **kwargs)
+            except BaseException:
+                method_stats.exceptions += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                method_stats.seconds += elapsed
+                method_stats.self_seconds += elapsed - nested_seconds.pop()
+                if nested_seconds:
+                    nested_seconds[-1] += elapsed
+            if result is None:
+                method_stats.failures += 1
+            else:
+                method_stats.matches += 1
+            return result
+
+        return classmethod(profiled)
+
+    def report(self, limit: Optional[int] = None) -> str:
+        """Formats the stats as a table, slowest methods (by self time) first."""
+        ordered = sorted(
+            self.stats.items(), key=lambda item: item[1].self_seconds, reverse=True
+        )
+        rows = [
+            f"{'method':<42}{'calls':>9}{'matches':>9}{'failures':>9}"
+            f"{'raised':>8}{'self ms':>10}{'total ms':>10}"
+        ]
+        for key, s in ordered[:limit]:
+            rows.append(
+                f"{key:<42}{s.calls:>9}{s.matches:>9}{s.failures:>9}"
+                f"{s.exceptions:>8}{s.self_seconds * 1000:>10.2f}"
+                f"{s.seconds * 1000:>10.2f}"
+            )
+        return "\n".join(rows)
+
+    def dump(self, writer: TextIO) -> None:
+        """Writes the stats as JSON."""
+        json.dump({key: asdict(s) for key, s in self.stats.items()}, writer, indent=2)
+
+
+def write_profile_report(profiler: ParseProfiler, destination: str) -> None:
+    """Prints a report to stderr if destination is "-", or dumps JSON to it."""
+    if destination == "-":
+        sys.stderr.write(profiler.report() + "\n")
+        return
+    with open(destination, "w") as output:
+        profiler.dump(output)
@@ -1,10 +1,25 @@
+import contextlib
 import sys
+from typing import TYPE_CHECKING, Optional
 
 from src.proto_file import ProtoFile
+from src.proto_node import ProtoParseError
+
+if TYPE_CHECKING:
+    import argparse
 
 
 class ParseError(ValueError):
-    pass
+    def __init__(self, error: ValueError, proto_content: str):
+        super().__init__(error)
+        self.error = error
+        self.proto_content = proto_content
+
+    def __str__(self) -> str:
+        if isinstance(self.error, ProtoParseError):
+            line, column = self.error.line_and_column(self.proto_content)
+            return f"Proto doesn't have parseable syntax at line {line}, column {column}:\n{self.error}"
+        return f"Proto doesn't have parseable syntax:\n{self.error}"
 
 
 class Parser:
@@ -13,15 +28,87 @@ class Parser:
         try:
             parsed_file = ProtoFile.match(proto_content, None)
         except ValueError as e:
-            raise ParseError(f"Proto doesn't have parseable syntax:\n{e}")
+            raise ParseError(e, proto_content) from e
         if parsed_file is None:
-            raise ParseError(f"Proto doesn't have parseable syntax:\n{proto_content}")
+            raise ParseError(
+                ProtoParseError("Proto doesn't have parseable syntax", proto_content),
+                proto_content,
+            )
 
         assert isinstance(parsed_file.node, ProtoFile)
         return parsed_file.node
 
+    @staticmethod
+    def loads_with_diagnostics(
+        proto_content: str,
+    ) -> tuple[ProtoFile, list[ProtoParseError]]:
+        """Parses as much of the proto as possible, collecting every syntax error.
+
+        Statements that fail to parse show up as ProtoErrorNodes in the returned file.
+        Only a missing or invalid syntax statement still raises a ParseError.
+        """
+        diagnostics: list[ProtoParseError] = []
+        try:
+            parsed_file = ProtoFile.match(proto_content, None, diagnostics=diagnostics)
+        except ValueError as e:
+            raise ParseError(e, proto_content) from e
+        if parsed_file is None:
+            raise ParseError(
+                ProtoParseError("Proto doesn't have parseable syntax", proto_content),
+                proto_content,
+            )
+
+        assert isinstance(parsed_file.node, ProtoFile)
+        return parsed_file.node, diagnostics
+
+
+def add_profile_report_argument(arg_parser: "argparse.ArgumentParser") -> None:
+    arg_parser.add_argument(
+        "--profile-report",
+        metavar="PATH",
+        help="Profiles parsing, dumping JSON to PATH, or printing a report to stderr "
+        "if PATH is -.",
+    )
+
+
+def profile(destination: Optional[str]) -> contextlib.AbstractContextManager:
+    """Profiles parsing within the block if destination is set, then reports."""
+    if destination is None:
+        return contextlib.nullcontext()
+    # Only imported when it's used, to keep CLI startup fast.
+    from src.util.parse_profiler import ParseProfiler, write_profile_report
+
+    @contextlib.contextmanager
+    def profiling():
+        profiler = ParseProfiler()
+        try:
+            with profiler:
+                yield profiler
+        finally:
+            # Report even if parsing failed, since that's often what's slow.
+            write_profile_report(profiler, destination)
+
+    return profiling()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Parses a proto file and prints it back out."
+    )
+    arg_parser.add_argument("proto_file")
+    add_profile_report_argument(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    with open(args.proto_file, "r") as proto_file:
+        proto_content = proto_file.read()
+    with profile(args.profile_report):
+        parsed_proto = Parser.loads(proto_content)
+    parsed_proto.serialize_to(sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
 
 if __name__ == "__main__":
-    with open(sys.argv[1], "r") as proto_file:
-        parsed_proto = Parser.loads(proto_file.read())
-    print(parsed_proto.serialize())
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,334 @@
+import functools
+import re
+from enum import Enum
+from typing import Iterable, NamedTuple, Optional, Sequence
+
+from src.proto_bool import ProtoBool
+from src.proto_comment import ProtoComment
+from src.proto_constant import ProtoConstant
+from src.proto_enum import ProtoEnum, ProtoEnumValue
+from src.proto_extend import ProtoExtend
+from src.proto_extensions import ProtoExtensions
+from src.proto_file import ProtoFile
+from src.proto_float import ProtoFloat, ProtoFloatSign
+from src.proto_identifier import ProtoIdentifier
+from src.proto_import import ProtoImport
+from src.proto_int import ProtoInt
+from src.proto_map import ProtoMap
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField
+from src.proto_node import ProtoContainerNode, ProtoNode
+from src.proto_oneof import ProtoOneOf
+from src.proto_option import ProtoOption
+from src.proto_package import ProtoPackage
+from src.proto_reserved import ProtoReserved
+from src.proto_service import ProtoService, ProtoServiceRPC
+from src.proto_string_literal import ProtoStringLiteral
+
+NODE_TYPES: dict[str, type] = {
+    "*": ProtoNode,
+    "comment": ProtoComment,
+    "enum": ProtoEnum,
+    "enum_value": ProtoEnumValue,
+    "extend": ProtoExtend,
+    "extensions": ProtoExtensions,
+    "field": ProtoMessageField,
+    "file": ProtoFile,
+    "import": ProtoImport,
+    "map": ProtoMap,
+    "message": ProtoMessage,
+    "oneof": ProtoOneOf,
+    "option": ProtoOption,
+    "package": ProtoPackage,
+    "reserved": ProtoReserved,
+    "rpc": ProtoServiceRPC,
+    "service": ProtoService,
+}
+
+SELECTOR_TOKENS = re.compile(
+    r"""
+    (?P<whitespace>\s+)
+    |(?P<child>>)
+    |(?P<comma>,)
+    |(?P<type>\*|[A-Za-z_][A-Za-z0-9_]*)
+    |\#(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |\[\s*(?P<attribute>[^\s=\]]+)\s*
+        (?:=\s*(?P<value>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^\s\]]+)\s*)?\]
+    """,
+    re.VERBOSE,
+)
+
+
+class AttributeTest(NamedTuple):
+    # Option tests look up an option by name rather than following an attribute
+    # path.
+    path: tuple[str, ...]
+    is_option: bool
+    value: object
+
+
+class Compound(NamedTuple):
+    node_type: type
+    name: Optional[str]
+    tests: tuple[AttributeTest, ...]
+
+    def matches(self, node: ProtoNode) -> bool:
+        if not isinstance(node, self.node_type):
+            return False
+        if self.name is not None and node_name(node) != self.name:
+            return False
+        return all(attribute_test_matches(test, node) for test in self.tests)
+
+    def children(self, node: ProtoNode) -> Iterable[ProtoNode]:
+        if not isinstance(node, ProtoContainerNode):
+            return node.children()
+        if self.name is not None:
+            named_node = node.nodes_by_name().get(self.name)
+            if (
+                named_node is not None
+                and self.node_type in named_node.__class__.__mro__
+            ):
+                return [named_node]
+        return node.nodes_of_type(self.node_type)
+
+    def descendants(self, node: ProtoNode) -> Iterable[ProtoNode]:
+        # Descendants are whatever children() reaches: a container's nodes, and
+        # what's inside each leaf, like an rpc's options. Containers are never
+        # inside leaves, so leaves are skipped when looking for containers.
+        containers_only = issubclass(self.node_type, ProtoContainerNode)
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ProtoContainerNode):
+                yield from self.children(current)
+                nested: Sequence[ProtoNode]
+                if containers_only:
+                    nested = current.nodes_of_type(ProtoContainerNode)  # type: ignore[type-abstract]
+                else:
+                    nested = current.nodes
+                stack.extend(reversed(nested))
+            else:
+                children = current.children()
+                yield from children
+                stack.extend(reversed(children))
+
+
+class Step(NamedTuple):
+    is_child: bool
+    compound: Compound
+
+
+class ProtoQuery:
+    """A compiled selector, which can be evaluated against many trees.
+
+    Selectors look like CSS selectors. A compound selector is a node type (like
+    message, field, rpc or *), optionally followed by a #name and any number of
+    [attribute=value] or [option.name=value] tests; leaving out "=value" checks
+    that the attribute is truthy or that the option is set. Compound selectors are
+    separated by whitespace to match descendants or by ">" to match children, and
+    whole selectors can be combined with commas. For example:
+
+        field[option.deprecated=true]
+        service#Greeter > rpc[response_stream]
+        message > message > field[type=string], map
+    """
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.alternatives = parse_selector(selector)
+
+    def __repr__(self) -> str:
+        return f"<ProtoQuery selector={self.selector!r}>"
+
+    def select(self, roots: ProtoNode | Iterable[ProtoNode]) -> list[ProtoNode]:
+        """Returns every node under roots that this selector matches, without duplicates.
+
+        roots can be a single tree, or e.g. all of the files in a workspace.
+        """
+        if isinstance(roots, ProtoNode):
+            roots = [roots]
+        roots = list(roots)
+
+        matches: list[ProtoNode] = []
+        seen: set[int] = set()
+        for steps in self.alternatives:
+            for node in self.select_steps(roots, steps):
+                if id(node) not in seen:
+                    seen.add(id(node))
+                    matches.append(node)
+        return matches
+
+    def select_steps(
+        self, roots: list[ProtoNode], steps: Sequence[Step]
+    ) -> list[ProtoNode]:
+        first = steps[0].compound
+        current = [root for root in roots if first.matches(root)]
+        for root in roots:
+            current.extend(n for n in first.descendants(root) if first.matches(n))
+
+        for step in steps[1:]:
+            next_nodes: list[ProtoNode] = []
+            seen: set[int] = set()
+            for node in current:
+                if step.is_child:
+                    candidates = step.compound.children(node)
+                else:
+                    candidates = step.compound.descendants(node)
+                for candidate in candidates:
+                    if id(candidate) not in seen and step.compound.matches(candidate):
+                        seen.add(id(candidate))
+                        next_nodes.append(candidate)
+            current = next_nodes
+        return current
+
+
+@functools.lru_cache(maxsize=256)
+def compile_query(selector: str) -> ProtoQuery:
+    return ProtoQuery(selector)
+
+
+def select(selector: str, roots: ProtoNode | Iterable[ProtoNode]) -> list[ProtoNode]:
+    return compile_query(selector).select(roots)
+
+
+def parse_selector(selector: str) -> list[list[Step]]:
+    alternatives: list[list[Step]] = []
+    steps: list[Step] = []
+    node_type: Optional[type] = None
+    name: Optional[str] = None
+    tests: list[AttributeTest] = []
+    # Whether the compound being built is a child of the previous one, and whether
+    # whitespace has been seen since the last compound ended.
+    is_child = False
+    pending_whitespace = False
+
+    def finish_compound() -> None:
+        nonlocal node_type, name, tests, is_child
+        if node_type is None and name is None and not tests:
+            raise ValueError(f"Selector has an empty compound selector: {selector}")
+        steps.append(
+            Step(is_child, Compound(node_type or ProtoNode, name, tuple(tests)))
+        )
+        node_type, name, tests, is_child = None, None, [], False
+
+    def in_compound() -> bool:
+        return node_type is not None or name is not None or bool(tests)
+
+    position = 0
+    while position < len(selector):
+        token = SELECTOR_TOKENS.match(selector, position)
+        if token is None:
+            raise ValueError(
+                f"Selector has invalid syntax at {position}: {selector[position:]}"
+            )
+        position = token.end()
+        kind = token.lastgroup
+        if kind == "whitespace":
+            pending_whitespace = in_compound()
+            if pending_whitespace:
+                finish_compound()
+            continue
+
+        if kind == "child" or kind == "comma":
+            if in_compound():
+                finish_compound()
+            elif not pending_whitespace or not steps:
+                raise ValueError(f"Selector has a dangling {token.group()}: {selector}")
+            pending_whitespace = False
+            if kind == "child":
+                is_child = True
+            else:
+                alternatives.append(steps)
+                steps = []
+            continue
+
+        pending_whitespace = False
+        if kind == "type":
+            if in_compound():
+                raise ValueError(f"Selector has a misplaced node type: {selector}")
+            type_name = token.group("type")
+            if type_name not in NODE_TYPES:
+                raise ValueError(f"Selector has an unknown node type: {type_name}")
+            node_type = NODE_TYPES[type_name]
+        elif kind == "name":
+            name = token.group("name")
+        else:
+            tests.append(parse_test(token.group("attribute"), token.group("value")))
+
+    if in_compound():
+        finish_compound()
+    elif is_child or not steps:
+        raise ValueError(f"Selector is incomplete: {selector}")
+    alternatives.append(steps)
+    return alternatives
+
+
+def parse_test(attribute: str, value: Optional[str]) -> AttributeTest:
+    if attribute.startswith("option."):
+        return AttributeTest((attribute[7:],), True, parse_value(value))
+    return AttributeTest(tuple(attribute.split(".")), False, parse_value(value))
+
+
+def parse_value(value: Optional[str]) -> object:
+    if value is None:
+        return None
+    if value[0] in "\"'":
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    if value == "true":
+        return True
+    if value == "false":
+        return False
+    try:
+        return int(value, 0)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def node_name(node: ProtoNode) -> Optional[str]:
+    if isinstance(node, ProtoEnumValue):
+        return node.identifier.identifier
+    return getattr(getattr(node, "name", None), "identifier", None)
+
+
+def plain_value(value: object) -> object:
+    if isinstance(value, ProtoConstant):
+        value = value.value
+    if isinstance(value, ProtoBool):
+        return value.value
+    if isinstance(value, ProtoInt):
+        return int(value)
+    if isinstance(value, ProtoFloat):
+        if value.sign == ProtoFloatSign.NEGATIVE:
+            return -value.value
+        return value.value
+    if isinstance(value, ProtoStringLiteral):
+        return value.value
+    if isinstance(value, ProtoIdentifier):
+        return value.identifier
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def attribute_test_matches(test: AttributeTest, node: ProtoNode) -> bool:
+    value: object
+    if test.is_option:
+        options = getattr(node, "options", None) or []
+        value = next(
+            (o.value for o in options if o.name.identifier == test.path[0]), None
+        )
+        if value is None:
+            return False
+        if test.value is None:
+            return True
+    else:
+        value = node
+        for attribute in test.path:
+            value = getattr(value, attribute, None)
+        if test.value is None:
+            return bool(value)
+    return plain_value(value) == test.value
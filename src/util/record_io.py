@@ -0,0 +1,204 @@
+import mmap
+import multiprocessing
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+
+from src.proto_file import ProtoFile
+from src.proto_message import ProtoMessage
+from src.util.codec_generator import generate_codecs
+from src.util.lazy_decoder import LazyDecoder, full_name, root_file
+from src.util.wire_format import decode_varint, encode_varint
+
+# Records are split into spans of about this many bytes to decode in parallel.
+PARALLEL_SPAN_SIZE = 16 << 20
+
+# The decoder used by each worker process in RecordReader.read_parallel.
+worker_decoder: Optional[Callable[[memoryview], Any]] = None
+
+
+def frames(
+    view: memoryview, start: int = 0, end: int = -1
+) -> Iterator[tuple[int, int]]:
+    """Yields the start and end of each varint-delimited frame in view."""
+    if end < 0:
+        end = len(view)
+    position = start
+    while position < end:
+        try:
+            length, position = decode_varint(view, position)
+        except IndexError:
+            raise ValueError("Record length is truncated") from None
+        if position + length > end:
+            raise ValueError("Record is truncated")
+        yield position, position + length
+        position += length
+
+
+def load_codec(
+    message: ProtoMessage, proto_files: list[ProtoFile]
+) -> tuple[Callable[[memoryview], dict], Callable[[dict], bytes]]:
+    """Returns the generated decoder and encoder for message."""
+    name = full_name(message)[1:]
+    namespace: dict[str, Any] = {}
+    exec(generate_codecs(proto_files), namespace)
+    return namespace["DECODERS"][name], namespace["ENCODERS"][name]
+
+
+def start_worker(source: str, name: str) -> None:
+    global worker_decoder
+    namespace: dict[str, Any] = {}
+    exec(source, namespace)
+    worker_decoder = namespace["DECODERS"][name]
+
+
+def decode_span(task: tuple[str, int, int]) -> list[Any]:
+    path, start, end = task
+    assert worker_decoder is not None
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return [
+                worker_decoder(view[frame_start:frame_end])
+                for frame_start, frame_end in frames(view, start, end)
+            ]
+        finally:
+            view.release()
+
+
+class RecordReader:
+    """Reads files of varint-length-delimited messages of one type.
+
+    Records are decoded into dicts, like src.util.codec_generator does, or into
+    LazyMessages if lazy is set. Only one record is held in memory at a time, on top
+    of whatever's memory-mapped or buffered.
+    """
+
+    def __init__(
+        self,
+        message: ProtoMessage,
+        proto_files: Optional[Iterable[ProtoFile]] = None,
+        lazy: bool = False,
+    ):
+        self.message = message
+        self.proto_files = (
+            [root_file(message)] if proto_files is None else list(proto_files)
+        )
+        self.decode: Callable[[memoryview], Any]
+        if lazy:
+            self.decode = LazyDecoder(message, self.proto_files).decode
+        else:
+            self.decode = load_codec(message, self.proto_files)[0]
+
+    def read(self, path: str) -> Iterator[Any]:
+        """Yields each record in the file at path, by memory-mapping it."""
+        with open(path, "rb") as file:
+            if not file.seek(0, 2):
+                # Empty files can't be mapped.
+                return
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            for start, end in frames(view):
+                yield self.decode(view[start:end])
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # Lazy records still point into the file, so it's unmapped once
+                # they're gone.
+                pass
+
+    def read_stream(self, stream: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+        """Yields each record in stream, reading chunk_size bytes at a time.
+
+        Unlike read, this works on pipes and sockets. Buffers are never reused, so
+        lazy records stay valid after the next one is read.
+        """
+        pending = b""
+        # How many bytes the record at the start of pending needs, when known.
+        needed = 0
+        while True:
+            chunk = stream.read(max(chunk_size, needed - len(pending)))
+            buffer = pending + chunk if pending else chunk
+            view = memoryview(buffer)
+            position = 0
+            needed = 0
+            while position < len(buffer):
+                try:
+                    length, start = decode_varint(view, position)
+                except IndexError:
+                    break
+                if start + length > len(buffer):
+                    needed = start + length - position
+                    break
+                yield self.decode(view[start : start + length])
+                position = start + length
+            pending = buffer[position:]
+            if not chunk:
+                if pending:
+                    raise ValueError("Record is truncated")
+                return
+
+    def read_parallel(
+        self,
+        path: str,
+        processes: Optional[int] = None,
+        span_size: int = PARALLEL_SPAN_SIZE,
+    ) -> Iterator[Any]:
+        """Yields each record in the file at path, decoding them across processes.
+
+        The file is split on frame boundaries into spans of about span_size bytes,
+        and each worker maps the file itself, so only decoded records are sent
+        between processes. Records are yielded in order, and always as dicts.
+        """
+        spans = []
+        with open(path, "rb") as file:
+            if not file.seek(0, 2):
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                span_start = 0
+                try:
+                    for _, end in frames(view):
+                        if end - span_start >= span_size:
+                            spans.append((path, span_start, end))
+                            span_start = end
+                finally:
+                    view.release()
+                if span_start < len(mapped):
+                    spans.append((path, span_start, len(mapped)))
+
+        with multiprocessing.Pool(
+            processes,
+            initializer=start_worker,
+            initargs=(generate_codecs(self.proto_files), full_name(self.message)[1:]),
+        ) as pool:
+            for records in pool.imap(decode_span, spans):
+                yield from records
+
+
+class RecordWriter:
+    """Writes messages of one type to stream, each prefixed by its length."""
+
+    def __init__(
+        self,
+        message: ProtoMessage,
+        stream: BinaryIO,
+        proto_files: Optional[Iterable[ProtoFile]] = None,
+    ):
+        self.stream = stream
+        if proto_files is None:
+            proto_files = [root_file(message)]
+        self.encode = load_codec(message, list(proto_files))[1]
+
+    def write(self, record: dict) -> None:
+        self.write_encoded(self.encode(record))
+
+    def write_encoded(self, data: bytes) -> None:
+        """Writes an already-serialized message."""
+        header = bytearray()
+        encode_varint(len(data), header)
+        self.stream.write(header)
+        self.stream.write(data)
@@ -0,0 +1,97 @@
+from typing import Callable, Optional, Sequence
+
+from src.proto_node import ProtoNode
+
+# Returned from a visit_ handler to skip the node's children.
+SKIP_CHILDREN = object()
+
+Handler = Callable[["ProtoVisitor", ProtoNode], object]
+
+
+class ProtoVisitor:
+    """Base class for analyses that walk a tree of ProtoNodes.
+
+    Subclasses define visit_<ClassName>(node) handlers, which are called before a
+    node's children are walked, and leave_<ClassName>(node) handlers, which are
+    called after. A handler for a class also handles its subclasses, so e.g.
+    visit_ProtoComment sees both kinds of comment, and visit_ProtoNode sees every
+    node that doesn't have a more specific handler.
+    """
+
+    # Maps each node class to the visit and leave handlers for it. Each subclass
+    # gets its own table, filled in the first time it sees a node class.
+    dispatch_table: dict[type, tuple[Optional[Handler], Optional[Handler]]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch_table = {}
+
+    @classmethod
+    def handlers(
+        cls, node_type: type[ProtoNode]
+    ) -> tuple[Optional[Handler], Optional[Handler]]:
+        handlers = cls.dispatch_table.get(node_type)
+        if handlers is None:
+            handlers = (
+                cls.find_handler("visit_", node_type),
+                cls.find_handler("leave_", node_type),
+            )
+            cls.dispatch_table[node_type] = handlers
+        return handlers
+
+    @classmethod
+    def find_handler(cls, prefix: str, node_type: type[ProtoNode]) -> Optional[Handler]:
+        for base in node_type.__mro__:
+            handler = getattr(cls, prefix + base.__name__, None)
+            if handler is not None:
+                return handler
+        return None
+
+    def walk(self, node: ProtoNode) -> None:
+        walk(node, [self])
+
+
+def walk(node: ProtoNode, visitors: Sequence[ProtoVisitor]) -> None:
+    """Walks the tree under node once, calling every visitor's handlers.
+
+    Visitors are called in order at each node. A visitor that skips a node's
+    children stops seeing that subtree, but the rest of the visitors still walk it.
+    """
+    # Each entry is a node, the visitors walking it, the visitors walking its
+    # children, and the children that are left to walk (in reverse).
+    stack: list[
+        tuple[
+            ProtoNode,
+            Sequence[ProtoVisitor],
+            Sequence[ProtoVisitor],
+            Optional[list[ProtoNode]],
+        ]
+    ]
+    stack = [(node, visitors, (), None)]
+    while stack:
+        node, active_visitors, descending_visitors, remaining_children = stack[-1]
+        if remaining_children is None:
+            descending_visitors = []
+            for visitor in active_visitors:
+                visit, _ = visitor.handlers(node.__class__)
+                if visit is None or visit(visitor, node) is not SKIP_CHILDREN:
+                    descending_visitors.append(visitor)
+            remaining_children = []
+            if descending_visitors:
+                remaining_children = list(reversed(node.children()))
+            stack[-1] = (
+                node,
+                active_visitors,
+                descending_visitors,
+                remaining_children,
+            )
+
+        if remaining_children:
+            stack.append((remaining_children.pop(), descending_visitors, (), None))
+            continue
+
+        stack.pop()
+        for visitor in active_visitors:
+            _, leave = visitor.handlers(node.__class__)
+            if leave is not None:
+                leave(visitor, node)
@@ -0,0 +1,90 @@
+import struct
+from typing import Iterator
+
+# Wire types, as described in https://protobuf.dev/programming-guides/encoding/.
+VARINT = 0
+I64 = 1
+LEN = 2
+I32 = 5
+
+DOUBLE = struct.Struct("<d")
+
+
+def encode_varint(value: int, output: bytearray) -> None:
+    # Negative numbers are written as 64-bit two's complement, like int32 and
+    # int64 fields.
+    if value < 0:
+        value += 1 << 64
+    while value > 0x7F:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def decode_varint(data: bytes, position: int) -> tuple[int, int]:
+    """Returns the varint at position, and the position just after it."""
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        position += 1
+        byte = data[position]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position + 1
+        shift += 7
+
+
+def encode_tag(field_number: int, wire_type: int, output: bytearray) -> None:
+    encode_varint(field_number << 3 | wire_type, output)
+
+
+def encode_varint_field(field_number: int, value: int, output: bytearray) -> None:
+    encode_tag(field_number, VARINT, output)
+    encode_varint(value, output)
+
+
+def encode_bytes_field(field_number: int, value: bytes, output: bytearray) -> None:
+    encode_tag(field_number, LEN, output)
+    encode_varint(len(value), output)
+    output += value
+
+
+def encode_string_field(field_number: int, value: str, output: bytearray) -> None:
+    encode_bytes_field(field_number, value.encode("utf-8"), output)
+
+
+def encode_double_field(field_number: int, value: float, output: bytearray) -> None:
+    encode_tag(field_number, I64, output)
+    output += DOUBLE.pack(value)
+
+
+def decode_fields(data: bytes) -> Iterator[tuple[int, int, int | bytes]]:
+    """Yields the field number, wire type and raw value of each field in a message.
+
+    Varints are yielded as unsigned ints, and every other wire type as bytes.
+    """
+    position = 0
+    while position < len(data):
+        tag, position = decode_varint(data, position)
+        field_number, wire_type = tag >> 3, tag & 0x7
+        value: int | bytes
+        if wire_type == VARINT:
+            value, position = decode_varint(data, position)
+        elif wire_type == I64:
+            value = data[position : position + 8]
+            position += 8
+        elif wire_type == LEN:
+            length, position = decode_varint(data, position)
+            value = data[position : position + length]
+            position += length
+        elif wire_type == I32:
+            value = data[position : position + 4]
+            position += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        if position > len(data):
+            raise ValueError("Message is truncated")
+        yield field_number, wire_type, value
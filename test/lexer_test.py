@@ -0,0 +1,89 @@
+import unittest
+
+from src import lexer
+
+
+class LexerTest(unittest.TestCase):
+    def test_identifiers(self):
+        self.assertEqual(lexer.IDENTIFIER.match("foo_1.bar").group(), "foo_1")
+        self.assertIsNone(lexer.IDENTIFIER.match("1foo"))
+        self.assertEqual(
+            lexer.FULL_IDENTIFIER.match("foo.bar_2 = 1").group(), "foo.bar_2"
+        )
+        self.assertIsNone(lexer.FULL_IDENTIFIER.match(".foo"))
+
+    def test_ints(self):
+        self.assertEqual(lexer.HEX_INT.match("0x7Af;").group(1), "7Af")
+        self.assertEqual(lexer.OCTAL_INT.match("0723;").group(1), "723")
+        self.assertEqual(lexer.DECIMAL_INT.match("1234;").group(), "1234")
+
+    def test_floats(self):
+        self.assertEqual(lexer.FLOAT_MANTISSA.match("1.25e-3").group(), "1.25")
+        self.assertEqual(lexer.FLOAT_EXPONENT.match("e-3;").groups(), ("-", "3"))
+        self.assertEqual(lexer.FLOAT_EXPONENT.match("E10").groups(), ("", "10"))
+
+    def test_keyword_table(self):
+        table = lexer.KeywordTable({"int32": 1, "string": 2})
+        self.assertEqual(table.match("string foo"), (2, 6))
+        self.assertEqual(table.match("int32\tfoo"), (1, 5))
+        self.assertIsNone(table.match("strings foo"))
+        self.assertIsNone(table.match("string.Value foo"))
+        self.assertIsNone(table.match("bytes foo"))
+        self.assertIsNone(table.match("= 1"))
+
+    def test_keyword_end(self):
+        self.assertEqual(lexer.keyword_end("map<int32, int32>", "map"), 3)
+        self.assertEqual(lexer.keyword_end("rpc", "rpc"), 3)
+        self.assertEqual(lexer.keyword_end("returns (Foo)", "returns"), 7)
+        self.assertEqual(lexer.keyword_end("mapping = 1;", "map"), -1)
+        self.assertEqual(lexer.keyword_end("map.Foo foo = 1;", "map"), -1)
+
+    def test_string_end(self):
+        self.assertEqual(lexer.string_end('"abc" d'), 4)
+        self.assertEqual(lexer.string_end(r'"a\"b" c'), 5)
+        self.assertEqual(lexer.string_end(r"'a\\' c"), 4)
+        self.assertEqual(lexer.string_end("x 'a' b", 2), 4)
+        self.assertEqual(lexer.string_end('"unterminated'), -1)
+        self.assertEqual(lexer.string_end('"escaped quote\\"'), -1)
+        many_escapes = '"' + "\\n" * 1000 + '\\"\\\\" "x"'
+        self.assertEqual(lexer.string_end(many_escapes), 2005)
+
+    def test_closing_bracket(self):
+        self.assertEqual(lexer.closing_bracket("[a = 1] b"), 6)
+        self.assertEqual(lexer.closing_bracket('[a = "]", b = { c: [1] }];'), 24)
+        self.assertEqual(lexer.closing_bracket("x {'}'} y", 2), 6)
+        self.assertEqual(lexer.closing_bracket("[a = 1"), -1)
+        self.assertEqual(lexer.closing_bracket("[a = { b ]"), -1)
+        self.assertEqual(lexer.closing_bracket('[a = "]]'), -1)
+        self.assertEqual(lexer.closing_bracket("[a = 1 // it's ]\n] b"), 17)
+        self.assertEqual(lexer.closing_bracket("[a = 1 /* ] */] b"), 14)
+        self.assertEqual(lexer.closing_bracket("[a = 1 // ]"), -1)
+        self.assertEqual(lexer.closing_bracket("[a = 1 /* ]"), -1)
+
+    def test_skip_comments(self):
+        self.assertEqual(lexer.skip_comments("  // a\n /* b */ c // d"), "c // d")
+        self.assertEqual(lexer.skip_comments("// a"), "")
+        self.assertEqual(lexer.skip_comments("/* a"), "/* a")
+        self.assertEqual(lexer.skip_comments("/ a"), "/ a")
+
+    def test_option_name(self):
+        for name in ["deprecated", "foo.bar", "(foo)", "(.foo.bar).baz", "(a).b.c"]:
+            self.assertEqual(lexer.OPTION_NAME.match(f"{name} = 1").group(), name)
+        self.assertEqual(lexer.OPTION_NAME.match("(foo = 1").group(), "")
+
+    def test_decode_string(self):
+        self.assertEqual(lexer.decode_string("plain é"), "plain é".encode("utf-8"))
+        self.assertEqual(lexer.decode_string(r"a\n\t\\\'\"\?"), b"a\n\t\\'\"?")
+        self.assertEqual(lexer.decode_string(r"\0\101\1234"), b"\x00A\x534")
+        self.assertEqual(lexer.decode_string(r"\x7\xfFg"), b"\x07\xffg")
+        self.assertEqual(lexer.decode_string(r"café"), "café".encode("utf-8"))
+        self.assertEqual(
+            lexer.decode_string(r"\U0001F600"), "\U0001F600".encode("utf-8")
+        )
+        for invalid in [r"\q", r"\x", r"\u12", r"\400", "trailing\\"]:
+            with self.assertRaises(ValueError):
+                lexer.decode_string(invalid)
+
+
+if __name__ == "__main__":
+    unittest.main()
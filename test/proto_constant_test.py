@@ -2,15 +2,21 @@ import unittest
 from textwrap import dedent
 
 from src.proto_bool import ProtoBool
-from src.proto_constant import ProtoConstant
+from src.proto_constant import (
+    ProtoAggregate,
+    ProtoAggregateField,
+    ProtoAggregateList,
+    ProtoConstant,
+)
 from src.proto_float import ProtoFloat, ProtoFloatSign
 from src.proto_identifier import ProtoIdentifier
 from src.proto_int import ProtoInt, ProtoIntSign
+from src.proto_node import ProtoParseError
 from src.proto_string_literal import ProtoStringLiteral
 
 
 class ConstantTest(unittest.TestCase):
-    # constant = fullIdent | ( [ "-" | "+" ] intLit ) | ( [ "-" | "+" ] floatLit ) | strLit | boolLit
+    # constant = fullIdent | ( [ "-" | "+" ] intLit ) | ( [ "-" | "+" ] floatLit ) | strLit | boolLit | MessageValue
     def test_ident(self):
         self.assertEqual(ProtoConstant.match("a").node.value, ProtoIdentifier("a"))
         self.assertEqual(ProtoConstant.match("a0").node.value, ProtoIdentifier("a0"))
@@ -44,6 +50,103 @@ class ConstantTest(unittest.TestCase):
             ProtoStringLiteral("a", quote='"'),
         )
 
+    def test_aggregate(self):
+        parsed_constant = ProtoConstant.match(
+            '{ name: "}" [foo.ext] { on: true; }, ids: [1, -2] empty {} } rest'
+        )
+        self.assertEqual(
+            parsed_constant.node.value,
+            ProtoAggregate(
+                [
+                    ProtoAggregateField(
+                        ProtoIdentifier("name"),
+                        ProtoConstant(ProtoStringLiteral("}")),
+                    ),
+                    ProtoAggregateField(
+                        ProtoIdentifier("[foo.ext]"),
+                        ProtoConstant(
+                            ProtoAggregate(
+                                [
+                                    ProtoAggregateField(
+                                        ProtoIdentifier("on"),
+                                        ProtoConstant(ProtoBool(True)),
+                                    )
+                                ]
+                            )
+                        ),
+                    ),
+                    ProtoAggregateField(
+                        ProtoIdentifier("ids"),
+                        ProtoAggregateList(
+                            [
+                                ProtoConstant(ProtoInt(1, ProtoIntSign.POSITIVE)),
+                                ProtoConstant(ProtoInt(2, ProtoIntSign.NEGATIVE)),
+                            ]
+                        ),
+                    ),
+                    ProtoAggregateField(
+                        ProtoIdentifier("empty"), ProtoConstant(ProtoAggregate([]))
+                    ),
+                ]
+            ),
+        )
+        self.assertEqual(parsed_constant.remaining_source, "rest")
+        self.assertEqual(
+            parsed_constant.node.serialize(),
+            '{ name: "}" [foo.ext] { on: true } ids: [1, -2] empty {} }',
+        )
+
+    def test_aggregate_angle_brackets(self):
+        expected = ProtoConstant.match("{ a: 1 b { c: 2 } d: [{ e: 3 }] }").node
+        for source in [
+            "< a: 1 b < c: 2 > d: [< e: 3 >] >",
+            "{ a: 1 b: < c: 2 > d: [< e: 3 >] }",
+        ]:
+            parsed_constant = ProtoConstant.match(source)
+            self.assertEqual(parsed_constant.node, expected, source)
+            self.assertEqual(parsed_constant.remaining_source, "")
+            self.assertEqual(
+                parsed_constant.node.serialize(), "{ a: 1 b { c: 2 } d: [{ e: 3 }] }"
+            )
+
+    def test_adjacent_strings(self):
+        parsed_constant = ProtoConstant.match("""{ s: "a" 'b"' /* c */ "\\"d" }""")
+        self.assertEqual(
+            parsed_constant.node.value.fields[0].value.value,
+            ProtoStringLiteral('ab\\"\\"d'),
+        )
+        self.assertEqual(
+            parsed_constant.node.value.fields[0].value.value.bytes_value(), b'ab""d'
+        )
+        parsed_constant = ProtoConstant.match("""'a' "it's" rest""")
+        self.assertEqual(parsed_constant.node.serialize(), r"""'ait\'s'""")
+        self.assertEqual(parsed_constant.remaining_source, "rest")
+
+    def test_aggregate_comments(self):
+        expected = ProtoConstant.match("{ a: 1 b: [2, 3] c { d: 4 } }").node
+        for source in [
+            "{ a: 1 // c\n b: [2, 3] c { d: 4 } }",
+            "{ a: 1 /* c */ b: [2, 3] c { d: 4 } }",
+            "{ // a\n a: /* b */ 1, b /* c */ : [ /* d */ 2, // e\n 3 ] c { d: 4 /* f */ } }",
+        ]:
+            parsed_constant = ProtoConstant.match(source)
+            self.assertEqual(parsed_constant.node, expected, source)
+            self.assertEqual(parsed_constant.remaining_source, "")
+
+    def test_aggregate_invalid(self):
+        for source in [
+            "{ a: 1",
+            "{ a 1 }",
+            "{ a: [1 2] }",
+            "{ 1: 2 }",
+            "{ a: 1 /* b: 2 }",
+            "{ a < b: 1 } >",
+            "< a: 1 }",
+            "{ a: 'b' 'c }",
+        ]:
+            with self.assertRaises(ProtoParseError):
+                ProtoConstant.match(source)
+
     def test_bool(self):
         self.assertEqual(ProtoConstant.match("true").node.value, ProtoBool(True))
         self.assertEqual(ProtoConstant.match("false").node.value, ProtoBool(False))
@@ -95,6 +198,10 @@ class ConstantTest(unittest.TestCase):
             ProtoConstant.match("0x72G42")
 
     def test_float(self):
+        self.assertEqual(
+            ProtoConstant.match("0.5").node.value,
+            ProtoFloat(0.5, ProtoFloatSign.POSITIVE),
+        )
         self.assertEqual(
             ProtoConstant.match("2834.235928").node.value,
             ProtoFloat(2834.235928, ProtoFloatSign.POSITIVE),
@@ -325,6 +325,56 @@ class EnumTest(unittest.TestCase):
             ],
         )
 
+    def test_enum_lookups(self):
+        parsed_enum = ProtoEnum.match(
+            dedent(
+                """
+            enum FooEnum {
+                option allow_alias = true;
+                FE_UNDEFINED = 0;
+                FE_VALONE = 1;
+                FE_ALIAS = 1;
+                FE_NEGATIVE = -1;
+            }
+        """.strip()
+            ),
+        ).node
+        self.assertEqual(
+            parsed_enum.options,
+            [
+                ProtoOption(
+                    ProtoIdentifier("allow_alias"), ProtoConstant(ProtoBool(True))
+                )
+            ],
+        )
+        self.assertEqual(len(parsed_enum.values), 4)
+        self.assertIs(parsed_enum["FE_ALIAS"], parsed_enum.nodes[3])
+        self.assertIs(parsed_enum["allow_alias"], parsed_enum.nodes[0])
+        self.assertNotIn("FE_VALTWO", parsed_enum)
+        with self.assertRaises(KeyError):
+            parsed_enum["FE_VALTWO"]
+        self.assertIs(parsed_enum.value_by_number(1), parsed_enum.nodes[2])
+        self.assertIs(parsed_enum.value_by_number(-1), parsed_enum.nodes[4])
+        self.assertIsNone(parsed_enum.value_by_number(2))
+
+        new_value = ProtoEnumValue(
+            ProtoIdentifier("FE_VALTWO"), ProtoInt(2, ProtoIntSign.POSITIVE)
+        )
+        parsed_enum.nodes.append(new_value)
+        self.assertIs(new_value.parent, parsed_enum)
+        self.assertEqual(parsed_enum.values[-1], new_value)
+        self.assertIs(parsed_enum["FE_VALTWO"], new_value)
+        self.assertIs(parsed_enum.value_by_number(2), new_value)
+
+        del parsed_enum.nodes[1:3]
+        self.assertEqual(len(parsed_enum.values), 3)
+        self.assertIs(parsed_enum.value_by_number(1), parsed_enum.nodes[1])
+
+        new_value.value = ProtoInt(3, ProtoIntSign.POSITIVE)
+        new_value.mark_changed()
+        self.assertIsNone(parsed_enum.value_by_number(2))
+        self.assertIs(parsed_enum.value_by_number(3), new_value)
+
     def test_diff_same_enum_returns_empty(self):
         pe1 = ProtoEnum(
             ProtoIdentifier("MyEnum"),
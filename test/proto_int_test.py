@@ -30,6 +30,13 @@ class IntTest(unittest.TestCase):
         )
         with self.assertRaises(ValueError):
             ProtoInt.match("0x72G42")
+        with self.assertRaises(ValueError):
+            ProtoInt.match("0x;")
+
+    def test_float_is_not_int(self):
+        self.assertIsNone(ProtoInt.match("0.5"))
+        self.assertIsNone(ProtoInt.match("0e1"))
+        self.assertIsNone(ProtoInt.match("12.5"))
 
 
 if __name__ == "__main__":
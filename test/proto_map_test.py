@@ -73,6 +73,18 @@ class MapTest(unittest.TestCase):
             ],
         )
 
+    def test_map_with_option_containing_bracket(self):
+        parsed_map = ProtoMap.match("map <string, string> m = 1 [(foo) = ']'];")
+        self.assertEqual(
+            parsed_map.node.options,
+            [
+                ProtoMessageFieldOption(
+                    ProtoIdentifier("(foo)"),
+                    ProtoConstant(ProtoStringLiteral("]", quote="'")),
+                )
+            ],
+        )
+
     def test_map_message_value(self):
         parsed_map_simple = ProtoMap.match("map <string, string> string_map = 11;")
         self.assertEqual(
@@ -87,6 +99,18 @@ class MapTest(unittest.TestCase):
             ),
         )
 
+    def test_map_value_type_keyword_is_whole_word(self):
+        parsed_map = ProtoMap.match("map <int32, bool_wrapper> wrapped_map = 12;")
+        self.assertEqual(parsed_map.node.key_type, ProtoMapKeyTypesEnum.INT32)
+        self.assertEqual(
+            parsed_map.node.value_type, ProtoMapValueTypesEnum.ENUM_OR_MESSAGE
+        )
+        self.assertEqual(
+            parsed_map.node.enum_or_message_type_name,
+            ProtoEnumOrMessageIdentifier("bool_wrapper"),
+        )
+        self.assertIsNone(ProtoMap.match("map <stringy, int32> bad_map = 13;"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,7 @@
 import unittest
 
+from src.proto_bool import ProtoBool
+from src.proto_constant import ProtoConstant
 from src.proto_identifier import (
     ProtoEnumOrMessageIdentifier,
     ProtoFullIdentifier,
@@ -10,9 +12,11 @@ from src.proto_message_field import (
     ProtoMessageField,
     ProtoMessageFieldAdded,
     ProtoMessageFieldNameChanged,
+    ProtoMessageFieldOption,
     ProtoMessageFieldRemoved,
     ProtoMessageFieldTypesEnum,
 )
+from src.proto_string_literal import ProtoStringLiteral
 
 
 class MessageFieldTest(unittest.TestCase):
@@ -45,6 +49,9 @@ class MessageFieldTest(unittest.TestCase):
                 True,
             ),
         )
+        self.assertEqual(
+            string_field.node.serialize(), "optional string single_field = 1;"
+        )
 
     def test_field_cannot_have_repeated_and_optional(self):
         with self.assertRaises(ValueError):
@@ -108,6 +115,57 @@ class MessageFieldTest(unittest.TestCase):
             ),
         )
 
+    def test_field_type_keyword_is_whole_word(self):
+        for type_name in ["string.Value", "bytesWrapper", "int32_or_not"]:
+            parsed_field = ProtoMessageField.match(f"{type_name} some_field = 1;")
+            self.assertEqual(
+                parsed_field.node.type, ProtoMessageFieldTypesEnum.ENUM_OR_MESSAGE
+            )
+            self.assertEqual(
+                parsed_field.node.enum_or_message_type_name.identifier, type_name
+            )
+
+    def test_field_type_followed_by_any_whitespace(self):
+        parsed_field = ProtoMessageField.match("repeated\tsint64\n  some_field = 1;")
+        self.assertEqual(parsed_field.node.type, ProtoMessageFieldTypesEnum.SINT64)
+        self.assertTrue(parsed_field.node.repeated)
+        self.assertEqual(parsed_field.node.name, ProtoIdentifier("some_field"))
+
+    def test_field_options_containing_commas_and_brackets(self):
+        parsed_field = ProtoMessageField.match(
+            'string some_field = 1 [(foo) = "a, b]", deprecated = true] ;'
+        )
+        self.assertEqual(
+            parsed_field.node.options,
+            [
+                ProtoMessageFieldOption(
+                    ProtoIdentifier("(foo)"),
+                    ProtoConstant(ProtoStringLiteral("a, b]")),
+                ),
+                ProtoMessageFieldOption(
+                    ProtoIdentifier("deprecated"), ProtoConstant(ProtoBool(True))
+                ),
+            ],
+        )
+        self.assertEqual(parsed_field.remaining_source, "")
+
+    def test_field_options_containing_comments(self):
+        parsed_field = ProtoMessageField.match(
+            "string some_field = 1 [ // it's\n"
+            '(foo) = { a: "b" /* ] */ }, /* c */ deprecated = true // ]\n];'
+        )
+        self.assertEqual(
+            parsed_field.node.serialize(),
+            'string some_field = 1 [ (foo) = { a: "b" }, deprecated = true ];',
+        )
+        self.assertEqual(parsed_field.remaining_source, "")
+
+    def test_field_options_unterminated(self):
+        with self.assertRaises(ValueError):
+            ProtoMessageField.match("string some_field = 1 [deprecated = true;")
+        with self.assertRaises(ValueError):
+            ProtoMessageField.match("string some_field = 1 [a = 1 b = 2];")
+
     def test_field_starts_with_period(self):
         parsed_field_with_type_starting_with_period = ProtoMessageField.match(
             ".google.proto.FooType enum_or_message_field = 1;"
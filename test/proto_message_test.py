@@ -511,6 +511,146 @@ class MessageTest(unittest.TestCase):
             ],
         )
 
+    def test_message_normalize_is_cached(self):
+        message = ProtoMessage.match(
+            dedent(
+                """
+                message MyMessage {
+                    // comment
+                    string foo = 2;
+                    message Nested {
+                        bool bar = 1;
+                    }
+                    bool baz = 1;
+                }
+                """.strip()
+            ),
+        ).node
+        normalized = message.normalize()
+        self.assertIs(message.normalize(), normalized)
+        # Already-normalized trees are shared rather than copied.
+        self.assertIs(normalized.normalize(), normalized)
+        self.assertIs(normalized.nodes[0], message.nodes[2])
+        self.assertIs(normalized.nodes[0].parent, message)
+
+        message.nodes[2].nodes[0].name = ProtoIdentifier("renamed")
+        message.nodes[2].nodes[0].mark_changed()
+        renormalized = message.normalize()
+        self.assertIsNot(renormalized, normalized)
+        self.assertEqual(
+            renormalized.nodes[0].nodes[0].name, ProtoIdentifier("renamed")
+        )
+
+    def test_message_normalize_sees_list_changes(self):
+        message = ProtoMessage.match(
+            dedent(
+                """
+                message MyMessage {
+                    string foo = 1 [deprecated = true];
+                    reserved 5 to 8;
+                }
+                """.strip()
+            ),
+        ).node
+        field, reserved = message.nodes
+        message.normalize()
+
+        field.options.clear()
+        self.assertEqual(
+            message.normalize().nodes_of_type(ProtoMessageField)[0].options, []
+        )
+
+        field.options.append(
+            ProtoMessageField.match("int32 a = 1 [packed = true];").node.options[0]
+        )
+        self.assertIs(field.options[0].parent, field)
+        self.assertEqual(
+            message.normalize().nodes_of_type(ProtoMessageField)[0].serialize(),
+            "string foo = 1 [ packed = true ];",
+        )
+
+        reserved.ranges[0] = ProtoRange(ProtoInt(3, ProtoIntSign.POSITIVE))
+        self.assertEqual(
+            message.normalize().nodes_of_type(ProtoReserved)[0].serialize(),
+            "reserved 3;",
+        )
+
+    def test_message_normalize_cache_is_per_tree(self):
+        first = ProtoMessage.match("message First { bool foo = 2; bool bar = 1; }").node
+        second = ProtoMessage.match("message Second { bool bar = 1; }").node
+        normalized = first.normalize()
+        second.nodes[0].name = ProtoIdentifier("renamed")
+        second.nodes[0].mark_changed()
+        self.assertIs(first.normalize(), normalized)
+
+        first.clear_caches()
+        self.assertIsNot(first.normalize(), normalized)
+
+    def test_message_lookups(self):
+        message = ProtoMessage.match(
+            dedent(
+                """
+                message MyMessage {
+                    string foo = 1;
+                    message Nested {}
+                    map<string, int32> bar = 2;
+                    oneof baz {
+                        bool bat = 3;
+                    }
+                }
+                """.strip()
+            ),
+        ).node
+        self.assertEqual(
+            message.message_fields,
+            [
+                ProtoMessageField(
+                    ProtoMessageFieldTypesEnum.STRING,
+                    ProtoIdentifier("foo"),
+                    ProtoInt(1, ProtoIntSign.POSITIVE),
+                )
+            ],
+        )
+        self.assertEqual(message.maps, [message.nodes[2]])
+        self.assertEqual(message.oneofs, [message.nodes[3]])
+        self.assertIs(message["Nested"], message.nodes[1])
+        self.assertIs(message["bar"], message.nodes[2])
+        self.assertIs(message["baz"]["bat"], message.nodes[3].nodes[0])
+
+        new_field = ProtoMessageField(
+            ProtoMessageFieldTypesEnum.BOOL,
+            ProtoIdentifier("qux"),
+            ProtoInt(4, ProtoIntSign.POSITIVE),
+        )
+        message.nodes.insert(0, new_field)
+        self.assertIs(new_field.parent, message)
+        self.assertEqual(message.message_fields[0], new_field)
+        self.assertIs(message["qux"], new_field)
+
+        # Changing what's returned doesn't change the message.
+        message.message_fields.clear()
+        self.assertEqual(len(message.message_fields), 2)
+        fields = message.nodes_of_type(ProtoMessageField)
+        self.assertIsInstance(fields, tuple)
+        self.assertIs(message.nodes_of_type(ProtoMessageField), fields)
+
+        # Containers iterate over their nodes, and only names index into them.
+        self.assertEqual(list(message), message.nodes)
+        self.assertIn(new_field, message)
+        with self.assertRaises(TypeError):
+            message[0]
+
+        new_field.name = ProtoIdentifier("renamed")
+        new_field.mark_changed()
+        self.assertNotIn("qux", message)
+        self.assertIs(message["renamed"], new_field)
+
+        message.nodes = []
+        self.assertEqual(message.message_fields, [])
+        self.assertEqual(message.nodes_of_type(ProtoMessageField), ())
+        self.assertNotIn(new_field, message)
+        self.assertNotIn("foo", message)
+
     def test_diff_same_message_returns_empty(self):
         pm1 = ProtoMessage(
             ProtoIdentifier("MyMessage"),
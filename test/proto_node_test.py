@@ -0,0 +1,83 @@
+import gc
+import unittest
+import weakref
+
+from src.proto_bool import ProtoBool
+from src.proto_constant import ProtoConstant
+from src.proto_identifier import ProtoIdentifier
+from src.proto_node import ProtoNode, ProtoParseError
+from src.proto_option import ProtoOption
+
+
+class ProtoParseErrorTest(unittest.TestCase):
+    def test_snippet_is_bounded(self):
+        proto_source = "option foo bar;" + "x" * 10000
+        error = ProtoParseError("Proto has invalid option", proto_source, "=")
+        self.assertEqual(error.snippet, proto_source[: ProtoParseError.SNIPPET_LENGTH])
+        self.assertEqual(error.remaining_length, len(proto_source))
+        self.assertLess(len(str(error)), 100)
+
+    def test_str(self):
+        self.assertEqual(
+            str(ProtoParseError("Proto has invalid option", "foo bar;", "=")),
+            "Proto has invalid option, expecting =: foo bar;",
+        )
+        self.assertEqual(
+            str(ProtoParseError("Proto has invalid hex", "0xZZ;")),
+            "Proto has invalid hex: 0xZZ;",
+        )
+        self.assertEqual(
+            str(ProtoParseError("Proto has invalid hex", "0xZZ" + "0" * 100)),
+            "Proto has invalid hex: 0xZZ000000000000000000000000000000000000...",
+        )
+
+    def test_position(self):
+        full_source = '  syntax = "proto3";\nmessage Foo {\n  bar\n}\n\n'
+        error = ProtoParseError("Could not parse partial content", "bar\n}")
+        self.assertEqual(error.offset(full_source), full_source.index("bar"))
+        self.assertEqual(error.line_and_column(full_source), (3, 3))
+
+    def test_is_value_error(self):
+        with self.assertRaises(ValueError):
+            raise ProtoParseError("Proto has invalid syntax", "foo")
+
+
+class ProtoNodeParentTest(unittest.TestCase):
+    def setUp(self):
+        gc.disable()
+        self.addCleanup(gc.enable)
+
+    def option(self) -> ProtoOption:
+        return ProtoOption(ProtoIdentifier("foo"), ProtoConstant(ProtoBool(True)))
+
+    def test_strong_parents(self):
+        option = self.option()
+        value = option.value
+        self.assertIs(value.parent, option)
+        # The option and its value reference each other, so only the cyclic
+        # garbage collector can free them.
+        option_ref = weakref.ref(option)
+        del option, value
+        self.assertIsNotNone(option_ref())
+        gc.collect()
+        self.assertIsNone(option_ref())
+
+    def test_weak_parents(self):
+        ProtoNode.weak_parents = True
+        self.addCleanup(setattr, ProtoNode, "weak_parents", False)
+        option = self.option()
+        value = option.value
+        self.assertIs(value.parent, option)
+        self.assertIs(value.value.parent, value)
+
+        option_ref = weakref.ref(option)
+        del option
+        self.assertIsNone(option_ref())
+        self.assertIsNone(value.parent)
+
+        value.parent = None
+        self.assertIsNone(value.parent)
+
+
+if __name__ == "__main__":
+    unittest.main()
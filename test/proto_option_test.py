@@ -1,10 +1,11 @@
 import unittest
 from textwrap import dedent
 
-from src.proto_constant import ProtoConstant
+from src.proto_constant import ProtoAggregate, ProtoConstant
 from src.proto_float import ProtoFloat, ProtoFloatSign
 from src.proto_identifier import ProtoFullIdentifier, ProtoIdentifier
 from src.proto_int import ProtoInt, ProtoIntSign
+from src.proto_node import ProtoParseError
 from src.proto_option import (
     ProtoOption,
     ProtoOptionAdded,
@@ -210,6 +211,40 @@ class OptionTest(unittest.TestCase):
             ProtoConstant(ProtoFloat(float(120), ProtoFloatSign.NEGATIVE)),
         )
 
+    def test_aggregate_option(self):
+        aggregate_option = ProtoOption.match(
+            'option (foo) = { name: "a; }" inner { size: -1 } sizes: [1, 2] };'
+        )
+        self.assertEqual(aggregate_option.node.name, ProtoIdentifier("(foo)"))
+        self.assertIsInstance(aggregate_option.node.value.value, ProtoAggregate)
+        self.assertEqual(
+            aggregate_option.node.serialize(),
+            'option (foo) = { name: "a; }" inner { size: -1 } sizes: [1, 2] };',
+        )
+        self.assertEqual(aggregate_option.remaining_source, "")
+
+    def test_adjacent_string_option(self):
+        string_option = ProtoOption.match('option (foo) = "a" // b\n "c";')
+        self.assertEqual(
+            string_option.node.value, ProtoConstant(ProtoStringLiteral("ac"))
+        )
+        self.assertEqual(string_option.node.serialize(), 'option (foo) = "ac";')
+
+    def test_match_list(self):
+        options, remaining_source = ProtoOption.match_list(
+            "[ (foo).bar = 'x, ]' , baz = { a: 1, b: 2 } ] ;"
+        )
+        self.assertEqual(
+            [option.serialize() for option in options],
+            ["option (foo).bar = 'x, ]';", "option baz = { a: 1 b: 2 };"],
+        )
+        self.assertEqual(remaining_source, ";")
+
+    def test_match_list_invalid(self):
+        for source in ["[]", "[foo = 1", "[foo = 1;]", "[foo]", "[foo = 1,]"]:
+            with self.assertRaises(ProtoParseError):
+                ProtoOption.match_list(source)
+
     def test_diff_same_option_returns_empty(self):
         po1 = ProtoOption(
             ProtoIdentifier("some.custom.option"),
@@ -223,6 +223,20 @@ class ServiceTest(unittest.TestCase):
             ],
         )
 
+    def test_service_rpc_keywords_without_spaces(self):
+        parsed_rpc = ProtoServiceRPC.match(
+            "rpc OneRPC(OneRPCRequest) returns(OneRPCResponse);"
+        )
+        self.assertEqual(
+            parsed_rpc.node,
+            ProtoServiceRPC(
+                ProtoIdentifier("OneRPC"),
+                ProtoEnumOrMessageIdentifier("OneRPCRequest"),
+                ProtoEnumOrMessageIdentifier("OneRPCResponse"),
+            ),
+        )
+        self.assertIsNone(ProtoServiceRPC.match("rpcs OneRPC (A) returns (B);"))
+
     def test_service_rpc_options(self):
         service_with_options = ProtoService.match(
             dedent(
@@ -20,6 +20,17 @@ class StringLiteralTest(unittest.TestCase):
         parsed_double_quote = ProtoStringLiteral.match("""\"foo\"\"foobar\"""")
         self.assertEqual(parsed_double_quote.remaining_source, '"foobar"')
 
+    def test_escaped_backslash(self):
+        parsed = ProtoStringLiteral.match("""'foo\\\\' bar""")
+        self.assertEqual(parsed.node.value, "foo\\\\")
+        self.assertEqual(parsed.remaining_source, "bar")
+
+    def test_bytes_value(self):
+        parsed = ProtoStringLiteral.match(r"""'caf\u00e9 \x41\n' bar""")
+        self.assertEqual(parsed.node.value, r"caf\u00e9 \x41\n")
+        self.assertEqual(parsed.node.bytes_value(), "café A\n".encode("utf-8"))
+        self.assertEqual(parsed.node.serialize(), r"""'caf\u00e9 \x41\n'""")
+
     def test_missing_quote(self):
         self.assertIsNone(ProtoStringLiteral.match("""'foo"""))
         self.assertIsNone(ProtoStringLiteral.match("""foo'"""))
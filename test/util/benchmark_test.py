@@ -0,0 +1,118 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.proto_node import ProtoNode
+from src.util.benchmark import (
+    GCTimer,
+    Measurement,
+    batch_corpus,
+    main,
+    scaling_exponents,
+    synthetic_corpus,
+    time_operation,
+)
+from src.util.parser import Parser
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_synthetic_corpus(self):
+        corpus = synthetic_corpus(500)
+        self.assertAlmostEqual(corpus.lines, 500, delta=100)
+        (before,) = corpus.texts
+        (after,) = corpus.changed_texts
+        self.assertNotEqual(Parser.loads(before).diff(Parser.loads(after)), [])
+
+    def test_batch_corpus(self):
+        corpus = batch_corpus(3, lines=200)
+        self.assertEqual(corpus.name, "batch-3x200")
+        self.assertEqual(len(corpus.texts), 3)
+        self.assertEqual(len(set(corpus.texts)), 3)
+        self.assertEqual(corpus.lines, sum(t.count("\n") + 1 for t in corpus.texts))
+
+    def test_scaling_exponents(self):
+        measurements = [
+            Measurement(f"synthetic-{lines}", lines, operation, 1, seconds, 0, 0)
+            for lines in (1000, 10000)
+            for operation, seconds in [
+                ("linear", lines * 1e-6),
+                ("quadratic", lines**2 * 1e-9),
+            ]
+        ]
+        exponents = scaling_exponents(measurements)
+        self.assertAlmostEqual(exponents["linear"], 1)
+        self.assertAlmostEqual(exponents["quadratic"], 2)
+
+        # Costs per line at small sizes don't hide quadratic growth at large ones.
+        measurements = [
+            Measurement(f"synthetic-{lines}", lines, "parse", 1, seconds, 0, 0)
+            for lines in (100, 1000, 10000, 100000)
+            for seconds in [lines * 1e-6 + lines**2 * 1e-9]
+        ]
+        self.assertGreater(scaling_exponents(measurements)["parse"], 1.8)
+
+    def test_time_operation(self):
+        collections = []
+
+        def operation():
+            collections.append(gc.isenabled())
+
+        runs, best, gc_seconds = time_operation(operation, 0, min_runs=3)
+        self.assertEqual(runs, 3)
+        self.assertGreaterEqual(best, 0)
+        self.assertGreaterEqual(gc_seconds, 0)
+        self.assertEqual(collections, [False, False, False, True])
+        self.assertTrue(gc.isenabled())
+
+    def test_gc_timer(self):
+        with GCTimer() as gc_timer:
+            gc.collect()
+            gc.collect()
+        gc.collect()
+        self.assertEqual(gc_timer.collections, 2)
+        self.assertGreater(gc_timer.seconds, 0)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                args = [
+                    "--sizes",
+                    "50,100",
+                    "--field-heavy-lines",
+                    "100",
+                    "--min-time",
+                    "0",
+                    "--min-runs",
+                    "1",
+                    "--output",
+                    output,
+                ]
+                self.assertEqual(main(args), 0)
+                self.assertEqual(main(args + ["--baseline", output]), 0)
+            with open(output, "r") as results_file:
+                results = json.load(results_file)
+        self.assertEqual(
+            {m["operation"] for m in results["measurements"]},
+            {"parse", "load", "serialize", "normalize", "diff", "compatibility"},
+        )
+        self.assertIn("parse", results["scaling_exponents"])
+        self.assertIn("Scaling exponents", stdout.getvalue())
+        self.assertFalse(results["weak_parents"])
+
+    def test_main_weak_parents(self):
+        self.addCleanup(setattr, ProtoNode, "weak_parents", False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = ["--sizes", "50", "--field-heavy-lines", "0", "--min-time", "0"]
+            args += ["--min-runs", "1"]
+            args += ["--batch-files", "2", "--no-memory", "--weak-parents"]
+            self.assertEqual(main(args), 0)
+        self.assertTrue(ProtoNode.weak_parents)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import gc
+import io
+import unittest
+from textwrap import dedent
+
+from src.proto_node import ProtoErrorNode, ProtoNode
+from src.proto_package import ProtoPackage
+from src.util import binary_ast
+from src.util.parser import Parser
+
+
+class BinaryAstTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.proto_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package foo.bar;
+                import weak "a.proto";
+                import public 'b.proto';
+                option java_package = "x.y";
+                option (custom).value = -1.5e3;
+                option (custom).aggregate = { a: 1 b { c: "x" } list: [1, 2] };
+                // single-line comment
+                /* multi-line comment */
+                message Outer {
+                    option deprecated = true;
+                    reserved 1, 3 to 5, 9 to max;
+                    reserved "a", "b";
+                    extensions 100 to 200;
+                    repeated int32 ids = 1 [packed = true, (custom) = inf];
+                    optional .foo.Bar bar = 2;
+                    map<string, Outer> children = 3 [deprecated = false];
+                    map<int32, float> weights = 4;
+                    oneof choice {
+                        option (custom) = 1;
+                        string text = 5;
+                        Outer other = 6;
+                    }
+                    enum Kind {
+                        option allow_alias = true;
+                        KIND_UNSPECIFIED = 0;
+                        KIND_NEGATIVE = -1 [(custom) = "q"];
+                    }
+                    message Inner {}
+                }
+                extend Outer {
+                    int32 extended = 101;
+                }
+                service Greeter {
+                    option (custom) = 1;
+                    rpc Hello (Outer) returns (stream Outer) {
+                        option (custom) = true;
+                    }
+                    rpc Stream (stream Outer) returns (Outer);
+                }
+                """
+            )
+        )
+
+    def assertParentsLinked(self, node: ProtoNode):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for child in node.children():
+                self.assertIs(child.parent, node)
+                stack.append(child)
+
+    def assertSameAttributes(self, first: ProtoNode, second: ProtoNode):
+        # Loaded nodes skip their constructors, so check they end up with the same
+        # attributes as parsed ones, including which lists are ProtoLists.
+        stack = [(first, second)]
+        while stack:
+            first, second = stack.pop()
+            self.assertEqual(
+                sorted(binary_ast.instance_dict(first)),
+                sorted(binary_ast.instance_dict(second)),
+            )
+            for name, value in binary_ast.instance_dict(first).items():
+                if isinstance(value, list):
+                    self.assertIs(type(value), type(getattr(second, name)))
+            stack.extend(zip(first.children(), second.children()))
+
+    def test_round_trip(self):
+        loaded = binary_ast.loads(binary_ast.dumps(self.proto_file))
+        self.assertEqual(loaded, self.proto_file)
+        self.assertEqual(loaded.serialize(), self.proto_file.serialize())
+        self.assertIsNone(loaded.parent)
+        self.assertParentsLinked(loaded)
+        self.assertSameAttributes(loaded, self.proto_file)
+
+        # Loaded nodes are indexed and behave just like parsed ones.
+        self.assertEqual(loaded.package, self.proto_file.package)
+        outer = loaded.messages[0]
+        self.assertIs(outer["choice"], outer.oneofs[0])
+        self.assertEqual(
+            loaded.nodes[-1].normalize(), self.proto_file.nodes[-1].normalize()
+        )
+        outer.nodes.pop()
+        self.assertNotEqual(loaded, self.proto_file)
+
+    def test_round_trip_weak_parents(self):
+        ProtoNode.weak_parents = True
+        self.addCleanup(setattr, ProtoNode, "weak_parents", False)
+        loaded = binary_ast.loads(binary_ast.dumps(self.proto_file))
+        self.assertEqual(loaded, self.proto_file)
+        self.assertParentsLinked(loaded)
+        message = loaded.messages[0]
+        del loaded
+        self.assertIsNone(message.parent)
+
+    def test_round_trip_error_nodes(self):
+        proto_file, _ = Parser.loads_with_diagnostics(
+            dedent(
+                """
+                syntax = "proto3";
+                message Foo {
+                    reserved 1, baz;
+                    string bar = 1;
+                }
+                """
+            )
+        )
+        loaded = binary_ast.loads(binary_ast.dumps(proto_file))
+        self.assertEqual(loaded, proto_file)
+        error_node = loaded.messages[0].nodes[0]
+        self.assertIsInstance(error_node, ProtoErrorNode)
+        original_error = proto_file.messages[0].nodes[0].error
+        self.assertEqual(str(error_node.error), str(original_error))
+        self.assertEqual(
+            error_node.error.remaining_length, original_error.remaining_length
+        )
+
+    def test_round_trip_deeply_nested(self):
+        depth = 5000
+        proto_file = Parser.loads(
+            "\n".join(
+                ['syntax = "proto3";']
+                + [f"message M{i} {{" for i in range(depth)]
+                + ["}"] * depth
+            )
+        )
+        loaded = binary_ast.loads(binary_ast.dumps(proto_file))
+        self.assertEqual(loaded, proto_file)
+
+    def test_dump_and_load(self):
+        output = io.BytesIO()
+        binary_ast.dump(self.proto_file, output)
+        output.seek(0)
+        self.assertEqual(binary_ast.load(output), self.proto_file)
+
+    def test_invalid_data(self):
+        data = binary_ast.dumps(self.proto_file)
+        for invalid in [
+            b"",
+            b"not a proto",
+            binary_ast.MAGIC + b"\x7f",
+            data[:-3],
+            data + b"\x00\x05",
+        ]:
+            with self.assertRaises(ValueError, msg=invalid):
+                binary_ast.loads(invalid)
+
+    def test_invalid_file(self):
+        proto_file = Parser.loads('syntax = "proto3";\npackage foo;\n')
+        proto_file.nodes.append(ProtoPackage("bar"))
+        with self.assertRaises(ValueError):
+            binary_ast.loads(binary_ast.dumps(proto_file))
+
+    def test_loads_restores_gc(self):
+        data = binary_ast.dumps(self.proto_file)
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(binary_ast.loads(data), self.proto_file)
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(binary_ast.loads(data, pause_gc=False), self.proto_file)
+
+        gc.disable()
+        try:
+            binary_ast.loads(data)
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.util.cli import COMMANDS, main
+
+# How long a fresh process may take to import everything a command needs, on a
+# typical development machine.
+IMPORT_BUDGET_SECONDS = 0.05
+# Standard library modules that would noticeably slow down every command.
+SLOW_IMPORTS = ["argparse", "ast", "dataclasses", "inspect", "subprocess"]
+
+MEASURE_IMPORTS = """
+import sys, time
+start = time.perf_counter()
+from src.util.cli import load_command
+load_command(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+
+class CliTest(unittest.TestCase):
+    def run_python(self, pycache: str, *args: str) -> list[str]:
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        # Bytecode is cached like it would be in an install, so only the imports
+        # themselves are timed.
+        env["PYTHONPYCACHEPREFIX"] = pycache
+        result = subprocess.run(
+            [sys.executable, "-c", *args],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True,
+        )
+        return result.stdout.split()
+
+    def test_commands_avoid_slow_imports(self):
+        with tempfile.TemporaryDirectory() as pycache:
+            for command in ["parse", "check"]:
+                imported = self.run_python(
+                    pycache,
+                    "import sys; from src.util.cli import load_command; "
+                    f"load_command({command!r}); "
+                    f"print(*[m for m in {SLOW_IMPORTS!r} if m in sys.modules])",
+                )
+                self.assertEqual(imported, [], command)
+
+    # Timing on shared CI machines is too noisy for an absolute budget.
+    @unittest.skipIf(
+        "CI" in os.environ or "TEST_TMPDIR" in os.environ,
+        "import timing is only checked locally",
+    )
+    def test_import_budget(self):
+        with tempfile.TemporaryDirectory() as pycache:
+            for command in ["parse", "check"]:
+                self.run_python(pycache, MEASURE_IMPORTS, command)
+                seconds = min(
+                    float(self.run_python(pycache, MEASURE_IMPORTS, command)[0])
+                    for _ in range(5)
+                )
+                self.assertLess(seconds, IMPORT_BUDGET_SECONDS, command)
+
+    def test_usage_imports_nothing(self):
+        with tempfile.TemporaryDirectory() as pycache:
+            imported = self.run_python(
+                pycache,
+                "import sys; from src.util.cli import usage; usage(); "
+                "print('src.proto_file' in sys.modules)",
+            )
+        self.assertEqual(imported, ["False"])
+
+    def test_parse(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".proto") as proto_file:
+            proto_file.write('syntax = "proto3";\nmessage Foo {}\n')
+            proto_file.flush()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(main(["parse", proto_file.name]), 0)
+        self.assertIn("message Foo {", output.getvalue())
+
+    def test_profile_report(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".proto") as proto_file:
+            proto_file.write('syntax = "proto3";\nmessage Foo {}\n')
+            proto_file.flush()
+            stderr = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()):
+                with contextlib.redirect_stderr(stderr):
+                    args = ["parse", "--profile-report", "-", proto_file.name]
+                    self.assertEqual(main(args), 0)
+                    args = ["check", "--profile-report", "-"]
+                    self.assertEqual(main(args + [proto_file.name] * 2), 0)
+        self.assertIn("ProtoMessage.match", stderr.getvalue())
+
+    def test_usage(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(main(["--help"]), 0)
+        for command in COMMANDS:
+            self.assertIn(command, output.getvalue())
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["unknown"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import importlib.util
+import unittest
+from textwrap import dedent
+
+from src.util.codec_generator import compile_codecs, generate_codecs
+from src.util.descriptor import file_descriptor_proto
+from src.util.parser import Parser
+
+HAS_PROTOBUF = (
+    importlib.util.find_spec("google") is not None
+    and importlib.util.find_spec("google.protobuf") is not None
+)
+
+PERSON = dedent(
+    """
+    syntax = "proto3";
+    package example;
+    message Person {
+      string name = 1;
+      sint32 delta = 2;
+      repeated int32 scores = 3;
+      map<string, Person> friends = 4;
+      oneof contact { string email = 5; fixed64 phone = 6; }
+      double height = 7;
+      Kind kind = 8;
+      enum Kind { KIND_UNSPECIFIED = 0; HUMAN = 1; }
+    }
+    """
+)
+
+
+MERGE = dedent(
+    """
+    syntax = "proto3";
+    package m;
+    message Inner {
+      sint32 a = 1;
+      string s = 2;
+      repeated int32 r = 3;
+      Inner child = 4;
+      map<string, Inner> m = 5;
+    }
+    message Outer {
+      Inner sub = 1;
+      oneof choice { Inner first = 2; string other = 3; }
+    }
+    """
+)
+
+
+class CodecGeneratorTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.codecs = compile_codecs([Parser.loads(PERSON)])
+        self.person = {
+            "name": "Ada",
+            "delta": -2,
+            "scores": [1, 300],
+            "friends": {"bob": {"name": "Bob"}},
+            "email": "ada@example.com",
+            "height": 1.5,
+            "kind": 1,
+        }
+        # Serialized by the protobuf runtime from the same message.
+        self.encoded = (
+            b'\n\x03Ada\x10\x03\x1a\x03\x01\xac\x02"\x0c\n\x03bob\x12\x05\n\x03Bob'
+            b"*\x0fada@example.com9\x00\x00\x00\x00\x00\x00\xf8?@\x01"
+        )
+
+    def test_decode(self):
+        self.assertEqual(self.codecs.decode_example_Person(self.encoded), self.person)
+        self.assertEqual(
+            self.codecs.DECODERS["example.Person"](memoryview(self.encoded)),
+            self.person,
+        )
+
+    def test_encode(self):
+        self.assertEqual(self.codecs.encode_example_Person(self.person), self.encoded)
+        self.assertEqual(
+            self.codecs.ENCODERS["example.Person"]({"name": "", "scores": []}), b""
+        )
+
+    def test_unpacked_repeated_scalars(self):
+        self.assertEqual(
+            self.codecs.decode_example_Person(b"\x18\x01\x18\x02\x1a\x01\x03"),
+            {"scores": [1, 2, 3]},
+        )
+
+    def test_oneof_keeps_last_member(self):
+        self.assertEqual(
+            self.codecs.decode_example_Person(
+                b"*\x01a1\x07\x00\x00\x00\x00\x00\x00\x00"
+            ),
+            {"phone": 7},
+        )
+
+    def test_skips_unknown_fields(self):
+        self.assertEqual(
+            self.codecs.decode_example_Person(
+                b"\xf8\x06\x01\x82\x07\x02hi\n\x03Ada\x8d\x07\x00\x00\x00\x00"
+            ),
+            {"name": "Ada"},
+        )
+
+    def test_wide_message(self):
+        fields = " ".join(f"int64 f{i} = {i};" for i in range(1, 21))
+        wide = Parser.loads(f'syntax = "proto3";\nmessage Wide {{ {fields} }}')
+        # Too many fields to compare tags one by one.
+        self.assertIn("_DISPATCH_Wide", generate_codecs([wide]))
+        codecs = compile_codecs([wide])
+        message = {f"f{i}": i * -1000 for i in range(1, 21)}
+        self.assertEqual(codecs.decode_Wide(codecs.encode_Wide(message)), message)
+
+    def test_unresolved_type(self):
+        with self.assertRaises(ValueError):
+            generate_codecs(
+                [Parser.loads('syntax = "proto3";\nmessage A { Missing b = 1; }')]
+            )
+
+
+@unittest.skipIf(not HAS_PROTOBUF, "protobuf isn't installed")
+class CodecGeneratorProtobufTest(unittest.TestCase):
+    maxDiff = None
+
+    def test_merges_repeated_messages(self):
+        from google.protobuf import descriptor_pool, json_format, message_factory
+
+        proto_file = Parser.loads(MERGE)
+        pool = descriptor_pool.DescriptorPool()
+        pool.AddSerializedFile(file_descriptor_proto(proto_file, "merge.proto"))
+        outer = message_factory.GetMessageClass(pool.FindMessageTypeByName("m.Outer"))
+        first = outer()
+        first.sub.a = -1
+        first.sub.r.append(1)
+        first.sub.child.s = "x"
+        first.sub.m["k"].a = 2
+        first.first.a = 3
+        second = outer()
+        second.sub.s = "y"
+        second.sub.r.append(2)
+        second.sub.child.a = 4
+        second.sub.m["k"].s = "z"
+        second.first.s = "w"
+        data = first.SerializeToString() + second.SerializeToString()
+
+        expected = outer.FromString(data)
+        self.assertEqual(expected.sub.a, -1)
+        self.assertEqual(expected.sub.s, "y")
+        self.assertEqual(
+            compile_codecs([proto_file]).decode_m_Outer(data),
+            json_format.MessageToDict(expected, preserving_proto_field_name=True),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
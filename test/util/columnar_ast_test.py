@@ -0,0 +1,168 @@
+import importlib.util
+import tracemalloc
+import unittest
+from textwrap import dedent
+
+from src.proto_comment import ProtoSingleLineComment
+from src.proto_file import ProtoFile
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField
+from src.proto_node import ProtoNode
+from src.util.columnar_ast import VALUE_MAX, ColumnarAst
+from src.util.corpus_generator import CorpusGenerator
+from src.util.parser import Parser
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+class ColumnarAstTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.first = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package foo.bar;
+                option (big) = 18446744073709551615;
+                message Outer {
+                    reserved 4 to 9;
+                    int32 small = 1 [deprecated = true];
+                    map<string, Outer> children = 20000;
+                    message Inner {
+                        string name = 15000;
+                    }
+                }
+                enum Kind { KIND_UNSPECIFIED = 0; }
+                """
+            )
+        )
+        self.second = Parser.loads(
+            dedent(
+                """
+                syntax = "proto2";
+                message Other {
+                    optional bytes data = 12345 [(custom) = { a: [1, 2] }];
+                }
+                """
+            )
+        )
+        self.store = ColumnarAst.from_trees([self.first, self.second])
+
+    def assertParentsLinked(self, node: ProtoNode):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for child in node.children():
+                self.assertIs(child.parent, node)
+                stack.append(child)
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.store.roots), 2)
+        for tree, original in zip(self.store.trees(), [self.first, self.second]):
+            self.assertIsInstance(tree, ProtoFile)
+            self.assertEqual(tree, original)
+            self.assertEqual(tree.serialize(), original.serialize())
+            self.assertIsNone(tree.parent)
+            self.assertParentsLinked(tree)
+
+    def test_columns(self):
+        root = self.store.roots[1]
+        self.assertIs(self.store.node_type(root), ProtoFile)
+        self.assertEqual(self.store.parents[root], -1)
+        for row in range(len(self.store)):
+            for child in self.store.children(row):
+                self.assertEqual(self.store.parents[child], row)
+                self.assertGreater(child, row)
+        self.assertEqual(self.store.tree_index(root - 1), 0)
+        self.assertEqual(self.store.tree_index(root + 1), 1)
+
+        (message,) = self.store.rows(ProtoMessage)[2:]
+        self.assertEqual(self.store.name(message), "Other")
+        self.assertEqual(self.store.name(root), None)
+
+    def test_rows(self):
+        fields = self.store.rows(ProtoMessageField, minimum=10000)
+        self.assertEqual(
+            [(self.store.name(row), self.store.values[row]) for row in fields],
+            [("name", 15000), ("data", 12345)],
+        )
+        self.assertEqual(
+            [self.store.name(row) for row in self.store.rows(ProtoMessageField)],
+            ["small", "name", "data"],
+        )
+        self.assertEqual(self.store.rows(ProtoMessageField, maximum=0), [])
+
+    def test_values_are_clamped(self):
+        (option,) = self.first.options
+        row = self.store.rows(type(option.value.value), minimum=VALUE_MAX)[0]
+        self.assertEqual(self.store.values[row], VALUE_MAX)
+        self.assertEqual(self.store.node(row), option.value.value)
+
+    def test_subtree(self):
+        (inner,) = self.store.rows(ProtoMessage)[1:2]
+        node = self.store.node(inner)
+        self.assertIsNone(node.parent)
+        self.assertEqual(node, self.first.messages[0].nodes_of_type(ProtoMessage)[0])
+        self.assertParentsLinked(node)
+
+    def test_uses_less_memory(self):
+        texts = [
+            CorpusGenerator(seed).generate(lines=500).serialize() for seed in range(3)
+        ]
+        tracemalloc.start()
+        try:
+            trees = [Parser.loads(text) for text in texts]
+            tree_bytes = tracemalloc.get_traced_memory()[0]
+            store = ColumnarAst.from_trees(trees)
+            store_bytes = tracemalloc.get_traced_memory()[0] - tree_bytes
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(store.tree(2), trees[2])
+        self.assertLess(store_bytes, tree_bytes / 2)
+
+    def test_failed_append_leaves_store_unchanged(self):
+        class Unstorable(ProtoSingleLineComment):
+            pass
+
+        rows, payload_length = len(self.store), len(self.store.payload)
+        tree = Parser.loads('syntax = "proto3";\nmessage Foo {}\n')
+        tree.messages[0].nodes.append(Unstorable(" unstorable"))
+        with self.assertRaises(ValueError):
+            self.store.append(tree)
+        self.assertEqual(len(self.store), rows)
+        self.assertEqual(len(self.store.payload), payload_length)
+        self.assertEqual(len(self.store.roots), 2)
+
+        tree.messages[0].nodes.clear()
+        self.assertEqual(self.store.append(tree), rows)
+        self.assertEqual(self.store.tree(2), tree)
+
+    @unittest.skipIf(not HAS_NUMPY, "numpy isn't installed")
+    def test_append_while_numpy_columns_in_use(self):
+        rows = len(self.store)
+        columns = self.store.numpy_columns()
+        with self.assertRaises(BufferError):
+            self.store.append(self.second)
+        self.assertEqual(len(self.store), rows)
+        self.assertEqual(len(self.store.roots), 2)
+        self.assertEqual(len(columns["kinds"]), rows)
+
+        del columns
+        self.store.append(self.second)
+        self.assertEqual(self.store.tree(2), self.second)
+        self.assertEqual(len(self.store.numpy_columns()["kinds"]), len(self.store))
+
+    @unittest.skipIf(not HAS_NUMPY, "numpy isn't installed")
+    def test_numpy_columns(self):
+        columns = self.store.numpy_columns()
+        kinds = columns["kinds"]
+        values = columns["values"]
+        field_kind = self.store.kinds[self.store.rows(ProtoMessageField)[0]]
+        rows = ((kinds == field_kind) & (values > 10000)).nonzero()[0].tolist()
+        self.assertEqual(rows, self.store.rows(ProtoMessageField, minimum=10001))
+        self.assertEqual(columns["parents"].tolist(), self.store.parents.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
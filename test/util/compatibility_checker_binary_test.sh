@@ -2,3 +2,4 @@
 set -euxo pipefail
 
 ./src/util/compatibility_checker_binary ./test/resources/empty.proto ./test/resources/single_message.proto
+./src/util/compatibility_checker_binary --profile-report - ./test/resources/empty.proto ./test/resources/single_message.proto 2> /dev/null
@@ -0,0 +1,43 @@
+import unittest
+
+from src.proto_service import ProtoService
+from src.util.corpus_generator import CorpusGenerator, CorpusShape
+from src.util.parser import Parser
+
+
+class CorpusGeneratorTest(unittest.TestCase):
+    def test_generate_is_deterministic(self):
+        first = CorpusGenerator(seed=3).generate().serialize()
+        self.assertEqual(first, CorpusGenerator(seed=3).generate().serialize())
+        self.assertNotEqual(first, CorpusGenerator(seed=4).generate().serialize())
+
+    def test_generate_parses(self):
+        shape = CorpusShape(
+            messages=10, nesting_depth=3, comment_lines=3, comment_rate=0.5
+        )
+        proto_file = CorpusGenerator(shape=shape).generate()
+        self.assertEqual(Parser.loads(proto_file.serialize()), proto_file)
+
+    def test_generate_shape(self):
+        shape = CorpusShape(messages=7, fields_per_message=3, enums=2, services=1)
+        proto_file = CorpusGenerator(shape=shape).generate()
+        self.assertEqual(len(proto_file.messages), 7)
+        self.assertEqual(len(proto_file.enums), 2)
+        self.assertEqual(len(proto_file.nodes_of_type(ProtoService)), 1)
+
+    def test_generate_lines(self):
+        text = CorpusGenerator().generate(lines=2000).serialize()
+        self.assertAlmostEqual(text.count("\n"), 2000, delta=100)
+
+    def test_generate_pair(self):
+        before, after, diffs = CorpusGenerator(seed=1).generate_pair(mutations=12)
+        self.assertEqual(len(diffs), 12)
+        self.assertCountEqual(before.diff(after), diffs)
+        self.assertCountEqual(
+            Parser.loads(before.serialize()).diff(Parser.loads(after.serialize())),
+            diffs,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+from textwrap import dedent
+
+from src.util.descriptor import (
+    TYPE_ENUM,
+    TYPE_MESSAGE,
+    SymbolTable,
+    file_descriptor_proto,
+    file_descriptor_set,
+)
+from src.util.parser import Parser
+from src.util.wire_format import decode_fields
+
+
+def fields(data: bytes, field_number: int) -> list:
+    return [v for n, _, v in decode_fields(data) if n == field_number]
+
+
+def field(data: bytes, field_number: int):
+    (value,) = fields(data, field_number)
+    return value
+
+
+class DescriptorTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.greeter = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package greeter;
+                message Request {
+                  optional string name = 1;
+                  map<string, Kind> kinds = 2;
+                  oneof choice { int32 id = 3; Request next = 4; }
+                  enum Kind { KIND_UNSPECIFIED = 0; }
+                }
+                service Greeter {
+                  rpc Hello (Request) returns (stream Request);
+                }
+                """
+            )
+        )
+        self.other = Parser.loads(
+            dedent(
+                """
+                syntax = "proto2";
+                package other.nested;
+                import "greeter.proto";
+                option java_package = "com.example";
+                option (custom.option) = -3;
+                option (custom.aggregate) = { name: "x" inner { size: 1 } };
+                message Thing {
+                  extensions 100 to max;
+                  reserved 5, 7 to 9;
+                  reserved "old";
+                  optional greeter.Request request = 1 [deprecated = true];
+                  repeated Missing missing = 2;
+                  optional int32 count = 3 [default = -5, json_name = "total"];
+                }
+                extend Thing {
+                  optional Thing.Kind kind = 100;
+                }
+                """
+            )
+        )
+
+    def test_matches_protoc(self):
+        # Generated with protoc --descriptor_set_out from the same source.
+        self.assertEqual(
+            file_descriptor_set({"greeter.proto": self.greeter}),
+            b'\n\xee\x02\n\rgreeter.proto\x12\x07greeter"\x91\x02\n\x07Request'
+            b"\x12\x17\n\x04name\x18\x01 \x01(\tH\x01R\x04name\x88\x01\x01\x121\n"
+            b"\x05kinds\x18\x02 \x03(\x0b2\x1b.greeter.Request.KindsEntryR\x05kinds"
+            b"\x12\x10\n\x02id\x18\x03 \x01(\x05H\x00R\x02id\x12&\n\x04next\x18\x04 "
+            b"\x01(\x0b2\x10.greeter.RequestH\x00R\x04next\x1aO\n\nKindsEntry\x12"
+            b"\x10\n\x03key\x18\x01 \x01(\tR\x03key\x12+\n\x05value\x18\x02 \x01("
+            b'\x0e2\x15.greeter.Request.KindR\x05value:\x028\x01"\x1c\n\x04Kind'
+            b"\x12\x14\n\x10KIND_UNSPECIFIED\x10\x00B\x08\n\x06choiceB\x07\n\x05_name"
+            b"28\n\x07Greeter\x12-\n\x05Hello\x12\x10.greeter.Request\x1a\x10"
+            b".greeter.Request0\x01b\x06proto3",
+        )
+
+    def test_symbol_resolution(self):
+        symbols = SymbolTable([self.greeter, self.other])
+        self.assertEqual(
+            symbols.resolve("Request", ".greeter.Request"),
+            (".greeter.Request", TYPE_MESSAGE),
+        )
+        self.assertEqual(
+            symbols.resolve("Request.Kind", ".greeter"),
+            (".greeter.Request.Kind", TYPE_ENUM),
+        )
+        self.assertEqual(
+            symbols.resolve("greeter.Request", ".other.nested.Thing"),
+            (".greeter.Request", TYPE_MESSAGE),
+        )
+        self.assertEqual(
+            symbols.resolve(".greeter.Request.KindsEntry", ""),
+            (".greeter.Request.KindsEntry", TYPE_MESSAGE),
+        )
+        self.assertEqual(symbols.resolve("greeter", ""), ("greeter", None))
+        self.assertEqual(symbols.resolve("Missing", ".greeter"), ("Missing", None))
+
+    def test_file_descriptor(self):
+        descriptor = file_descriptor_proto(
+            self.other,
+            "other.proto",
+            SymbolTable([self.greeter, self.other]),
+        )
+        self.assertEqual(field(descriptor, 1), b"other.proto")
+        self.assertEqual(field(descriptor, 2), b"other.nested")
+        self.assertEqual(fields(descriptor, 3), [b"greeter.proto"])
+        # proto2 is the default, so protoc leaves it out.
+        self.assertEqual(fields(descriptor, 12), [])
+
+        file_options = field(descriptor, 8)
+        self.assertEqual(field(file_options, 1), b"com.example")
+        uninterpreted, aggregate = fields(file_options, 999)
+        self.assertEqual(field(field(uninterpreted, 2), 1), b"custom.option")
+        self.assertEqual(field(field(uninterpreted, 2), 2), 1)
+        self.assertEqual(field(uninterpreted, 5), (1 << 64) - 3)
+        self.assertEqual(field(field(aggregate, 2), 1), b"custom.aggregate")
+        self.assertEqual(field(aggregate, 8), b'name: "x" inner { size: 1 }')
+
+        thing = field(descriptor, 4)
+        self.assertEqual(
+            [(field(r, 1), field(r, 2)) for r in fields(thing, 5)],
+            [(100, 536870912)],
+        )
+        self.assertEqual(
+            [(field(r, 1), field(r, 2)) for r in fields(thing, 9)],
+            [(5, 6), (7, 10)],
+        )
+        self.assertEqual(fields(thing, 10), [b"old"])
+
+        request, missing, count = fields(thing, 2)
+        self.assertEqual(field(request, 5), TYPE_MESSAGE)
+        self.assertEqual(field(request, 6), b".greeter.Request")
+        self.assertEqual(field(field(request, 8), 3), 1)
+        # Unresolved types are left for whoever loads the descriptor.
+        self.assertEqual(fields(missing, 5), [])
+        self.assertEqual(field(missing, 6), b"Missing")
+        self.assertEqual(field(missing, 4), 3)
+        self.assertEqual(field(count, 7), b"-5")
+        self.assertEqual(field(count, 10), b"total")
+        self.assertEqual(fields(count, 8), [])
+
+        (extension,) = fields(descriptor, 7)
+        self.assertEqual(field(extension, 2), b".other.nested.Thing")
+        self.assertEqual(field(extension, 6), b"Thing.Kind")
+
+    def test_file_descriptor_set_orders_imports_first(self):
+        descriptor_set = file_descriptor_set(
+            {"other.proto": self.other, "greeter.proto": self.greeter}
+        )
+        self.assertEqual(
+            [field(f, 1) for f in fields(descriptor_set, 1)],
+            [b"greeter.proto", b"other.proto"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import unittest
+from textwrap import dedent
+
+from src.util.json_transcoder import JsonTranscoder
+from src.util.parser import Parser
+
+
+class JsonTranscoderTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.transcoder = JsonTranscoder(
+            [
+                Parser.loads(
+                    dedent(
+                        """
+                        syntax = "proto3";
+                        package example;
+                        message Person {
+                          string full_name = 1;
+                          int64 id = 2 [json_name = "personId"];
+                          repeated sint32 scores = 3;
+                          map<string, Person> friends = 4;
+                          oneof contact { string email = 5; fixed64 phone = 6; }
+                          float height = 7;
+                          Kind kind = 8;
+                          bytes avatar = 9;
+                          bool active = 10;
+                          Person manager = 11;
+                          enum Kind { KIND_UNSPECIFIED = 0; HUMAN = 1; }
+                        }
+                        """
+                    )
+                )
+            ]
+        )
+        # Serialized by the protobuf runtime, along with its JSON.
+        self.encoded = (
+            b'\n\x03Ada\x10\xd2\t\x1a\x02\x03\x04"\x0c\n\x03bob\x12\x05\n\x03Bob'
+            b"1\x07\x00\x00\x00\x00\x00\x00\x00=\xcd\xcc\xcc=@\x01J\x02\x00\xff"
+        )
+        self.json = {
+            "fullName": "Ada",
+            "personId": "1234",
+            "scores": [-2, 2],
+            "friends": {"bob": {"fullName": "Bob"}},
+            "phone": "7",
+            "height": 0.1,
+            "kind": "HUMAN",
+            "avatar": "AP8=",
+        }
+
+    def test_to_json(self):
+        self.assertEqual(
+            json.loads(self.transcoder.to_json("example.Person", self.encoded)),
+            self.json,
+        )
+        self.assertEqual(self.transcoder.to_json("example.Person", b""), "{}")
+
+    def test_to_binary(self):
+        self.assertEqual(
+            self.transcoder.to_binary("example.Person", json.dumps(self.json)),
+            self.encoded,
+        )
+
+    def test_to_binary_accepts_alternate_forms(self):
+        self.assertEqual(
+            self.transcoder.to_binary(
+                "example.Person",
+                """
+                {
+                  "full_name": "Ada", "id": 1234, "scores": [-2, 2.0],
+                  "friends": {"bob": {"full_name": "Bob"}}, "email": null,
+                  "phone": 7, "height": 0.1, "kind": 1, "avatar": "AP8",
+                  "active": false
+                }
+                """,
+            ),
+            self.encoded,
+        )
+
+    def test_oneof_keeps_last_member(self):
+        self.assertEqual(
+            self.transcoder.to_json(
+                "example.Person", b"*\x01a1\x07\x00\x00\x00\x00\x00\x00\x00"
+            ),
+            '{"phone":"7"}',
+        )
+
+    def test_merges_repeated_messages(self):
+        # The manager appears three times, and a friend's value twice in one map
+        # entry. Protobuf merges the occurrences of each.
+        data = (
+            b'"\x0f\n\x03bob\x12\x04\n\x02Bo\x12\x02\x10\x01'
+            b"Z\x05\n\x03AdaZ\x02\x18\x03Z\x02\x10\x02"
+        )
+        self.assertEqual(
+            json.loads(self.transcoder.to_json("example.Person", data)),
+            {
+                "friends": {"bob": {"fullName": "Bo", "personId": "1"}},
+                "manager": {"fullName": "Ada", "personId": "2", "scores": [-2]},
+            },
+        )
+
+    def test_invalid_json(self):
+        for text in [
+            '{"missing": 1}',
+            '{"scores": [1.5]}',
+            '{"scores": [2147483648]}',
+            '{"kind": "ROBOT"}',
+            '{"active": 1}',
+            '{"fullName": "Ada"',
+            "{} {}",
+        ]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    self.transcoder.to_binary("example.Person", text)
+        with self.assertRaises(ValueError):
+            self.transcoder.to_json("example.Missing", b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from textwrap import dedent
+
+from src.proto_message import ProtoMessage
+from src.util.lazy_decoder import LazyDecoder, LazyMessage
+from src.util.parser import Parser
+
+
+class LazyDecoderTest(unittest.TestCase):
+    def setUp(self):
+        self.proto_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package example;
+                message Person {
+                  string name = 1;
+                  sint32 delta = 2;
+                  repeated int32 scores = 3;
+                  map<string, Person> friends = 4;
+                  oneof contact { string email = 5; fixed64 phone = 6; }
+                  double height = 7;
+                  Kind kind = 8;
+                  bytes avatar = 9;
+                  Person manager = 10;
+                  enum Kind { KIND_UNSPECIFIED = 0; HUMAN = 1; }
+                }
+                """
+            )
+        )
+        (person,) = self.proto_file.nodes_of_type(ProtoMessage)
+        self.decoder = LazyDecoder(person)
+        # Serialized by the protobuf runtime.
+        self.encoded = (
+            b'\n\x03Ada\x10\x03\x1a\x03\x01\xac\x02"\x0c\n\x03bob\x12\x05\n\x03Bob'
+            b"*\x0fada@example.com9\x00\x00\x00\x00\x00\x00\xf8?@\x01"
+        )
+
+    def test_decode(self):
+        person = self.decoder.decode(self.encoded)
+        self.assertEqual(person.name, "Ada")
+        self.assertEqual(person.delta, -2)
+        self.assertEqual(person.scores, [1, 300])
+        self.assertEqual(person.email, "ada@example.com")
+        self.assertEqual(person.height, 1.5)
+        self.assertEqual(person.kind, 1)
+        self.assertEqual(list(person.friends), ["bob"])
+        self.assertIsInstance(person.friends["bob"], LazyMessage)
+        self.assertEqual(person.friends["bob"].name, "Bob")
+
+    def test_defaults(self):
+        person = self.decoder.decode(b"")
+        self.assertEqual(person.name, "")
+        self.assertEqual(person.delta, 0)
+        self.assertEqual(person.scores, [])
+        self.assertEqual(person.friends, {})
+        self.assertEqual(person.phone, 0)
+        self.assertIsNone(person.manager)
+        self.assertNotIn("name", person)
+        with self.assertRaises(AttributeError):
+            person.missing
+
+    def test_does_not_copy(self):
+        data = bytearray(b"R\x08J\x06\x00\x01\x02\x03\x04\x05")
+        person = self.decoder.decode(data)
+        avatar = person.manager.avatar
+        self.assertIsInstance(avatar, memoryview)
+        self.assertIs(avatar.obj, data)
+        self.assertEqual(bytes(avatar), b"\x00\x01\x02\x03\x04\x05")
+
+    def test_only_scans_the_top_level(self):
+        # The manager's contents are garbage, but they aren't read unless asked for.
+        person = self.decoder.decode(b"\n\x03AdaR\x03\xff\xff\xff")
+        self.assertEqual(person.name, "Ada")
+        self.assertIn("manager", person)
+        with self.assertRaises(ValueError):
+            person.manager
+
+    def test_oneof_keeps_last_member(self):
+        person = self.decoder.decode(b"*\x01a1\x07\x00\x00\x00\x00\x00\x00\x00")
+        self.assertEqual(person.phone, 7)
+        self.assertEqual(person.email, "")
+        self.assertNotIn("email", person)
+
+    def test_merges_repeated_messages(self):
+        # The manager appears three times, and a friend's value twice in one map
+        # entry. Protobuf merges the occurrences of each.
+        person = self.decoder.decode(
+            b"R\x05\n\x03AdaR\x02\x10\x03R\x02\x18\x01"
+            b'"\x0f\n\x03bob\x12\x04\n\x02Bo\x12\x02\x10\x01'
+        )
+        self.assertEqual(person.manager.name, "Ada")
+        self.assertEqual(person.manager.delta, -2)
+        self.assertEqual(person.manager.scores, [1])
+        self.assertEqual(person.friends["bob"].name, "Bo")
+        self.assertEqual(person.friends["bob"].delta, -1)
+
+    def test_oneof_member_cleared_by_sibling(self):
+        person = self.decoder.decode(b"*\x01a1\x07\x00\x00\x00\x00\x00\x00\x00*\x01b")
+        self.assertEqual(person.email, "b")
+        self.assertNotIn("phone", person)
+
+    def test_packed_and_unpacked(self):
+        person = self.decoder.decode(b"\x18\x01\x18\x02\x1a\x01\x03")
+        self.assertEqual(person.scores, [1, 2, 3])
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            self.decoder.decode(self.encoded[:-3])
+
+
+if __name__ == "__main__":
+    unittest.main()
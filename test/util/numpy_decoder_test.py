@@ -0,0 +1,71 @@
+import importlib.util
+import unittest
+
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField, ProtoMessageFieldTypesEnum
+from src.util.numpy_decoder import decode_packed, decode_repeated_field
+from src.util.parser import Parser
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+@unittest.skipIf(not HAS_NUMPY, "numpy isn't installed")
+class NumpyDecoderTest(unittest.TestCase):
+    def test_fixed_width_is_zero_copy(self):
+        data = bytearray(
+            b"\x00\x00\x00\x00\x00\x00\xf8?\x00\x00\x00\x00\x00\x00\x00\xc0"
+        )
+        values = decode_packed(ProtoMessageFieldTypesEnum.DOUBLE, data)
+        self.assertEqual(values.tolist(), [1.5, -2.0])
+        data[7] = 0xBF
+        self.assertEqual(values[0], -1.5)
+
+    def test_varints(self):
+        data = b"\x01\xac\x02\xff\xff\xff\xff\xff\xff\xff\xff\xff\x01\x00"
+        self.assertEqual(
+            decode_packed(ProtoMessageFieldTypesEnum.INT64, data).tolist(),
+            [1, 300, -1, 0],
+        )
+        self.assertEqual(
+            decode_packed(ProtoMessageFieldTypesEnum.INT32, data).tolist(),
+            [1, 300, -1, 0],
+        )
+        self.assertEqual(
+            decode_packed(ProtoMessageFieldTypesEnum.UINT64, data).tolist(),
+            [1, 300, (1 << 64) - 1, 0],
+        )
+        self.assertEqual(
+            decode_packed(
+                ProtoMessageFieldTypesEnum.SINT32, b"\x00\x01\x02\x03"
+            ).tolist(),
+            [0, -1, 1, -2],
+        )
+        self.assertEqual(
+            decode_packed(ProtoMessageFieldTypesEnum.BOOL, b"\x01\x00").tolist(),
+            [True, False],
+        )
+        self.assertEqual(
+            decode_packed(ProtoMessageFieldTypesEnum.SINT64, b"").tolist(), []
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            decode_packed(ProtoMessageFieldTypesEnum.INT64, b"\x01\xac")
+        with self.assertRaises(ValueError):
+            decode_packed(ProtoMessageFieldTypesEnum.STRING, b"")
+
+    def test_repeated_field(self):
+        proto_file = Parser.loads(
+            'syntax = "proto3";\n'
+            "message Telemetry { repeated sint32 deltas = 1; string name = 2; }"
+        )
+        (message,) = proto_file.nodes_of_type(ProtoMessage)
+        deltas, _ = message.nodes_of_type(ProtoMessageField)
+        # Two packed runs, an unpacked value, and another field in between.
+        data = b"\n\x02\x01\x02\x12\x01x\x08\x03\n\x01\x04"
+        self.assertEqual(decode_repeated_field(deltas, data).tolist(), [-1, 1, -2, 2])
+        self.assertEqual(decode_repeated_field(deltas, b"").tolist(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
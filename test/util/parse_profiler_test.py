@@ -0,0 +1,64 @@
+import io
+import json
+import unittest
+
+from src.proto_message_field import ProtoMessageField
+from src.util.parse_profiler import ParseProfiler
+from src.util.parser import ParseError, Parser
+
+PROTO = """
+syntax = "proto3";
+message Foo {
+    // A comment.
+    string bar = 1;
+    int32 baz = 2 [deprecated = true];
+}
+"""
+
+
+class ParseProfilerTest(unittest.TestCase):
+    def test_counts_matches(self):
+        with ParseProfiler() as profiler:
+            Parser.loads(PROTO)
+        header = profiler.stats["ProtoMessage.match_header"]
+        self.assertEqual(header.matches, 1)
+        fields = profiler.stats["ProtoMessageField.match"]
+        self.assertEqual(fields.matches, 2)
+        self.assertEqual(fields.calls, fields.matches + fields.failures)
+        file_match = profiler.stats["ProtoFile.match"]
+        self.assertEqual(file_match.calls, 1)
+        self.assertGreaterEqual(file_match.seconds, fields.seconds)
+        self.assertLessEqual(file_match.self_seconds, file_match.seconds)
+
+    def test_counts_exceptions(self):
+        with ParseProfiler() as profiler:
+            with self.assertRaises(ParseError):
+                Parser.loads('syntax = "proto3";\nmessage Foo {')
+        self.assertEqual(profiler.stats["ProtoFile.match"].exceptions, 1)
+
+    def test_disable_restores_methods(self):
+        original = ProtoMessageField.__dict__["match"]
+        with ParseProfiler():
+            self.assertIsNot(ProtoMessageField.__dict__["match"], original)
+        self.assertIs(ProtoMessageField.__dict__["match"], original)
+        self.assertEqual(Parser.loads(PROTO), Parser.loads(PROTO))
+
+    def test_only_one_enabled(self):
+        with ParseProfiler():
+            with self.assertRaises(RuntimeError):
+                ParseProfiler().enable()
+        with ParseProfiler():
+            pass
+
+    def test_report_and_dump(self):
+        with ParseProfiler() as profiler:
+            Parser.loads(PROTO)
+        self.assertIn("ProtoMessageField.match", profiler.report())
+        self.assertEqual(len(profiler.report(limit=3).splitlines()), 4)
+        output = io.StringIO()
+        profiler.dump(output)
+        self.assertEqual(json.loads(output.getvalue())["ProtoFile.match"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
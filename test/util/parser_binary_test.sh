@@ -14,3 +14,6 @@ for f in $GOOGLE_PROTOS; do
     echo $f
     ./src/util/parser_binary $f > /dev/null
 done
+
+echo "Profiling:"
+./src/util/parser_binary --profile-report - ./test/resources/single_message.proto > /dev/null
@@ -1,3 +1,5 @@
+import io
+import tempfile
 import unittest
 from textwrap import dedent
 
@@ -22,7 +24,9 @@ from src.proto_message_field import (
     ProtoMessageFieldOption,
     ProtoMessageFieldTypesEnum,
 )
+from src.proto_node import ProtoErrorNode, ProtoParseError
 from src.proto_option import ProtoOption
+from src.proto_package import ProtoPackage
 from src.proto_range import ProtoRange, ProtoRangeEnum
 from src.proto_reserved import ProtoReserved
 from src.proto_service import ProtoService, ProtoServiceRPC
@@ -323,6 +327,154 @@ class IntTest(unittest.TestCase):
                 )
             )
 
+    def test_parser_error_position(self):
+        proto_content = (
+            dedent(
+                """
+            syntax = "proto3";
+
+            message Foo {
+                reserved 1, bar;
+            }
+            """
+            )
+            + ("// padding\n" * 10000)
+        )
+        with self.assertRaises(ParseError) as cm:
+            Parser.loads(proto_content)
+
+        error = cm.exception.error
+        self.assertIsInstance(error, ProtoParseError)
+        self.assertLessEqual(len(error.snippet), ProtoParseError.SNIPPET_LENGTH)
+        self.assertTrue(
+            str(cm.exception).startswith(
+                "Proto doesn't have parseable syntax at line 5, column 17:"
+            )
+        )
+        self.assertLess(len(str(cm.exception)), 200)
+
+    def test_parser_option_list_error_position(self):
+        proto_content = dedent(
+            """
+            syntax = "proto3";
+            message Foo {
+                int32 a = 1 [deprecated true];
+                int32 b = 2 [deprecated = true packed = true];
+                map<string, int32> c = 3 [(foo) = 1 2];
+            }
+            enum Bar {
+                BAR_UNSPECIFIED = 0 [(baz) = ];
+            }
+            """
+        )
+        proto_file, diagnostics = Parser.loads_with_diagnostics(proto_content)
+        self.assertEqual(
+            [d.line_and_column(proto_content) for d in diagnostics],
+            [(4, 29), (5, 36), (6, 41), (9, 33)],
+        )
+
+    def test_parser_with_diagnostics(self):
+        proto_content = dedent(
+            """
+            syntax = "proto3";
+
+            package foo.bar;
+            import "foo.proto"
+            message Foo {
+                string bar = 1;
+                reserved 1, baz;
+                message 1Nested {
+                    string inner = 1;
+                }
+                int32 bat = 2;
+            }
+            enum Bar {
+                BAR_UNSPECIFIED = 0;
+                BAR_ONE 1;
+            }
+            """
+        )
+        proto_file, diagnostics = Parser.loads_with_diagnostics(proto_content)
+
+        self.assertEqual(
+            [d.line_and_column(proto_content) for d in diagnostics],
+            [(6, 1), (16, 13)],
+        )
+        self.assertEqual(
+            [type(n) for n in proto_file.nodes],
+            [ProtoPackage, ProtoErrorNode, ProtoEnum],
+        )
+        # Without its ;, the import swallows the whole block that follows it.
+        self.assertTrue(proto_file.nodes[1].source.startswith('import "foo.proto"'))
+        self.assertTrue(proto_file.nodes[1].source.endswith("int32 bat = 2;\n}"))
+        self.assertEqual(
+            proto_file.enums[0].values[0].identifier, ProtoIdentifier("BAR_UNSPECIFIED")
+        )
+        self.assertIsInstance(proto_file.enums[0].nodes[1], ProtoErrorNode)
+
+    def test_parser_with_diagnostics_nested_recovery(self):
+        proto_content = dedent(
+            """
+            syntax = "proto3";
+
+            message Foo {
+                string bar = 1;
+                reserved 1, baz;
+                message 1Nested {
+                    string inner = 1;
+                }
+                int32 bat = 2;
+            }
+            message Qux {
+                Foo foo = 1
+            """
+        )
+        proto_file, diagnostics = Parser.loads_with_diagnostics(proto_content)
+
+        self.assertEqual(
+            [d.line_and_column(proto_content) for d in diagnostics],
+            [(6, 17), (7, 13), (13, 16), (13, 16)],
+        )
+        foo, qux = proto_file.messages
+        self.assertEqual(
+            [type(n) for n in foo.nodes],
+            [ProtoMessageField, ProtoErrorNode, ProtoErrorNode, ProtoMessageField],
+        )
+        self.assertEqual(foo.message_fields[1].name, ProtoIdentifier("bat"))
+        self.assertEqual([type(n) for n in qux.nodes], [ProtoErrorNode])
+        self.assertEqual(
+            proto_file.normalize().messages[0].message_fields,
+            foo.message_fields,
+        )
+
+    def test_parser_with_diagnostics_invalid_syntax(self):
+        with self.assertRaises(ParseError):
+            Parser.loads_with_diagnostics('syntax = "proto4";')
+
+    def test_parser_deeply_nested(self):
+        depth = 5000
+        proto_content = "\n".join(
+            ['syntax = "proto3";', ""]
+            + [f"message M{i} {{" for i in range(depth)]
+            + ["int32 leaf = 1;"]
+            + ["}"] * depth
+        )
+        proto_file = Parser.loads(proto_content)
+
+        innermost = proto_file.nodes[0]
+        for _ in range(depth - 1):
+            self.assertIsInstance(innermost, ProtoMessage)
+            innermost = innermost.nodes[0]
+        self.assertEqual(innermost.nodes[0].name, ProtoIdentifier("leaf"))
+
+        self.assertEqual(proto_file.serialize(), proto_content)
+        self.assertEqual(proto_file, Parser.loads(proto_content))
+        self.assertNotEqual(
+            proto_file, Parser.loads(proto_content.replace("leaf", "other"))
+        )
+        self.assertEqual(proto_file.diff(Parser.loads(proto_content)), [])
+        self.assertEqual(proto_file.normalize().serialize(), proto_content)
+
     def test_parser_typo(self):
         with self.assertRaises(ParseError):
             Parser.loads(
@@ -470,6 +622,39 @@ class IntTest(unittest.TestCase):
             ).strip(),
         )
 
+    def test_serialize_to(self):
+        proto_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package foo.bar;
+                // top-level comment
+                message Outer {
+                    message Inner {
+                        enum InnerEnum {
+                            IE_UNSPECIFIED = 0;
+                        }
+                        string name = 1;
+                    }
+                    Inner inner = 1;
+                }
+                """
+            )
+        )
+
+        buffer = io.StringIO()
+        proto_file.serialize_to(buffer)
+        self.assertEqual(buffer.getvalue(), proto_file.serialize())
+
+        with tempfile.TemporaryFile("w+") as output_file:
+            proto_file.serialize_to(output_file)
+            output_file.seek(0)
+            self.assertEqual(output_file.read(), proto_file.serialize())
+
+        buffer = io.StringIO()
+        proto_file.package.serialize_to(buffer)
+        self.assertEqual(buffer.getvalue(), "package foo.bar;")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+from textwrap import dedent
+
+from src.proto_identifier import ProtoIdentifier
+from src.proto_int import ProtoInt
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField
+from src.proto_option import ProtoOption
+from src.proto_service import ProtoServiceRPC
+from src.util.parser import Parser
+from src.util.query import ProtoQuery, compile_query, select
+
+
+class QueryTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.first_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                package foo;
+                message Outer {
+                    option deprecated = true;
+                    string name = 1 [deprecated = true];
+                    message Inner {
+                        repeated int32 ids = 1;
+                        Outer parent = 2 [deprecated = false];
+                        map<string, bool> flags = 3 [deprecated = true];
+                    }
+                    oneof choice {
+                        string text = 2;
+                    }
+                }
+                enum Kind {
+                    KIND_UNSPECIFIED = 0;
+                    KIND_ONE = 1;
+                }
+                """
+            )
+        )
+        self.second_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                service Greeter {
+                    rpc Hello (HelloRequest) returns (HelloResponse);
+                    rpc Stream (HelloRequest) returns (stream HelloResponse);
+                }
+                message HelloRequest {
+                    string name = 1 [(custom.option).value = "a b"];
+                }
+                """
+            )
+        )
+        self.workspace = [self.first_file, self.second_file]
+
+    def names(self, nodes):
+        return [
+            getattr(getattr(n, "name", None), "identifier", None)
+            or n.identifier.identifier
+            for n in nodes
+        ]
+
+    def test_select_by_type(self):
+        self.assertEqual(
+            self.names(select("message", self.workspace)),
+            ["Outer", "Inner", "HelloRequest"],
+        )
+        self.assertEqual(
+            self.names(select("enum_value", self.first_file)),
+            ["KIND_UNSPECIFIED", "KIND_ONE"],
+        )
+
+    def test_select_by_option(self):
+        self.assertEqual(
+            self.names(select("field[option.deprecated=true]", self.workspace)),
+            ["name"],
+        )
+        self.assertEqual(
+            self.names(select("field[option.deprecated], map", self.workspace)),
+            ["name", "parent", "flags"],
+        )
+        self.assertEqual(
+            self.names(select("message[option.deprecated=true]", self.workspace)),
+            ["Outer"],
+        )
+        self.assertEqual(
+            self.names(
+                select('field[option.(custom.option).value="a b"]', self.workspace)
+            ),
+            ["name"],
+        )
+
+    def test_select_by_attribute(self):
+        streaming = select("rpc[response_stream]", self.workspace)
+        self.assertEqual(self.names(streaming), ["Stream"])
+        self.assertIsInstance(streaming[0], ProtoServiceRPC)
+        self.assertEqual(
+            self.names(select("rpc[request_type=HelloRequest]", self.workspace)),
+            ["Hello", "Stream"],
+        )
+        self.assertEqual(
+            self.names(select("field[repeated][number=1]", self.workspace)),
+            ["ids"],
+        )
+        self.assertEqual(
+            self.names(select("field[type=string]", self.workspace)),
+            ["name", "text", "name"],
+        )
+
+    def test_select_with_combinators(self):
+        self.assertEqual(
+            self.names(select("message#Outer > field", self.workspace)),
+            ["name"],
+        )
+        self.assertEqual(
+            self.names(select("message#Outer field", self.workspace)),
+            ["name", "ids", "parent", "text"],
+        )
+        self.assertEqual(
+            self.names(select("message > message > *#ids", self.workspace)),
+            ["ids"],
+        )
+        self.assertEqual(
+            self.names(select("service#Greeter > rpc#Hello", self.workspace)),
+            ["Hello"],
+        )
+        self.assertEqual(select("enum > field", self.workspace), [])
+
+    def test_select_any_type(self):
+        self.assertEqual(
+            self.names(select("message#Inner > *", self.workspace)),
+            ["ids", "parent", "flags"],
+        )
+        self.assertEqual(
+            self.names(select("enum > *", self.workspace)),
+            ["KIND_UNSPECIFIED", "KIND_ONE"],
+        )
+        self.assertEqual(
+            [type(n) for n in select("enum_value *", self.workspace)],
+            [ProtoIdentifier, ProtoInt] * 2,
+        )
+        self.assertEqual(
+            self.names(select("[option.deprecated=true]", self.workspace)),
+            ["Outer", "name", "flags"],
+        )
+        self.assertEqual(
+            self.names(select("message > #text", self.workspace)),
+            [],
+        )
+        self.assertEqual(
+            self.names(select("oneof > #text", self.workspace)),
+            ["text"],
+        )
+        self.assertEqual(len(select("*", self.second_file)), 18)
+
+    def test_select_inside_leaves(self):
+        proto_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                service Greeter {
+                    rpc Hello (HelloRequest) returns (HelloResponse) {
+                        option deprecated = true;
+                    }
+                }
+                """
+            )
+        )
+        for selector in ["service option", "service rpc option", "option"]:
+            (option,) = select(selector, proto_file)
+            self.assertIsInstance(option, ProtoOption, selector)
+            self.assertIsInstance(option.parent, ProtoServiceRPC, selector)
+        self.assertEqual(select("service > option", proto_file), [])
+        self.assertTrue(any(node is option for node in select("*", proto_file)))
+
+    def test_compiled_query_is_reused(self):
+        query = compile_query("message > field")
+        self.assertIsInstance(query, ProtoQuery)
+        self.assertIs(compile_query("message > field"), query)
+        fields = query.select(self.first_file)
+        self.assertTrue(all(isinstance(f, ProtoMessageField) for f in fields))
+        self.assertTrue(all(isinstance(f.parent, ProtoMessage) for f in fields))
+
+    def test_invalid_selectors(self):
+        for selector in [
+            "",
+            "message >",
+            "> field",
+            "message, ",
+            "message > > field",
+            "messages",
+            "message field[",
+            "message#",
+        ]:
+            with self.assertRaises(ValueError, msg=selector):
+                ProtoQuery(selector)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.proto_message import ProtoMessage
+from src.util.lazy_decoder import LazyMessage
+from src.util.parser import Parser
+from src.util.record_io import RecordReader, RecordWriter
+
+
+class RecordIOTest(unittest.TestCase):
+    def setUp(self):
+        proto_file = Parser.loads(
+            'syntax = "proto3";\npackage logs;\n'
+            "message Entry { string text = 1; repeated int64 values = 2; Entry child = 3; }"
+        )
+        (self.message,) = proto_file.nodes_of_type(ProtoMessage)
+        self.records = [
+            {"text": f"line {i}", "values": list(range(-1, i % 5)), "child": {}}
+            for i in range(100)
+        ]
+        self.records.append({"text": "x" * 1000})
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, "wb") as stream:
+            writer = RecordWriter(self.message, stream)
+            for record in self.records:
+                writer.write(record)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_read(self):
+        self.assertEqual(list(RecordReader(self.message).read(self.path)), self.records)
+
+    def test_read_lazily(self):
+        records = list(RecordReader(self.message, lazy=True).read(self.path))
+        self.assertIsInstance(records[0], LazyMessage)
+        self.assertEqual(records[3].text, "line 3")
+        self.assertEqual(records[3].values, [-1, 0, 1, 2])
+        self.assertEqual(records[-1].text, "x" * 1000)
+
+    def test_read_stream(self):
+        reader = RecordReader(self.message)
+        for chunk_size in (1, 7, 1 << 20):
+            with open(self.path, "rb") as stream:
+                self.assertEqual(
+                    list(reader.read_stream(stream, chunk_size)), self.records
+                )
+
+    def test_read_parallel(self):
+        self.assertEqual(
+            list(
+                RecordReader(self.message).read_parallel(
+                    self.path, processes=2, span_size=100
+                )
+            ),
+            self.records,
+        )
+
+    def test_empty(self):
+        with open(self.path, "wb"):
+            pass
+        reader = RecordReader(self.message)
+        self.assertEqual(list(reader.read(self.path)), [])
+        self.assertEqual(list(reader.read_parallel(self.path)), [])
+        self.assertEqual(list(reader.read_stream(io.BytesIO())), [])
+
+    def test_truncated(self):
+        with open(self.path, "rb") as stream:
+            data = stream.read()
+        with open(self.path, "wb") as stream:
+            stream.write(data[:-1])
+        reader = RecordReader(self.message)
+        with self.assertRaises(ValueError):
+            list(reader.read(self.path))
+        with self.assertRaises(ValueError):
+            list(reader.read_stream(io.BytesIO(data[:-1]), 16))
+
+
+if __name__ == "__main__":
+    unittest.main()
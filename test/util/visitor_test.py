@@ -0,0 +1,151 @@
+import unittest
+from textwrap import dedent
+
+from src.proto_comment import ProtoComment
+from src.proto_enum import ProtoEnum, ProtoEnumValue
+from src.proto_message import ProtoMessage
+from src.proto_message_field import ProtoMessageField
+from src.proto_node import ProtoNode
+from src.util.parser import Parser
+from src.util.visitor import SKIP_CHILDREN, ProtoVisitor, walk
+
+
+class TraceVisitor(ProtoVisitor):
+    def __init__(self):
+        self.trace = []
+
+    def visit_ProtoMessage(self, node: ProtoMessage):
+        self.trace.append(f"visit {node.name.identifier}")
+
+    def leave_ProtoMessage(self, node: ProtoMessage):
+        self.trace.append(f"leave {node.name.identifier}")
+
+    def visit_ProtoMessageField(self, node: ProtoMessageField):
+        self.trace.append(f"field {node.name.identifier}")
+
+
+class CommentCounter(ProtoVisitor):
+    def __init__(self):
+        self.comments = 0
+
+    def visit_ProtoComment(self, node: ProtoComment):
+        self.comments += 1
+
+
+class EnumSkipper(ProtoVisitor):
+    def __init__(self):
+        self.enum_values = 0
+        self.nodes = 0
+
+    def visit_ProtoNode(self, node: ProtoNode):
+        self.nodes += 1
+
+    def visit_ProtoEnum(self, node: ProtoEnum):
+        return SKIP_CHILDREN
+
+    def visit_ProtoEnumValue(self, node: ProtoEnumValue):
+        self.enum_values += 1
+
+
+class VisitorTest(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.proto_file = Parser.loads(
+            dedent(
+                """
+                syntax = "proto3";
+                // top-level comment
+                message Outer {
+                    /* nested comment */
+                    message Inner {
+                        string name = 1;
+                    }
+                    Inner inner = 1;
+                    enum Kind {
+                        KIND_UNSPECIFIED = 0;
+                    }
+                }
+                enum Top {
+                    TOP_UNSPECIFIED = 0;
+                }
+                """
+            )
+        )
+
+    def test_visit_and_leave_order(self):
+        visitor = TraceVisitor()
+        visitor.walk(self.proto_file)
+        self.assertEqual(
+            visitor.trace,
+            [
+                "visit Outer",
+                "visit Inner",
+                "field name",
+                "leave Inner",
+                "field inner",
+                "leave Outer",
+            ],
+        )
+
+    def test_handlers_apply_to_subclasses(self):
+        visitor = CommentCounter()
+        visitor.walk(self.proto_file)
+        self.assertEqual(visitor.comments, 2)
+        self.assertEqual(
+            CommentCounter.handlers(ProtoMessage),
+            (None, None),
+        )
+        self.assertEqual(
+            TraceVisitor.handlers(ProtoMessage),
+            (TraceVisitor.visit_ProtoMessage, TraceVisitor.leave_ProtoMessage),
+        )
+        self.assertIs(
+            CommentCounter.dispatch_table[ProtoMessage],
+            CommentCounter.handlers(ProtoMessage),
+        )
+
+    def test_skip_children(self):
+        visitor = EnumSkipper()
+        visitor.walk(self.proto_file)
+        self.assertEqual(visitor.enum_values, 0)
+
+    def test_fused_walk(self):
+        trace_visitor = TraceVisitor()
+        comment_counter = CommentCounter()
+        enum_skipper = EnumSkipper()
+        walk(self.proto_file, [enum_skipper, trace_visitor, comment_counter])
+
+        self.assertEqual(enum_skipper.enum_values, 0)
+        self.assertEqual(comment_counter.comments, 2)
+        self.assertEqual(trace_visitor.trace[0], "visit Outer")
+        self.assertEqual(trace_visitor.trace[-1], "leave Outer")
+
+        # Skipping enums in one visitor doesn't hide them from the others.
+        class EnumValueCounter(ProtoVisitor):
+            enum_values = 0
+
+            def visit_ProtoEnumValue(self, node: ProtoEnumValue):
+                self.enum_values += 1
+
+        enum_value_counter = EnumValueCounter()
+        walk(self.proto_file, [EnumSkipper(), enum_value_counter])
+        self.assertEqual(enum_value_counter.enum_values, 2)
+
+    def test_walk_deeply_nested(self):
+        depth = 5000
+        proto_file = Parser.loads(
+            "\n".join(
+                ['syntax = "proto3";']
+                + [f"message M{i} {{" for i in range(depth)]
+                + ["}"] * depth
+            )
+        )
+        visitor = TraceVisitor()
+        visitor.walk(proto_file)
+        self.assertEqual(len(visitor.trace), 2 * depth)
+        self.assertEqual(visitor.trace[-1], "leave M0")
+
+
+if __name__ == "__main__":
+    unittest.main()
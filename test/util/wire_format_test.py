@@ -0,0 +1,60 @@
+import unittest
+
+from src.util.wire_format import (
+    I64,
+    LEN,
+    VARINT,
+    decode_fields,
+    decode_varint,
+    encode_bytes_field,
+    encode_double_field,
+    encode_string_field,
+    encode_varint,
+    encode_varint_field,
+)
+
+
+class WireFormatTest(unittest.TestCase):
+    def test_varint(self):
+        for value, encoded in [
+            (0, b"\x00"),
+            (1, b"\x01"),
+            (127, b"\x7f"),
+            (128, b"\x80\x01"),
+            (300, b"\xac\x02"),
+            (-1, b"\xff" * 9 + b"\x01"),
+        ]:
+            output = bytearray()
+            encode_varint(value, output)
+            self.assertEqual(bytes(output), encoded)
+            self.assertEqual(
+                decode_varint(encoded, 0),
+                (value if value >= 0 else value + (1 << 64), len(encoded)),
+            )
+
+    def test_fields(self):
+        output = bytearray()
+        encode_varint_field(1, 150, output)
+        encode_string_field(2, "testing", output)
+        encode_bytes_field(3, b"\x00\xff", output)
+        encode_double_field(4, 1.5, output)
+        self.assertEqual(bytes(output[:3]), b"\x08\x96\x01")
+        self.assertEqual(
+            list(decode_fields(bytes(output))),
+            [
+                (1, VARINT, 150),
+                (2, LEN, b"testing"),
+                (3, LEN, b"\x00\xff"),
+                (4, I64, b"\x00\x00\x00\x00\x00\x00\xf8\x3f"),
+            ],
+        )
+
+    def test_decode_truncated(self):
+        output = bytearray()
+        encode_string_field(1, "testing", output)
+        with self.assertRaises(ValueError):
+            list(decode_fields(bytes(output[:-1])))
+
+
+if __name__ == "__main__":
+    unittest.main()